@@ -3,12 +3,12 @@ Script to add real, valuable learning resources to the database
 Includes research papers, articles, documentation, and educational content
 """
 
-from app import app, db, LearningResource
+from app import db, LearningResource, script_app_context
 from datetime import datetime
 
 def add_real_learning_resources():
     """Add comprehensive learning resources with real URLs"""
-    with app.app_context():
+    with script_app_context():
         # Check existing resources to avoid duplicates
         existing_resources = LearningResource.query.all()
         existing_titles = {r.title for r in existing_resources}
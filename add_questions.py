@@ -3,11 +3,11 @@ Script to add more quiz questions to the database
 Run this to populate all quiz types with questions
 """
 
-from app import app, db, QuizQuestion, QuizType
+from app import db, QuizQuestion, QuizType, script_app_context
 
 def add_all_questions():
     """Add questions for all quiz types"""
-    with app.app_context():
+    with script_app_context():
         # Get all quiz types
         quiz_types = QuizType.query.all()
         print(f"Found {len(quiz_types)} quiz types")
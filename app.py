@@ -1,36 +1,46 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import (Blueprint, Flask, current_app, has_app_context, render_template, request, redirect,
+                   url_for, flash, jsonify, session)
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-import gspread
-from google.oauth2.service_account import Credentials
+from datetime import date, datetime, timedelta
 import os
 import json
-import pickle
 import pytz
-from functools import wraps
+import threading
+import time
+from functools import partial, wraps
+
+# pandas, NumPy and scikit-learn (via survey_data and ml_model) are imported on first use,
+# not here: most requests and the maintenance scripts that import this module never need them
+from training_jobs import TrainingJobRunner
+from model_registry import ModelWatcher
+from inference_server import InferenceClient
 
 SURVEY_CSV_PATH = 'survey_data_backup.csv'
 SURVEY_XLSX_PATH = 'Project Survey (Responses).xlsx'
+# CSV exports at least this large are aggregated chunk by chunk instead of loaded whole
+SURVEY_STREAMING_MIN_BYTES = 256 * 1024 * 1024
+
+# ML model module availability, checked on first use (see ml_model_module())
+ml_model_available = None
 
-# Import ML model
-try:
-    from ml_model import DigitalAwarenessML
+def ml_model_module():
+    """Import ml_model (and scikit-learn) on first use; None if it is not available"""
+    global ml_model_available
+    if ml_model_available is False:
+        return None
+    try:
+        import ml_model as module
+    except ImportError:
+        ml_model_available = False
+        print("Warning: ML model module not available")
+        return None
     ml_model_available = True
-except ImportError:
-    ml_model_available = False
-    print("Warning: ML model module not available")
+    return module
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///digital_awareness.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pages, APIs and template filters; registered on each app built by create_app()
+bp = Blueprint('main', __name__)
 
 # Timezone configuration - Change this to your country's timezone
 # Common timezones: 'Asia/Kolkata' (India), 'America/New_York' (US Eastern), 
@@ -57,7 +67,7 @@ def utc_to_local(utc_dt):
     return utc_dt.astimezone(local_tz)
 
 # Jinja2 filter for timezone conversion
-@app.template_filter('localtime')
+@bp.app_template_filter('localtime')
 def localtime_filter(dt):
     """Jinja2 filter to convert UTC to local time"""
     if dt is None:
@@ -65,7 +75,7 @@ def localtime_filter(dt):
     local_dt = utc_to_local(dt)
     return local_dt.strftime('%Y-%m-%d %H:%M')
 
-@app.template_filter('localtime_date')
+@bp.app_template_filter('localtime_date')
 def localtime_date_filter(dt):
     """Jinja2 filter to convert UTC to local time (date only)"""
     if dt is None:
@@ -73,7 +83,7 @@ def localtime_date_filter(dt):
     local_dt = utc_to_local(dt)
     return local_dt.strftime('%Y-%m-%d')
 
-@app.template_filter('localtime_time')
+@bp.app_template_filter('localtime_time')
 def localtime_time_filter(dt):
     """Jinja2 filter to convert UTC to local time (time only)"""
     if dt is None:
@@ -81,115 +91,52 @@ def localtime_time_filter(dt):
     local_dt = utc_to_local(dt)
     return local_dt.strftime('%H:%M')
 
-db = SQLAlchemy(app)
+# Bound to each app in create_app()
+db = SQLAlchemy()
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'main.login'
 
 def load_awareness_dataframe():
-    """Load survey responses from CSV or Excel for visualization."""
-    if os.path.exists(SURVEY_CSV_PATH):
-        try:
-            return pd.read_csv(SURVEY_CSV_PATH)
-        except Exception as e:
-            print(f"Error reading CSV file: {e}")
-            # Try to load from Excel if CSV fails
-            if os.path.exists(SURVEY_XLSX_PATH):
-                pass  # Will try Excel below
+    """Load survey responses from the columnar store, CSV or Excel for visualization."""
+    from survey_data import load_survey_frame
+    try:
+        return load_survey_frame(SURVEY_CSV_PATH, SURVEY_XLSX_PATH)
+    except ImportError:
+        print("openpyxl is required to read Excel files. Install with: pip install openpyxl")
+        return None
+    except Exception as e:
+        print(f"Error reading survey data: {e}")
+        return None
+
+def build_awareness_insights(prepared_df=None):
+    """
+    Load survey dataset and compute aggregated awareness metrics.
+    prepared_df, if given, is an already mapped and scored survey frame
+    (see survey_data.prepare_survey_frame()) and is used instead of loading the source.
+    """
+    import numpy as np
+    import pandas as pd
+    from survey_data import aggregate_survey_csv, resolve_survey_schema, score_knowledge_frame
+
+    if prepared_df is not None:
+        if prepared_df.empty:
             return None
-    
-    if os.path.exists(SURVEY_XLSX_PATH):
+        # Shallow copy: the derived columns below must not leak into the caller's frame
+        df = prepared_df.copy(deep=False)
+        schema = resolve_survey_schema(df.columns)
+    elif os.path.exists(SURVEY_CSV_PATH) and os.path.getsize(SURVEY_CSV_PATH) >= SURVEY_STREAMING_MIN_BYTES:
         try:
-            df = pd.read_excel(SURVEY_XLSX_PATH)
-            # Save as CSV for future use
-            try:
-                df.to_csv(SURVEY_CSV_PATH, index=False)
-                print(f"Converted Excel to CSV: {SURVEY_CSV_PATH}")
-            except Exception as e:
-                print(f"Warning: Could not save CSV file: {e}")
-            return df
-        except ImportError as exc:
-            print("openpyxl is required to read Excel files. Install with: pip install openpyxl")
-            return None
+            return aggregate_survey_csv(SURVEY_CSV_PATH).to_insights()
         except Exception as e:
-            print(f"Error reading Excel file: {e}")
+            print(f"Error streaming survey data: {e}")
             return None
-    return None
-
-def map_survey_columns(df):
-    """Standardize survey column names for downstream processing."""
-    column_mapping = {}
-    for col in df.columns:
-        col_lower = col.lower()
-        if 'age' in col_lower and 'range' in col_lower:
-            column_mapping[col] = 'Age_Range'
-        elif 'gender' in col_lower:
-            column_mapping[col] = 'Gender'
-        elif ('educational' in col_lower or 'academic' in col_lower) and 'background' in col_lower:
-            column_mapping[col] = 'Academic_Stream'
-        elif 'current level of study' in col_lower or ('level' in col_lower and 'study' in col_lower):
-            column_mapping[col] = 'Year_of_Study'
-        elif 'privacy policy' in col_lower:
-            column_mapping[col] = 'Privacy_Policy_Reading'
-        elif 'app permissions' in col_lower:
-            column_mapping[col] = 'App_Permissions_Review'
-        elif 'uninstalled' in col_lower and 'permissions' in col_lower:
-            column_mapping[col] = 'Uninstall_Due_Privacy'
-        elif 'different passwords' in col_lower:
-            column_mapping[col] = 'Different_Passwords'
-        elif 'social media app' in col_lower and 'microphone' in col_lower:
-            column_mapping[col] = 'Social_App_Permissions'
-        elif 'privacy settings' in col_lower and 'frequency' in col_lower:
-            column_mapping[col] = 'Privacy_Settings_Review'
-        elif 'true/false' in col_lower and 'incognito' in col_lower:
-            column_mapping[col] = 'Knowledge_Incognito_ISP'
-        elif 'true/false' in col_lower and 'anonymous' in col_lower:
-            column_mapping[col] = 'Knowledge_Anonymous_Trace'
-        elif 'true/false' in col_lower and 'social media' in col_lower:
-            column_mapping[col] = 'Knowledge_SocialMedia_Messages'
-    return df.rename(columns=column_mapping)
-
-def interpret_survey_boolean(value):
-    """Normalize survey responses (textual or numeric) to boolean True/False."""
-    if pd.isna(value):
-        return None
-    if isinstance(value, (int, float)) and not isinstance(value, bool):
-        if value == 1:
-            return True
-        if value == 0:
-            return False
-    normalized = str(value).strip().lower()
-    true_tokens = {'true', 't', 'a', 'correct', 'yes', 'y', '1', '1.0'}
-    false_tokens = {'false', 'f', 'b', 'incorrect', 'no', 'n', '0', '0.0'}
-    if normalized in true_tokens:
-        return True
-    if normalized in false_tokens:
-        return False
-    return None
-
-def calculate_row_knowledge_score(row):
-    score = 0
-    total = 0
-    for col_name, desired in (
-        ('Knowledge_Incognito_ISP', False),
-        ('Knowledge_Anonymous_Trace', False),
-        ('Knowledge_SocialMedia_Messages', True),
-    ):
-        if col_name in row:
-            total += 1
-            answer = interpret_survey_boolean(row[col_name])
-            if answer is not None and answer is desired:
-                score += 1
-    percentage = (score / total) * 100 if total else 0
-    return percentage
-
-def build_awareness_insights():
-    """Load survey dataset and compute aggregated awareness metrics."""
-    df = load_awareness_dataframe()
-    if df is None or df.empty:
-        return None
-    df = map_survey_columns(df.copy())
-    df['Knowledge_Score'] = df.apply(calculate_row_knowledge_score, axis=1)
+    else:
+        df = load_awareness_dataframe()
+        if df is None or df.empty:
+            return None
+        schema = resolve_survey_schema(df.columns)
+        df = df.rename(columns=schema.rename_map)
+        df['Knowledge_Score'] = score_knowledge_frame(df)
     df['Knowledge_Level'] = pd.cut(
         df['Knowledge_Score'],
         bins=[-0.1, 40, 70, 100],
@@ -215,13 +162,13 @@ def build_awareness_insights():
     }
     
     # Demographics analysis
-    avg_by_age = df.groupby('Age_Range')['Knowledge_Score'].mean().dropna().round(1).to_dict()
-    avg_by_gender = df.groupby('Gender')['Knowledge_Score'].mean().dropna().round(1).to_dict()
+    avg_by_age = df.groupby('Age_Range', observed=True)['Knowledge_Score'].mean().dropna().round(1).to_dict()
+    avg_by_gender = df.groupby('Gender', observed=True)['Knowledge_Score'].mean().dropna().round(1).to_dict()
     
     # Educational background analysis
     avg_by_education = {}
     if 'Academic_Stream' in df.columns:
-        avg_by_education = df.groupby('Academic_Stream')['Knowledge_Score'].mean().dropna().round(1).to_dict()
+        avg_by_education = df.groupby('Academic_Stream', observed=True)['Knowledge_Score'].mean().dropna().round(1).to_dict()
         education_counts = df['Academic_Stream'].value_counts().to_dict()
     else:
         education_counts = {}
@@ -230,7 +177,7 @@ def build_awareness_insights():
     avg_by_year = {}
     year_counts = {}
     if 'Year_of_Study' in df.columns:
-        avg_by_year = df.groupby('Year_of_Study')['Knowledge_Score'].mean().dropna().round(1).to_dict()
+        avg_by_year = df.groupby('Year_of_Study', observed=True)['Knowledge_Score'].mean().dropna().round(1).to_dict()
         year_counts = df['Year_of_Study'].value_counts().to_dict()
     
     # Privacy behaviors
@@ -259,49 +206,43 @@ def build_awareness_insights():
     ai_tracking_comfort_counts = {}
     ai_accountability_counts = {}
     
-    # Check for AI-related columns in original format
-    for col in df.columns:
-        col_lower = str(col).lower()
-        if 'ai' in col_lower and ('mental' in col_lower or 'social media posts' in col_lower):
-            ai_mental_health_counts = df[col].value_counts().to_dict()
-        elif 'search history' in col_lower and 'targeted ads' in col_lower:
-            ai_targeted_ads_counts = df[col].value_counts().to_dict()
-        elif 'ai tracked' in col_lower or ('online habits' in col_lower and 'mental health' in col_lower):
-            ai_tracking_comfort_counts = df[col].value_counts().to_dict()
-        elif 'accountable' in col_lower and 'ai' in col_lower:
-            # This might be a multi-select, so we'll count unique values
-            all_values = []
-            for val in df[col].dropna():
-                if isinstance(val, str) and ',' in val:
-                    all_values.extend([v.strip() for v in val.split(',')])
-                else:
-                    all_values.append(str(val))
-            if all_values:
-                ai_accountability_counts = pd.Series(all_values).value_counts().to_dict()
+    if schema.ai_mental_health is not None:
+        ai_mental_health_counts = df[schema.ai_mental_health].value_counts().to_dict()
+    if schema.ai_targeted_ads is not None:
+        ai_targeted_ads_counts = df[schema.ai_targeted_ads].value_counts().to_dict()
+    if schema.ai_tracking_comfort is not None:
+        ai_tracking_comfort_counts = df[schema.ai_tracking_comfort].value_counts().to_dict()
+    if schema.ai_accountability is not None:
+        # This might be a multi-select, so we'll count unique values
+        all_values = []
+        for val in df[schema.ai_accountability].dropna():
+            if isinstance(val, str) and ',' in val:
+                all_values.extend([v.strip() for v in val.split(',')])
+            else:
+                all_values.append(str(val))
+        if all_values:
+            ai_accountability_counts = pd.Series(all_values).value_counts().to_dict()
     
     # Knowledge check questions breakdown
     knowledge_incognito_correct = 0
     knowledge_anonymous_correct = 0
     knowledge_social_correct = 0
-    knowledge_total = 0
-    
-    for col in df.columns:
-        col_lower = str(col).lower()
-        if 'incognito' in col_lower and 'isp' in col_lower:
-            knowledge_total += 1
-            # False is correct answer
-            correct_answers = df[col].apply(lambda x: str(x).strip().lower() in ['0.0', '0', 'false', 'b', 'incorrect', 'no'])
-            knowledge_incognito_correct = int(correct_answers.sum())
-        elif 'anonymous' in col_lower and ('trace' in col_lower or 'impossible' in col_lower):
-            knowledge_total += 1
-            # False is correct answer
-            correct_answers = df[col].apply(lambda x: str(x).strip().lower() in ['0.0', '0', 'false', 'b', 'incorrect', 'no'])
-            knowledge_anonymous_correct = int(correct_answers.sum())
-        elif 'social media' in col_lower and 'messages' in col_lower:
-            knowledge_total += 1
-            # True is correct answer
-            correct_answers = df[col].apply(lambda x: str(x).strip().lower() in ['1.0', '1', 'true', 'a', 'correct', 'yes'])
-            knowledge_social_correct = int(correct_answers.sum())
+    knowledge_total = schema.knowledge_total
+    false_answers = ['0.0', '0', 'false', 'b', 'incorrect', 'no']
+    true_answers = ['1.0', '1', 'true', 'a', 'correct', 'yes']
+    
+    if schema.knowledge_incognito is not None:
+        # False is correct answer
+        correct_answers = df[schema.knowledge_incognito].apply(lambda x: str(x).strip().lower() in false_answers)
+        knowledge_incognito_correct = int(correct_answers.sum())
+    if schema.knowledge_anonymous is not None:
+        # False is correct answer
+        correct_answers = df[schema.knowledge_anonymous].apply(lambda x: str(x).strip().lower() in false_answers)
+        knowledge_anonymous_correct = int(correct_answers.sum())
+    if schema.knowledge_social is not None:
+        # True is correct answer
+        correct_answers = df[schema.knowledge_social].apply(lambda x: str(x).strip().lower() in true_answers)
+        knowledge_social_correct = int(correct_answers.sum())
     
     knowledge_breakdown = {
         'incognito': {'correct': knowledge_incognito_correct, 'total': len(df) if knowledge_total > 0 else 0},
@@ -310,14 +251,8 @@ def build_awareness_insights():
     }
     
     # AI Trust levels
-    trust_music_scores = []
-    trust_exams_scores = []
-    for col in df.columns:
-        col_lower = str(col).lower()
-        if 'trust ai' in col_lower and 'music' in col_lower:
-            trust_music_scores = df[col].dropna().astype(float).tolist()
-        elif 'trust ai' in col_lower and 'exam' in col_lower:
-            trust_exams_scores = df[col].dropna().astype(float).tolist()
+    trust_music_scores = df[schema.trust_music].dropna().astype(float).tolist() if schema.trust_music is not None else []
+    trust_exams_scores = df[schema.trust_exams].dropna().astype(float).tolist() if schema.trust_exams is not None else []
     
     trust_music_avg = round(float(np.mean(trust_music_scores)), 1) if trust_music_scores else 0
     trust_exams_avg = round(float(np.mean(trust_exams_scores)), 1) if trust_exams_scores else 0
@@ -353,11 +288,7 @@ def build_awareness_insights():
     }
     
     # Curriculum opinion
-    curriculum_counts = {}
-    for col in df.columns:
-        if 'curriculum' in str(col).lower() and 'university' in str(col).lower():
-            curriculum_counts = df[col].value_counts().to_dict()
-            break
+    curriculum_counts = df[schema.curriculum].value_counts().to_dict() if schema.curriculum is not None else {}
     
     return {
         'summary': summary,
@@ -387,40 +318,272 @@ def build_awareness_insights():
         'timeline_daily': timeline_daily,
         'raw_scores': df['Knowledge_Score'].fillna(0).round(1).tolist()
     }
+
+# Insights cache - rebuilt only when the survey source files change
+INSIGHTS_CACHE_PATH = 'insights_cache.json'
+# Bumped whenever the snapshot layout changes, so older cache files are rebuilt
+INSIGHTS_CACHE_VERSION = 2
+INSIGHTS_JSON_KEYS = (
+    'score_distribution', 'score_histogram', 'avg_by_age', 'avg_by_gender',
+    'avg_by_education', 'education_counts', 'avg_by_year', 'year_counts',
+    'privacy_policy_counts', 'permissions_counts', 'password_counts',
+    'uninstall_counts', 'social_perms_counts', 'privacy_settings_counts',
+    'ai_mental_health_counts', 'ai_targeted_ads_counts', 'ai_tracking_comfort_counts',
+    'ai_accountability_counts', 'knowledge_breakdown', 'curriculum_counts',
+    'timeline', 'timeline_daily', 'raw_scores'
+)
+_insights_cache = {'signature': None, 'snapshot': None}
+_insights_lock = threading.Lock()
+
+def survey_source_signature():
+    """Return a cheap fingerprint (mtime/size) of the survey source files."""
+    signature = [INSIGHTS_CACHE_VERSION]
+    for path in (SURVEY_CSV_PATH, SURVEY_XLSX_PATH):
+        try:
+            stat = os.stat(path)
+            signature.append([path, stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            signature.append([path, None, None])
+    return signature
+
+def _read_insights_cache_file(signature):
+    try:
+        with open(INSIGHTS_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('signature') != signature:
+        return None
+    return cached.get('snapshot')
+
+def _write_insights_cache_file(signature, snapshot):
+    tmp_path = f"{INSIGHTS_CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'signature': signature, 'snapshot': snapshot}, f)
+        os.replace(tmp_path, INSIGHTS_CACHE_PATH)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Warning: Could not write insights cache: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+def build_insights_snapshot(insights):
+    """Pre-serialize the chart payloads rendered by the visualizations page."""
+    return {
+        'summary': insights['summary'],
+        'trust_music_avg': insights['trust_music_avg'],
+        'trust_exams_avg': insights['trust_exams_avg'],
+        'charts': {key: json.dumps(insights[key]) for key in INSIGHTS_JSON_KEYS}
+    }
+
+def get_awareness_insights_snapshot():
+    """
+    Return the cached insights snapshot, rebuilding it only when the survey
+    CSV/XLSX changed. Returns None when no survey data is available.
+    """
+    signature = survey_source_signature()
+    if _insights_cache['signature'] == signature:
+        return _insights_cache['snapshot']
+    
+    with _insights_lock:
+        signature = survey_source_signature()
+        if _insights_cache['signature'] == signature:
+            return _insights_cache['snapshot']
+        
+        snapshot = _read_insights_cache_file(signature)
+        if snapshot is None:
+            insights = build_awareness_insights()
+            if insights is None:
+                return None
+            snapshot = build_insights_snapshot(insights)
+            # Loading may have converted the XLSX into the CSV, so fingerprint again
+            signature = survey_source_signature()
+            _write_insights_cache_file(signature, snapshot)
+        
+        _insights_cache['signature'] = signature
+        _insights_cache['snapshot'] = snapshot
+        return snapshot
+
+def refresh_awareness_insights(prepared_df=None, insights=None):
+    """
+    Rebuild the insights snapshot from a prepared survey frame and store it in both caches.
+    insights, if given, are already aggregated (see SurveyAggregates.to_insights()) and used as is.
+    """
+    if insights is None:
+        insights = build_awareness_insights(prepared_df)
+    if insights is None:
+        return None
+    snapshot = build_insights_snapshot(insights)
+    with _insights_lock:
+        signature = survey_source_signature()
+        _write_insights_cache_file(signature, snapshot)
+        _insights_cache['signature'] = signature
+        _insights_cache['snapshot'] = snapshot
+    return snapshot
+
 # Google Sheets Configuration
 SHEET_URL = 'https://docs.google.com/spreadsheets/d/1ZoZ7ZQXVLnk5JokphSQK0tqIT9IshB2NCg9_UCiAw6s/edit?gid=1620608954#gid=1620608954'
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
 
-# Initialize ML Model (will be loaded when needed)
+# Initialize ML Model (will be loaded when needed); shared by every app in the process, see create_app()
 ml_model = None
 
+def load_ml_model_artifact(path):
+    """Load one registry artifact into a new DigitalAwarenessML (None on failure)"""
+    try:
+        model = ml_model_module().DigitalAwarenessML()
+        if not model.load_model(path):
+            return None
+        if current_app.config['ML_ONLINE_LEARNING']:
+            # Persist live updates of the outgoing model so the new one resumes from them
+            if ml_model is not None and getattr(ml_model, 'online_model', None) is not None:
+                ml_model.online_model.close()
+            model.enable_online_learning()
+        return model
+    except Exception as e:
+        print(f"Error loading ML model from {path}: {e}")
+        return None
+
+def build_ml_user_data(user, avg_score=None):
+    """Feature record for the ML model from a user's profile and average quiz score"""
+    user_data = {
+        'Age_Range': user.age_range or '18-21',
+        'Gender': user.gender or 'Male',
+        'Academic_Stream': user.academic_stream or 'B.Tech',
+        'Year_of_Study': user.year_of_study or '2nd year',
+        'Privacy_Policy_Reading': 'Sometimes',
+        'App_Permissions_Review': 'Sometimes',
+        'Different_Passwords': 'Yes'
+    }
+    if avg_score is not None:
+        if avg_score < 40:
+            user_data['Privacy_Policy_Reading'] = 'Never'
+            user_data['App_Permissions_Review'] = 'Never'
+        elif avg_score >= 70:
+            user_data['Privacy_Policy_Reading'] = 'Often'
+            user_data['App_Permissions_Review'] = 'Often'
+    return user_data
+
+# Tracks the registry's CURRENT model version; new versions are swapped in on the next request
+model_watcher = ModelWatcher(load_ml_model_artifact)
+
+# Retraining runs in a background thread; see /admin/update_model
+training_jobs = TrainingJobRunner()
+
+# Cold-start metrics for the in-process model, exposed at /api/model_status
+_ml_model_init_lock = threading.Lock()
+_ml_model_metrics_lock = threading.Lock()
+ml_model_metrics = {
+    'cold_start_seconds': None,
+    'cold_start_source': None,
+    'cold_start_waiters': 0,
+    'warmed_up': False
+}
+
+def _initialize_ml_model():
+    """Single-flight first load: one thread loads or trains the model, concurrent callers wait for it"""
+    if not _ml_model_init_lock.acquire(blocking=False):
+        with _ml_model_metrics_lock:
+            ml_model_metrics['cold_start_waiters'] += 1
+        _ml_model_init_lock.acquire()
+    try:
+        # Another thread may have finished the load while this one waited
+        current = model_watcher.get() or ml_model
+        if current is not None:
+            return current
+        
+        module = ml_model_module()
+        model = module.DigitalAwarenessML()
+        if os.path.exists(module.LEGACY_MODEL_PATH) and model.load_model(module.LEGACY_MODEL_PATH):
+            # Publish the pre-registry model file as the first version
+            source = 'legacy'
+            model.save_model()
+        else:
+            # If model doesn't exist, try to train it
+            print("ML model not found. Training new model...")
+            df = model.load_survey_data()
+            if df is None or len(df) == 0:
+                return None
+            source = 'trained'
+            X, y = model.preprocess_data(df)
+            model.train_model(X, y)
+            model.save_model()
+        with _ml_model_metrics_lock:
+            ml_model_metrics['cold_start_source'] = source
+        return model_watcher.get() or model
+    finally:
+        _ml_model_init_lock.release()
+
 def get_ml_model():
-    """Get or initialize ML model"""
+    """Get the current ML model, loading (or training) it on first use"""
     global ml_model
-    if ml_model is not None:
+    if current_app.config['ML_INFERENCE_ADDRESS']:
+        # Remote mode: the inference server owns the model, this worker only holds a client
+        if ml_model is None:
+            try:
+                ml_model = InferenceClient(current_app.config['ML_INFERENCE_ADDRESS'])
+            except ValueError as e:
+                print(f"Error configuring the inference client: {e}")
+                return None
         return ml_model
-    
-    if not ml_model_available:
+    if ml_model_module() is None:
         return None
     
+    cold = ml_model is None
+    started = time.perf_counter()
     try:
-        ml_model = DigitalAwarenessML()
-        if os.path.exists('ml_model.pkl'):
-            if ml_model.load_model('ml_model.pkl'):
-                return ml_model
-        # If model doesn't exist, try to train it
-        print("ML model not found. Training new model...")
-        df = ml_model.load_survey_data()
-        if df is not None and len(df) > 0:
-            X, y = ml_model.preprocess_data(df)
-            ml_model.train_model(X, y)
-            ml_model.save_model()
-            return ml_model
+        model = model_watcher.get()
+        if model is None and ml_model is None:
+            model = _initialize_ml_model()
+        if model is not None:
+            ml_model = model
+            if cold:
+                with _ml_model_metrics_lock:
+                    if ml_model_metrics['cold_start_seconds'] is None:
+                        ml_model_metrics['cold_start_seconds'] = round(time.perf_counter() - started, 4)
+                        ml_model_metrics['cold_start_source'] = ml_model_metrics['cold_start_source'] or 'registry'
     except Exception as e:
         print(f"Error initializing ML model: {e}")
-        ml_model = None
     
-    return None
+    return ml_model
+
+def warm_up_ml_model():
+    """Load (or train) the model and run one prediction before serving traffic"""
+    ml = get_ml_model()
+    if ml is None:
+        print("ML model warm-up skipped: no model available")
+        return False
+    try:
+        ml.predict_many([{}])
+    except Exception as e:
+        print(f"ML model warm-up prediction failed: {e}")
+    with _ml_model_metrics_lock:
+        ml_model_metrics['warmed_up'] = True
+    print(f"ML model warmed up (version {model_watcher.version})")
+    return True
+
+def get_ml_model_status():
+    """Snapshot of the model loader metrics"""
+    with _ml_model_metrics_lock:
+        status = dict(ml_model_metrics)
+    status.update({
+        'available': ml_model is not None,
+        'version': model_watcher.version,
+        'load_count': model_watcher.load_count,
+        'last_load_seconds': round(model_watcher.last_load_seconds, 4) if model_watcher.last_load_seconds is not None else None
+    })
+    if isinstance(ml_model, InferenceClient):
+        status['version'] = ml_model.version
+        try:
+            status['inference_server'] = ml_model.status()
+        except Exception as e:
+            status['inference_server'] = {'error': str(e)}
+    online = ml_model.online_model if ml_model is not None else None
+    status['online_updates'] = online.n_updates if online is not None else None
+    status['online_weight'] = round(online.weight(), 4) if online is not None else None
+    return status
 
 # Database Models
 class User(UserMixin, db.Model):
@@ -479,6 +642,61 @@ class QuizAttempt(db.Model):
     completed_at = db.Column(db.DateTime, default=datetime.utcnow)
     answers = db.Column(db.Text)  # JSON string of answers
 
+class UserFeatures(db.Model):
+    """Running quiz aggregates per user, updated on every submission (ML inputs and page stats)"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    mean_score = db.Column(db.Float, nullable=False, default=0.0)
+    best_score = db.Column(db.Float, nullable=False, default=0.0)
+    total_time_spent = db.Column(db.Integer, nullable=False, default=0)  # Seconds
+    last_attempt_at = db.Column(db.DateTime)
+    category_stats = db.Column(db.Text, nullable=False, default='{}')  # JSON {quiz_type: [attempts, percentage_sum]}
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def record_attempt(self, percentage, quiz_type=None, time_taken=None, completed_at=None):
+        """Fold one quiz attempt into the running aggregates"""
+        count = (self.attempt_count or 0) + 1
+        self.mean_score = (self.mean_score or 0.0) + (percentage - (self.mean_score or 0.0)) / count
+        self.attempt_count = count
+        self.best_score = max(self.best_score or 0.0, percentage)
+        self.total_time_spent = (self.total_time_spent or 0) + int(time_taken or 0)
+        completed_at = completed_at or datetime.utcnow()
+        if self.last_attempt_at is None or completed_at > self.last_attempt_at:
+            self.last_attempt_at = completed_at
+        self.add_category_attempt(percentage, quiz_type)
+
+    def add_category_attempt(self, percentage, quiz_type=None):
+        stats = json.loads(self.category_stats or '{}')
+        entry = stats.setdefault(quiz_type or 'General', [0, 0.0])
+        entry[0] += 1
+        entry[1] += percentage
+        self.category_stats = json.dumps(stats)
+
+    def category_accuracy(self):
+        """Per quiz type breakdown, most attempted first"""
+        stats = [
+            {'quiz_type': quiz_type, 'count': count, 'average': total / count if count else 0.0}
+            for quiz_type, (count, total) in json.loads(self.category_stats or '{}').items()
+        ]
+        stats.sort(key=lambda x: x['count'], reverse=True)
+        return stats
+
+    def average_score(self):
+        """Mean quiz percentage, or None before the first attempt"""
+        return self.mean_score if self.attempt_count else None
+
+class UserRecommendation(db.Model):
+    """Materialized model output per user, read by the pages instead of running inference"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    knowledge_level = db.Column(db.String(20))
+    confidence = db.Column(db.Float)
+    recommendations = db.Column(db.Text, nullable=False, default='[]')  # JSON list of strings
+    model_version = db.Column(db.String(100))  # Registry version that produced the row
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def recommendation_list(self):
+        return json.loads(self.recommendations or '[]')
+
 class UserActivity(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -495,473 +713,196 @@ class LearningResource(db.Model):
     resource_type = db.Column(db.String(50))  # article, video, course, etc.
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class SurveyImportState(db.Model):
+    """High-water mark of the survey importer, one row per source file"""
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(500), unique=True, nullable=False)
+    last_timestamp = db.Column(db.DateTime)  # Newest imported response Timestamp
+    last_timestamp_keys = db.Column(db.Text)  # JSON keys of the responses imported at last_timestamp
+    rows_seen = db.Column(db.Integer, default=0)  # Rows processed (for exports without Timestamp)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SchemaMigration(db.Model):
+    """Database migrations applied by migrations.py"""
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
-# Initialize database
-with app.app_context():
-    db.create_all()
-    
-    # Migrate existing database - add new columns if they don't exist
-    try:
-        from sqlalchemy import inspect, text
-        inspector = inspect(db.engine)
-        
-        # Check if tables exist
-        tables = inspector.get_table_names()
-        
-        if 'quiz_question' in tables:
-            quiz_question_columns = [col['name'] for col in inspector.get_columns('quiz_question')]
-            
-            # Add quiz_type and time_limit to QuizQuestion if missing
-            if 'quiz_type' not in quiz_question_columns:
-                db.session.execute(text('ALTER TABLE quiz_question ADD COLUMN quiz_type VARCHAR(100) DEFAULT "General"'))
-                db.session.commit()
-                print("Added quiz_type column to quiz_question")
-            
-            if 'time_limit' not in quiz_question_columns:
-                db.session.execute(text('ALTER TABLE quiz_question ADD COLUMN time_limit INTEGER DEFAULT 60'))
-                db.session.commit()
-                print("Added time_limit column to quiz_question")
-        
-        if 'quiz_attempt' in tables:
-            quiz_attempt_columns = [col['name'] for col in inspector.get_columns('quiz_attempt')]
-            
-            # Add quiz_type, time_taken, time_limit to QuizAttempt if missing
-            if 'quiz_type' not in quiz_attempt_columns:
-                db.session.execute(text('ALTER TABLE quiz_attempt ADD COLUMN quiz_type VARCHAR(100)'))
-                db.session.commit()
-                print("Added quiz_type column to quiz_attempt")
-            
-            if 'time_taken' not in quiz_attempt_columns:
-                db.session.execute(text('ALTER TABLE quiz_attempt ADD COLUMN time_taken INTEGER'))
-                db.session.commit()
-                print("Added time_taken column to quiz_attempt")
-            
-            if 'time_limit' not in quiz_attempt_columns:
-                db.session.execute(text('ALTER TABLE quiz_attempt ADD COLUMN time_limit INTEGER'))
-                db.session.commit()
-                print("Added time_limit column to quiz_attempt")
-    except Exception as e:
-        print(f"Migration note: {e}")
-        # If migration fails, you may need to delete database and recreate
-        print("If errors persist, delete digital_awareness.db and restart the app")
-    
-    # Create default admin user if not exists
-    if not User.query.filter_by(username='admin').first():
-        admin = User(
-            username='admin',
-            email='admin@example.com',
-            password_hash=generate_password_hash('admin123'),
-            is_admin=True
-        )
-        db.session.add(admin)
-        db.session.commit()
-    
-    # Add quiz types if none exist
-    if QuizType.query.count() == 0:
-        quiz_types = [
-            QuizType(
-                name="Privacy Basics",
-                description="Test your knowledge about digital privacy fundamentals. Learn how to protect your personal information online.",
-                icon="fa-shield-alt",
-                color="primary",
-                time_limit=300,  # 5 minutes
-                question_count=5,
-                difficulty="Easy"
-            ),
-            QuizType(
-                name="Data Security",
-                description="Master password security, encryption, and data protection practices. Essential for keeping your data safe.",
-                icon="fa-lock",
-                color="success",
-                time_limit=360,  # 6 minutes
-                question_count=6,
-                difficulty="Medium"
-            ),
-            QuizType(
-                name="AI Ethics",
-                description="Understand ethical considerations in artificial intelligence, data collection, and algorithmic decision-making.",
-                icon="fa-robot",
-                color="info",
-                time_limit=420,  # 7 minutes
-                question_count=7,
-                difficulty="Hard"
-            ),
-            QuizType(
-                name="Social Media Privacy",
-                description="Learn about privacy settings, data sharing, and how social media platforms use your information.",
-                icon="fa-share-alt",
-                color="warning",
-                time_limit=300,  # 5 minutes
-                question_count=5,
-                difficulty="Medium"
-            ),
-            QuizType(
-                name="Quick Challenge",
-                description="Fast-paced quiz with time pressure. Test your knowledge under time constraints!",
-                icon="fa-bolt",
-                color="danger",
-                time_limit=180,  # 3 minutes
-                question_count=5,
-                difficulty="Medium"
-            ),
-        ]
-        for qt in quiz_types:
-            db.session.add(qt)
-        db.session.commit()
-    
-    # Add sample quiz questions if none exist
-    if QuizQuestion.query.count() == 0:
-        sample_questions = [
-            # Privacy Basics Questions
-            QuizQuestion(
-                question_text="Incognito mode hides your browsing history from your Internet Service Provider (ISP).",
-                option_a="True",
-                option_b="False",
-                option_c="Partially True",
-                option_d="Depends on the browser",
-                correct_answer="B",
-                category="Privacy",
-                quiz_type="Privacy Basics",
-                explanation="Incognito mode only prevents your browser from storing history locally. Your ISP can still see your browsing activity.",
-                difficulty="Easy",
-                time_limit=45
-            ),
-            QuizQuestion(
-                question_text="What is the primary purpose of a privacy policy?",
-                option_a="To protect user data",
-                option_b="To inform users how their data is collected and used",
-                option_c="To prevent data breaches",
-                option_d="To comply with advertising requirements",
-                correct_answer="B",
-                category="Privacy",
-                quiz_type="Privacy Basics",
-                explanation="Privacy policies are meant to inform users about data collection and usage practices.",
-                difficulty="Easy",
-                time_limit=40
-            ),
-            QuizQuestion(
-                question_text="Which of the following is NOT a privacy best practice?",
-                option_a="Reading privacy policies before signing up",
-                option_b="Sharing passwords with trusted friends",
-                option_c="Reviewing app permissions regularly",
-                option_d="Using two-factor authentication",
-                correct_answer="B",
-                category="Privacy",
-                quiz_type="Privacy Basics",
-                explanation="Never share passwords, even with trusted friends. This is a security risk.",
-                difficulty="Easy",
-                time_limit=35
-            ),
-            QuizQuestion(
-                question_text="What does 'cookies' refer to in web browsing?",
-                option_a="Small text files stored on your device",
-                option_b="Security certificates",
-                option_c="Browser extensions",
-                option_d="Encrypted passwords",
-                correct_answer="A",
-                category="Privacy",
-                quiz_type="Privacy Basics",
-                explanation="Cookies are small text files that websites store on your device to remember information.",
-                difficulty="Easy",
-                time_limit=40
-            ),
-            QuizQuestion(
-                question_text="Should you accept all cookies when visiting a website?",
-                option_a="Yes, always",
-                option_b="No, only accept necessary cookies",
-                option_c="It doesn't matter",
-                option_d="Only on trusted sites",
-                correct_answer="B",
-                category="Privacy",
-                quiz_type="Privacy Basics",
-                explanation="Only accept necessary cookies. Optional cookies are often used for tracking and advertising.",
-                difficulty="Medium",
-                time_limit=45
-            ),
-            # Data Security Questions
-            QuizQuestion(
-                question_text="What is the best practice for password security?",
-                option_a="Use the same password everywhere",
-                option_b="Use different passwords for different accounts",
-                option_c="Write passwords in a notebook",
-                option_d="Share passwords with friends",
-                correct_answer="B",
-                category="Data Security",
-                quiz_type="Data Security",
-                explanation="Using unique passwords for each account prevents a single breach from compromising all your accounts.",
-                difficulty="Easy",
-                time_limit=30
-            ),
-            QuizQuestion(
-                question_text="How often should you review app permissions on your phone?",
-                option_a="Never",
-                option_b="Once a year",
-                option_c="Every few months",
-                option_d="When installing new apps",
-                correct_answer="C",
-                category="Data Security",
-                quiz_type="Data Security",
-                explanation="Regularly reviewing app permissions helps ensure apps only have access to data they need.",
-                difficulty="Easy",
-                time_limit=35
-            ),
-            QuizQuestion(
-                question_text="What is two-factor authentication (2FA)?",
-                option_a="Using two different passwords",
-                option_b="Verifying identity using two different methods",
-                option_c="Having two email accounts",
-                option_d="Using two different browsers",
-                correct_answer="B",
-                category="Data Security",
-                quiz_type="Data Security",
-                explanation="2FA requires two different authentication methods, like password + SMS code or biometric.",
-                difficulty="Medium",
-                time_limit=40
-            ),
-            QuizQuestion(
-                question_text="What makes a strong password?",
-                option_a="Using your name and birthdate",
-                option_b="A mix of uppercase, lowercase, numbers, and symbols",
-                option_c="A common word with numbers",
-                option_d="Your pet's name",
-                correct_answer="B",
-                category="Data Security",
-                quiz_type="Data Security",
-                explanation="Strong passwords use a mix of character types and are not easily guessable.",
-                difficulty="Easy",
-                time_limit=35
-            ),
-            QuizQuestion(
-                question_text="What should you do if you suspect a data breach?",
-                option_a="Ignore it",
-                option_b="Change passwords immediately and monitor accounts",
-                option_c="Share it on social media",
-                option_d="Wait and see",
-                correct_answer="B",
-                category="Data Security",
-                quiz_type="Data Security",
-                explanation="Immediately change passwords and monitor your accounts for suspicious activity.",
-                difficulty="Medium",
-                time_limit=40
-            ),
-            QuizQuestion(
-                question_text="What is encryption?",
-                option_a="Hiding files on your computer",
-                option_b="Converting data into a code to prevent unauthorized access",
-                option_c="Deleting old files",
-                option_d="Backing up data",
-                correct_answer="B",
-                category="Data Security",
-                quiz_type="Data Security",
-                explanation="Encryption converts readable data into coded format that can only be read with a key.",
-                difficulty="Medium",
-                time_limit=45
-            ),
-            # AI Ethics Questions
-            QuizQuestion(
-                question_text="Data described as 'anonymous' in privacy policies is impossible to trace back to you.",
-                option_a="True",
-                option_b="False",
-                option_c="Sometimes True",
-                option_d="Not specified",
-                correct_answer="B",
-                category="AI Ethics",
-                quiz_type="AI Ethics",
-                explanation="Anonymous data can often be de-anonymized using various techniques, especially when combined with other data sources.",
-                difficulty="Hard",
-                time_limit=60
-            ),
-            QuizQuestion(
-                question_text="Should AI tools be allowed to analyze students' social media posts to detect mental health issues?",
-                option_a="Yes, always",
-                option_b="No, never",
-                option_c="Only with explicit consent",
-                option_d="Only for research purposes",
-                correct_answer="C",
-                category="AI Ethics",
-                quiz_type="AI Ethics",
-                explanation="AI analysis of personal data should require explicit consent and clear purpose.",
-                difficulty="Hard",
-                time_limit=60
-            ),
-            QuizQuestion(
-                question_text="Who should be held accountable if AI algorithms make incorrect decisions?",
-                option_a="Only the AI system",
-                option_b="Only the developers",
-                option_c="The organization using the AI",
-                option_d="Multiple parties including developers and users",
-                correct_answer="D",
-                category="AI Ethics",
-                quiz_type="AI Ethics",
-                explanation="Accountability for AI decisions should be shared among developers, organizations, and users.",
-                difficulty="Hard",
-                time_limit=65
-            ),
-            QuizQuestion(
-                question_text="Can AI algorithms have bias?",
-                option_a="No, AI is always objective",
-                option_b="Yes, if trained on biased data",
-                option_c="Only in certain cases",
-                option_d="Bias doesn't matter",
-                correct_answer="B",
-                category="AI Ethics",
-                quiz_type="AI Ethics",
-                explanation="AI can inherit bias from training data, making it crucial to use diverse, representative datasets.",
-                difficulty="Medium",
-                time_limit=50
-            ),
-            QuizQuestion(
-                question_text="What is algorithmic transparency?",
-                option_a="Making AI code public",
-                option_b="Understanding how AI makes decisions",
-                option_c="Using clear variable names",
-                option_d="Documenting code",
-                correct_answer="B",
-                category="AI Ethics",
-                quiz_type="AI Ethics",
-                explanation="Algorithmic transparency means understanding how AI systems make their decisions.",
-                difficulty="Hard",
-                time_limit=60
-            ),
-            QuizQuestion(
-                question_text="Should companies use your search history to serve targeted ads?",
-                option_a="Yes, always",
-                option_b="No, never",
-                option_c="Only with consent",
-                option_d="It doesn't matter",
-                correct_answer="C",
-                category="AI Ethics",
-                quiz_type="AI Ethics",
-                explanation="Using personal data for advertising should require user consent and transparency.",
-                difficulty="Medium",
-                time_limit=50
-            ),
-            QuizQuestion(
-                question_text="What is the main concern with AI in education?",
-                option_a="AI is too expensive",
-                option_b="Privacy, bias, and fairness",
-                option_c="AI is too slow",
-                option_d="AI doesn't work",
-                correct_answer="B",
-                category="AI Ethics",
-                quiz_type="AI Ethics",
-                explanation="Main concerns include student privacy, algorithmic bias, and ensuring fair treatment.",
-                difficulty="Medium",
-                time_limit=50
-            ),
-            # Social Media Privacy Questions
-            QuizQuestion(
-                question_text="Social media platforms are allowed to analyze private messages to target ads.",
-                option_a="True",
-                option_b="False",
-                option_c="Only with consent",
-                option_d="Only for security",
-                correct_answer="A",
-                category="Privacy",
-                quiz_type="Social Media Privacy",
-                explanation="Most social media platforms' terms of service allow them to analyze private messages for ad targeting and other purposes.",
-                difficulty="Medium",
-                time_limit=45
-            ),
-            QuizQuestion(
-                question_text="How often should you review privacy settings on social media?",
-                option_a="Never",
-                option_b="Once when you sign up",
-                option_c="Regularly, as settings change",
-                option_d="Only if there's a problem",
-                correct_answer="C",
-                category="Privacy",
-                quiz_type="Social Media Privacy",
-                explanation="Privacy settings change frequently, so regular reviews are important.",
-                difficulty="Easy",
-                time_limit=35
-            ),
-            QuizQuestion(
-                question_text="What information should you avoid sharing publicly on social media?",
-                option_a="Everything",
-                option_b="Personal details like address, phone number, birthdate",
-                option_c="Only photos",
-                option_d="Nothing, it's all safe",
-                correct_answer="B",
-                category="Privacy",
-                quiz_type="Social Media Privacy",
-                explanation="Avoid sharing sensitive personal information that could be used for identity theft or stalking.",
-                difficulty="Easy",
-                time_limit=35
-            ),
-            QuizQuestion(
-                question_text="Can you completely delete your data from social media platforms?",
-                option_a="Yes, always",
-                option_b="No, some data may be retained",
-                option_c="Only if you pay",
-                option_d="It depends on the platform",
-                correct_answer="B",
-                category="Privacy",
-                quiz_type="Social Media Privacy",
-                explanation="Many platforms retain some data even after account deletion, as stated in their privacy policies.",
-                difficulty="Medium",
-                time_limit=45
-            ),
-            QuizQuestion(
-                question_text="What does 'public profile' mean on social media?",
-                option_a="Anyone can see your posts",
-                option_b="Only friends can see",
-                option_c="Only you can see",
-                option_d="Only verified users",
-                correct_answer="A",
-                category="Privacy",
-                quiz_type="Social Media Privacy",
-                explanation="A public profile means anyone on the internet can view your posts and information.",
-                difficulty="Easy",
-                time_limit=30
-            )
-        ]
-        for q in sample_questions:
-            db.session.add(q)
-        db.session.commit()
-    
-    # Add sample learning resources
-    if LearningResource.query.count() == 0:
-        resources = [
-            LearningResource(
-                title="Understanding Digital Privacy",
-                description="A comprehensive guide to digital privacy and data protection",
-                url="https://example.com/privacy-guide",
-                category="Privacy",
-                resource_type="article"
-            ),
-            LearningResource(
-                title="AI Ethics in Education",
-                description="Learn about ethical considerations when using AI in educational settings",
-                url="https://example.com/ai-ethics",
-                category="AI Ethics",
-                resource_type="article"
-            ),
-            LearningResource(
-                title="Data Security Best Practices",
-                description="Essential tips for protecting your personal data online",
-                url="https://example.com/data-security",
-                category="Data Security",
-                resource_type="video"
-            )
-        ]
-        for r in resources:
-            db.session.add(r)
+def calculate_activity_streak(user_id, today=None):
+    """Count consecutive days with activity ending today (UTC dates) using one query"""
+    today = today or datetime.utcnow().date()
+    activity_date = db.func.date(UserActivity.created_at)
+    dates = db.session.execute(
+        db.select(activity_date).distinct()
+        .where(UserActivity.user_id == user_id,
+               UserActivity.created_at < datetime.combine(today + timedelta(days=1), datetime.min.time()))
+        .order_by(activity_date.desc())
+    ).scalars()
+    streak = 0
+    expected = today
+    for day in dates:
+        # date() returns text on SQLite and a date on other backends
+        if date.fromisoformat(str(day)) != expected:
+            break
+        streak += 1
+        expected = expected - timedelta(days=1)
+    return streak
+
+def rebuild_user_features(user_id):
+    """Recompute a user's feature record from their quiz history (backfill; not committed)"""
+    features = db.session.get(UserFeatures, user_id)
+    if features is None:
+        features = UserFeatures(user_id=user_id)
+        db.session.add(features)
+    features.attempt_count = 0
+    features.mean_score = 0.0
+    features.best_score = 0.0
+    features.total_time_spent = 0
+    features.last_attempt_at = None
+    features.category_stats = '{}'
+    attempts = QuizAttempt.query.filter_by(user_id=user_id).order_by(QuizAttempt.completed_at).all()
+    for attempt in attempts:
+        features.record_attempt(attempt.percentage, attempt.quiz_type, attempt.time_taken, attempt.completed_at)
+    return features
+
+def record_user_attempt(user_id, percentage, quiz_type=None, time_taken=None, completed_at=None):
+    """
+    Fold a new attempt into the user's stored features (not committed). The counters are
+    updated by one atomic UPDATE, which also takes the row's write lock before the JSON
+    category stats are read back, so concurrent submissions do not lose each other's counts.
+    """
+    completed_at = completed_at or datetime.utcnow()
+    count = UserFeatures.attempt_count
+    updated = db.session.execute(
+        db.update(UserFeatures).where(UserFeatures.user_id == user_id).values(
+            attempt_count=count + 1,
+            mean_score=UserFeatures.mean_score + (percentage - UserFeatures.mean_score) / (count + 1),
+            best_score=db.case((UserFeatures.best_score > percentage, UserFeatures.best_score), else_=percentage),
+            total_time_spent=UserFeatures.total_time_spent + int(time_taken or 0),
+            last_attempt_at=db.case((UserFeatures.last_attempt_at > completed_at, UserFeatures.last_attempt_at),
+                                    else_=completed_at),
+            updated_at=datetime.utcnow()
+        ).execution_options(synchronize_session=False)
+    )
+    if updated.rowcount == 0:
+        # No record yet (or it was invalidated by an import): build it from the history, new attempt included
+        return rebuild_user_features(user_id)
+    features = db.session.execute(
+        db.select(UserFeatures).where(UserFeatures.user_id == user_id).execution_options(populate_existing=True)
+    ).scalar_one()
+    features.add_category_attempt(percentage, quiz_type)
+    return features
+
+def get_user_features(user_id):
+    """The user's feature record; built once from their history if it does not exist yet"""
+    features = db.session.get(UserFeatures, user_id)
+    if features is None:
+        features = rebuild_user_features(user_id)
         db.session.commit()
+    return features
+
+# Rows per executemany() batch when the recommendations table is rebuilt
+RECOMMENDATION_BATCH_SIZE = 1000
+
+def invalidate_user_features(user_ids, batch_size=RECOMMENDATION_BATCH_SIZE):
+    """
+    Drop the feature records and recommendations of users whose quiz history was changed
+    outside submit_quiz (bulk imports); both are rebuilt on next use (not committed)
+    """
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        db.session.execute(db.delete(UserFeatures).where(UserFeatures.user_id.in_(batch)))
+        db.session.execute(db.delete(UserRecommendation).where(UserRecommendation.user_id.in_(batch)))
+
+def score_users(ml, users, avg_scores):
+    """UserRecommendation rows (as dicts) for users, scored with one predict_many() pass"""
+    predictions = ml.predict_many([build_ml_user_data(user, avg_scores.get(user.id)) for user in users])
+    recommendations = {}
+    computed_at = datetime.utcnow()
+    rows = []
+    for user, (level, confidence) in zip(users, predictions):
+        level = str(level)
+        if level not in recommendations:
+            recommendations[level] = json.dumps(ml.get_recommendations(level))
+        rows.append({
+            'user_id': user.id,
+            'knowledge_level': level,
+            'confidence': float(confidence),
+            'recommendations': recommendations[level],
+            'model_version': ml.version if isinstance(ml, InferenceClient) else model_watcher.version,
+            'computed_at': computed_at
+        })
+    return rows
+
+def refresh_user_recommendation(user):
+    """Recompute one user's materialized recommendations (after a quiz or profile change)"""
+    ml = get_ml_model()
+    if not ml:
+        return None
+    row = score_users(ml, [user], {user.id: get_user_features(user.id).average_score()})[0]
+    recommendation = db.session.get(UserRecommendation, user.id)
+    if recommendation is None:
+        recommendation = UserRecommendation(user_id=user.id)
+        db.session.add(recommendation)
+    for field, value in row.items():
+        setattr(recommendation, field, value)
+    db.session.commit()
+    return recommendation
+
+def get_user_recommendation(user):
+    """The user's materialized recommendations, computed on first use; None without a model"""
+    recommendation = db.session.get(UserRecommendation, user.id)
+    if recommendation is None:
+        recommendation = refresh_user_recommendation(user)
+    return recommendation
+
+def refresh_all_recommendations(batch_size=RECOMMENDATION_BATCH_SIZE):
+    """
+    Batch job: score every user in one vectorized pass and replace the
+    UserRecommendation table in a single transaction. Returns the number of rows.
+    """
+    ml = get_ml_model()
+    if not ml:
+        print("ML model not available; recommendations not refreshed")
+        return 0
+    started = time.perf_counter()
+    users = User.query.all()
+    avg_scores = {
+        user_id: mean_score for user_id, mean_score in db.session.execute(
+            db.select(UserFeatures.user_id, UserFeatures.mean_score).where(UserFeatures.attempt_count > 0)
+        )
+    }
+    # Users whose feature record has not been built yet: average their attempts directly
+    missing = db.select(UserFeatures.user_id)
+    avg_scores.update(db.session.execute(
+        db.select(QuizAttempt.user_id, db.func.avg(QuizAttempt.percentage))
+        .where(QuizAttempt.user_id.not_in(missing))
+        .group_by(QuizAttempt.user_id)
+    ).all())
+    rows = score_users(ml, users, avg_scores)
+
+    db.session.execute(db.delete(UserRecommendation))
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(db.insert(UserRecommendation), rows[start:start + batch_size])
+    db.session.commit()
+    print(f"Refreshed recommendations for {len(rows)} users in {time.perf_counter() - started:.2f}s")
+    return len(rows)
 
 # Routes
-@app.route('/')
+@bp.route('/')
 def index():
     if current_user.is_authenticated:
         if current_user.is_admin:
-            return redirect(url_for('home'))  # Admin goes to home, not dashboard
-        return redirect(url_for('home'))
+            return redirect(url_for('main.home'))  # Admin goes to home, not dashboard
+        return redirect(url_for('main.home'))
     return render_template('index.html')
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
         username = request.form.get('username')
@@ -970,11 +911,11 @@ def register():
         
         if User.query.filter_by(username=username).first():
             flash('Username already exists')
-            return redirect(url_for('register'))
+            return redirect(url_for('main.register'))
         
         if User.query.filter_by(email=email).first():
             flash('Email already registered')
-            return redirect(url_for('register'))
+            return redirect(url_for('main.register'))
         
         user = User(
             username=username,
@@ -998,11 +939,11 @@ def register():
         db.session.commit()
         
         flash('Registration successful! Please login.')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     return render_template('register.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form.get('username')
@@ -1023,14 +964,14 @@ def login():
             db.session.commit()
             
             if user.is_admin:
-                return redirect(url_for('home'))  # Admin goes to home page
-            return redirect(url_for('home'))
+                return redirect(url_for('main.home'))  # Admin goes to home page
+            return redirect(url_for('main.home'))
         else:
             flash('Invalid username or password')
     
     return render_template('login.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     activity = UserActivity(
@@ -1042,9 +983,9 @@ def logout():
     db.session.commit()
     
     logout_user()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/home')
+@bp.route('/home')
 @login_required
 def home():
     """User home/explore page with featured content and recommendations"""
@@ -1076,7 +1017,7 @@ def home():
             
             # Average quiz score across all users
             all_attempts = QuizAttempt.query.all()
-            overall_avg_score = float(np.mean([a.percentage for a in all_attempts])) if all_attempts else 0.0
+            overall_avg_score = float(sum(a.percentage for a in all_attempts) / len(all_attempts)) if all_attempts else 0.0
             
             return render_template('admin_home.html',
                                  total_users=total_users,
@@ -1102,65 +1043,29 @@ def home():
                                  recent_quiz_attempts=[])
     
     # Get user statistics
-    total_attempts = QuizAttempt.query.filter_by(user_id=current_user.id).count()
+    features = get_user_features(current_user.id)
+    total_attempts = features.attempt_count
+    avg_score = features.mean_score if features.attempt_count else 0
     recent_attempts = QuizAttempt.query.filter_by(user_id=current_user.id).order_by(QuizAttempt.completed_at.desc()).limit(5).all()
     
-    # Calculate average score
-    attempts = QuizAttempt.query.filter_by(user_id=current_user.id).all()
-    avg_score = np.mean([a.percentage for a in attempts]) if attempts else 0
-    
     # Get recent activities
     recent_activities = UserActivity.query.filter_by(user_id=current_user.id).order_by(UserActivity.created_at.desc()).limit(5).all()
     
-    # Get personalized recommendations
+    # Get personalized recommendations (precomputed, see refresh_all_recommendations)
     recommendations = []
-    ml = get_ml_model()
-    if ml and current_user:
-        try:
-            user_data = {
-                'Age_Range': current_user.age_range or '18-21',
-                'Gender': current_user.gender or 'Male',
-                'Academic_Stream': current_user.academic_stream or 'B.Tech',
-                'Year_of_Study': current_user.year_of_study or '2nd year',
-                'Privacy_Policy_Reading': 'Sometimes',
-                'App_Permissions_Review': 'Sometimes',
-                'Different_Passwords': 'Yes'
-            }
-            
-            if attempts:
-                avg_score_val = np.mean([a.percentage for a in attempts])
-                if avg_score_val < 40:
-                    user_data['Privacy_Policy_Reading'] = 'Never'
-                    user_data['App_Permissions_Review'] = 'Never'
-                elif avg_score_val >= 70:
-                    user_data['Privacy_Policy_Reading'] = 'Often'
-                    user_data['App_Permissions_Review'] = 'Often'
-            
-            knowledge_level, confidence = ml.predict_knowledge_level(user_data)
-            recommendations = ml.get_recommendations(knowledge_level)
-        except Exception as e:
-            print(f"Error getting ML recommendations: {e}")
+    try:
+        recommendation = get_user_recommendation(current_user)
+        if recommendation:
+            recommendations = recommendation.recommendation_list()
+    except Exception as e:
+        print(f"Error getting ML recommendations: {e}")
     
     # Get featured resources
     featured_resources = LearningResource.query.limit(3).all()
     resources_count = LearningResource.query.count()
     
-    # Calculate streak (simplified - days with activity)
-    from datetime import datetime, timedelta
-    today = datetime.utcnow().date()
-    streak = 0
-    check_date = today
-    # Check up to 30 days back for streak
-    for i in range(30):
-        day_activities = UserActivity.query.filter(
-            UserActivity.user_id == current_user.id,
-            db.func.date(UserActivity.created_at) == check_date
-        ).first()
-        if day_activities:
-            streak += 1
-            check_date = check_date - timedelta(days=1)
-        else:
-            break
+    # Calculate streak (consecutive days with activity)
+    streak = calculate_activity_streak(current_user.id)
     
     return render_template('home.html',
                          total_attempts=total_attempts,
@@ -1172,95 +1077,52 @@ def home():
                          resources_count=resources_count,
                          current_streak=streak)
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @login_required
 def dashboard():
     """Detailed analytics dashboard"""
     if current_user.is_admin:
-        return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_dashboard'))
     
     try:
-        # Fetch attempts and activities once
-        attempts = QuizAttempt.query.filter_by(user_id=current_user.id).order_by(QuizAttempt.completed_at.desc()).all()
-        recent_attempts = attempts[:5] if len(attempts) > 5 else attempts
+        # Aggregates come from the feature record; only the latest attempts are loaded
+        features = get_user_features(current_user.id)
+        latest_attempts = QuizAttempt.query.filter_by(user_id=current_user.id).order_by(QuizAttempt.completed_at.desc()).limit(10).all()
+        recent_attempts = latest_attempts[:5]
         recent_activities = UserActivity.query.filter_by(user_id=current_user.id).order_by(UserActivity.created_at.desc()).limit(10).all()
 
-        total_attempts = len(attempts)
-        avg_score = float(np.mean([a.percentage for a in attempts])) if attempts else 0.0
-        best_score = float(max([a.percentage for a in attempts], default=0))
-        total_time_spent = sum([(a.time_taken or 0) for a in attempts])
+        total_attempts = features.attempt_count
+        avg_score = float(features.mean_score) if features.attempt_count else 0.0
+        best_score = float(features.best_score)
+        total_time_spent = features.total_time_spent
 
-        # Score history for charts / lists (reverse chronological limited)
+        # Score history for charts / lists (last 10 attempts, oldest first)
         score_history = [
             {
                 'label': a.completed_at.strftime('%d %b') if a.completed_at else f'Attempt {idx + 1}',
                 'percentage': a.percentage
             }
-            for idx, a in enumerate(reversed(attempts[-10:]))
+            for idx, a in enumerate(reversed(latest_attempts))
         ]
 
         # Quiz type breakdown
-        quiz_type_stats = []
-        if attempts:
-            stats_map = {}
-            for attempt in attempts:
-                key = attempt.quiz_type or 'General'
-                entry = stats_map.setdefault(key, {'quiz_type': key, 'count': 0, 'scores': []})
-                entry['count'] += 1
-                entry['scores'].append(attempt.percentage)
-            for entry in stats_map.values():
-                entry['average'] = float(np.mean(entry['scores'])) if entry['scores'] else 0.0
-                quiz_type_stats.append(entry)
-            quiz_type_stats.sort(key=lambda x: x['count'], reverse=True)
-
-        # Activity streak (days with activity)
-        today = datetime.utcnow().date()
-        streak = 0
-        check_date = today
-        for _ in range(30):
-            day_activities = UserActivity.query.filter(
-                UserActivity.user_id == current_user.id,
-                db.func.date(UserActivity.created_at) == check_date
-            ).first()
-            if day_activities:
-                streak += 1
-                check_date = check_date - timedelta(days=1)
-            else:
-                break
+        quiz_type_stats = features.category_accuracy()
+
+        # Activity streak (consecutive days with activity)
+        streak = calculate_activity_streak(current_user.id)
 
         # ML-driven knowledge insights
         knowledge_level = None
         knowledge_confidence = None
         knowledge_recommendations = []
-        ml = get_ml_model()
-        if ml:
-            try:
-                user_data = {
-                    'Age_Range': current_user.age_range or '18-21',
-                    'Gender': current_user.gender or 'Male',
-                    'Academic_Stream': current_user.academic_stream or 'B.Tech',
-                    'Year_of_Study': current_user.year_of_study or '2nd year',
-                    'Privacy_Policy_Reading': 'Sometimes',
-                    'App_Permissions_Review': 'Sometimes',
-                    'Different_Passwords': 'Yes'
-                }
-
-                if attempts:
-                    if avg_score < 40:
-                        user_data['Privacy_Policy_Reading'] = 'Never'
-                        user_data['App_Permissions_Review'] = 'Never'
-                    elif avg_score < 70:
-                        user_data['Privacy_Policy_Reading'] = 'Sometimes'
-                        user_data['App_Permissions_Review'] = 'Sometimes'
-                    else:
-                        user_data['Privacy_Policy_Reading'] = 'Often'
-                        user_data['App_Permissions_Review'] = 'Often'
-
-                knowledge_level, confidence = ml.predict_knowledge_level(user_data)
-                knowledge_confidence = round(confidence * 100, 1)
-                knowledge_recommendations = ml.get_recommendations(knowledge_level)
-            except Exception as e:
-                print(f"Error getting ML recommendations: {e}")
+        try:
+            recommendation = get_user_recommendation(current_user)
+            if recommendation:
+                knowledge_level = recommendation.knowledge_level
+                knowledge_confidence = round(recommendation.confidence * 100, 1)
+                knowledge_recommendations = recommendation.recommendation_list()
+        except Exception as e:
+            print(f"Error getting ML recommendations: {e}")
 
         # Featured learning resources
         featured_resources = LearningResource.query.limit(3).all() or []
@@ -1286,15 +1148,15 @@ def dashboard():
         import traceback
         traceback.print_exc()
         flash('An error occurred while loading dashboard. Please try again.')
-        return redirect(url_for('home'))
+        return redirect(url_for('main.home'))
 
-@app.route('/profile')
+@bp.route('/profile')
 @login_required
 def profile():
     attempts = QuizAttempt.query.filter_by(user_id=current_user.id).order_by(QuizAttempt.completed_at.desc()).all()
     return render_template('profile.html', attempts=attempts)
 
-@app.route('/learn/public')
+@bp.route('/learn/public')
 def learn_public():
     """Public learning resources page - no login required"""
     try:
@@ -1314,7 +1176,7 @@ def learn_public():
         traceback.print_exc()
         return render_template('learn_public.html', resources=[])
 
-@app.route('/learn')
+@bp.route('/learn')
 @login_required
 def learn():
     """Learning resources page with personalized recommendations"""
@@ -1328,50 +1190,15 @@ def learn():
             print(f"Error querying learning resources: {e}")
             resources = []
         
-        # Get personalized recommendations using ML model
+        # Get personalized recommendations (precomputed by the ML model)
         recommendations = []
         try:
-            ml = get_ml_model()
-            if ml and current_user:
+            recommendation = get_user_recommendation(current_user) if current_user else None
+            if recommendation:
                 try:
-                    # Prepare user data for prediction
-                    user_data = {
-                        'Age_Range': current_user.age_range or '18-21',
-                        'Gender': current_user.gender or 'Male',
-                        'Academic_Stream': current_user.academic_stream or 'B.Tech',
-                        'Year_of_Study': current_user.year_of_study or '2nd year',
-                        'Privacy_Policy_Reading': 'Sometimes',  # Default values
-                        'App_Permissions_Review': 'Sometimes',
-                        'Different_Passwords': 'Yes'
-                    }
-                    
-                    # Get user's average quiz score
-                    try:
-                        attempts = QuizAttempt.query.filter_by(user_id=current_user.id).all()
-                        if attempts:
-                            avg_score = float(np.mean([a.percentage for a in attempts]))
-                            if avg_score < 40:
-                                user_data['Privacy_Policy_Reading'] = 'Never'
-                                user_data['App_Permissions_Review'] = 'Never'
-                            elif avg_score < 70:
-                                user_data['Privacy_Policy_Reading'] = 'Sometimes'
-                                user_data['App_Permissions_Review'] = 'Sometimes'
-                            else:
-                                user_data['Privacy_Policy_Reading'] = 'Often'
-                                user_data['App_Permissions_Review'] = 'Often'
-                    except Exception as e:
-                        print(f"Error getting user attempts: {e}")
-                        # Continue with default values
-                    
-                    # Get ML recommendations
-                    try:
-                        knowledge_level, confidence = ml.predict_knowledge_level(user_data)
-                        recommendations = ml.get_recommendations(knowledge_level)
-                        if not recommendations:
-                            raise ValueError("Empty recommendations from ML model")
-                    except Exception as e:
-                        print(f"Error getting ML recommendations: {e}")
-                        raise  # Re-raise to use default recommendations
+                    recommendations = recommendation.recommendation_list()
+                    if not recommendations:
+                        raise ValueError("Empty recommendations from ML model")
                 except Exception as e:
                     print(f"Error in ML recommendation process: {e}")
                     # Use default recommendations
@@ -1424,51 +1251,29 @@ def learn():
                                  'Use different passwords for different accounts'
                              ])
 
-@app.route('/visualizations')
+@bp.route('/visualizations')
 @login_required
 def visualizations():
     """Show awareness index visualizations derived from survey data."""
     if not current_user.is_admin:
         flash('Access denied')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
-    insights = build_awareness_insights()
-    if insights is None:
+    snapshot = get_awareness_insights_snapshot()
+    if snapshot is None:
         flash('Survey dataset not found. Upload survey_data_backup.csv or Project Survey (Responses).xlsx.')
         return render_template('visualizations.html', data_available=False)
     
     return render_template(
         'visualizations.html',
         data_available=True,
-        summary=insights['summary'],
-        score_distribution=json.dumps(insights['score_distribution']),
-        score_histogram=json.dumps(insights['score_histogram']),
-        avg_by_age=json.dumps(insights['avg_by_age']),
-        avg_by_gender=json.dumps(insights['avg_by_gender']),
-        avg_by_education=json.dumps(insights['avg_by_education']),
-        education_counts=json.dumps(insights['education_counts']),
-        avg_by_year=json.dumps(insights['avg_by_year']),
-        year_counts=json.dumps(insights['year_counts']),
-        privacy_policy_counts=json.dumps(insights['privacy_policy_counts']),
-        permissions_counts=json.dumps(insights['permissions_counts']),
-        password_counts=json.dumps(insights['password_counts']),
-        uninstall_counts=json.dumps(insights['uninstall_counts']),
-        social_perms_counts=json.dumps(insights['social_perms_counts']),
-        privacy_settings_counts=json.dumps(insights['privacy_settings_counts']),
-        ai_mental_health_counts=json.dumps(insights['ai_mental_health_counts']),
-        ai_targeted_ads_counts=json.dumps(insights['ai_targeted_ads_counts']),
-        ai_tracking_comfort_counts=json.dumps(insights['ai_tracking_comfort_counts']),
-        ai_accountability_counts=json.dumps(insights['ai_accountability_counts']),
-        knowledge_breakdown=json.dumps(insights['knowledge_breakdown']),
-        trust_music_avg=insights['trust_music_avg'],
-        trust_exams_avg=insights['trust_exams_avg'],
-        curriculum_counts=json.dumps(insights['curriculum_counts']),
-        timeline=json.dumps(insights['timeline']),
-        timeline_daily=json.dumps(insights['timeline_daily']),
-        raw_scores=json.dumps(insights['raw_scores'])
+        summary=snapshot['summary'],
+        trust_music_avg=snapshot['trust_music_avg'],
+        trust_exams_avg=snapshot['trust_exams_avg'],
+        **snapshot['charts']
     )
 
-@app.route('/quiz/public')
+@bp.route('/quiz/public')
 def quiz_public():
     """Public quiz preview - no login required"""
     try:
@@ -1480,14 +1285,14 @@ def quiz_public():
         print(f"Error in quiz_public route: {e}")
         return render_template('quiz_public.html', quiz_types=[], sample_questions=[])
 
-@app.route('/quiz')
+@bp.route('/quiz')
 @login_required
 def quiz_select():
     """Quiz selection page - choose quiz type"""
     quiz_types = QuizType.query.all()
     return render_template('quiz_select.html', quiz_types=quiz_types)
 
-@app.route('/quiz/<quiz_type_name>')
+@bp.route('/quiz/<quiz_type_name>')
 @login_required
 def quiz(quiz_type_name):
     """Take a specific quiz type"""
@@ -1496,11 +1301,11 @@ def quiz(quiz_type_name):
     
     if not questions:
         flash('No questions available for this quiz type.')
-        return redirect(url_for('quiz_select'))
+        return redirect(url_for('main.quiz_select'))
     
     return render_template('quiz.html', questions=questions, quiz_type=quiz_type)
 
-@app.route('/submit_quiz', methods=['POST'])
+@bp.route('/submit_quiz', methods=['POST'])
 @login_required
 def submit_quiz():
     data = request.json
@@ -1542,8 +1347,26 @@ def submit_quiz():
         description=f'Completed {quiz_type} quiz with {score}/{total} correct answers ({percentage:.1f}%)'
     )
     db.session.add(activity)
+    record_user_attempt(current_user.id, percentage, quiz_type, time_taken, attempt.completed_at)
     db.session.commit()
     
+    # Feed the attempt to the online learner (bounded, single-row update)
+    if current_app.config['ML_ONLINE_LEARNING'] and total > 0:
+        ml = get_ml_model()
+        if ml:
+            try:
+                # Profile features only: the score-derived habit answers would leak the label
+                ml.learn_from_attempt(build_ml_user_data(current_user), percentage)
+            except Exception as e:
+                print(f"Error updating online model: {e}")
+    
+    # The new average changes the model inputs, so recompute this user's recommendations
+    try:
+        refresh_user_recommendation(current_user)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error refreshing recommendations: {e}")
+    
     return jsonify({
         'score': score,
         'total': total,
@@ -1551,27 +1374,57 @@ def submit_quiz():
         'time_taken': time_taken
     })
 
-@app.route('/admin/update_model', methods=['POST'])
+def refresh_recommendations_after_training(app, _):
+    """Re-score every user with the newly published model (runs on the training thread)"""
+    with app.app_context():
+        refresh_all_recommendations()
+
+@bp.route('/admin/update_model', methods=['POST'])
 @login_required
 def update_model():
-    """Admin endpoint to retrain ML model with latest data"""
+    """Admin endpoint to queue a background retrain of the ML model with latest data"""
     if not current_user.is_admin:
         return jsonify({'error': 'Access denied'}), 403
     
     try:
         from enhance_model import train_enhanced_model
-        ml = train_enhanced_model()
-        return jsonify({'success': True, 'message': 'Model updated successfully'})
+        job = training_jobs.submit(
+            train_enhanced_model,
+            on_success=partial(refresh_recommendations_after_training, current_app._get_current_object())
+        )
+        return jsonify({
+            'success': True,
+            'message': 'Model retraining started',
+            'job_id': job.id,
+            'status_url': url_for('main.update_model_status', job_id=job.id)
+        }), 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/admin')
+@bp.route('/admin/update_model/<job_id>')
+@login_required
+def update_model_status(job_id):
+    """Progress of a background model retraining job"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+# Admin user statistics table paging and sortable columns
+ADMIN_USERS_PER_PAGE = 25
+ADMIN_USERS_MAX_PER_PAGE = 200
+ADMIN_USER_SORT_KEYS = ('username', 'attempts', 'avg_score', 'last_activity')
+
+@bp.route('/admin')
 @login_required
 def admin_dashboard():
     """Admin dashboard with analytics and user statistics"""
     if not current_user.is_admin:
         flash('Access denied')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     try:
         # Analytics
@@ -1580,37 +1433,68 @@ def admin_dashboard():
         total_activities = UserActivity.query.count()
         
         # Recent activities
-        recent_activities = UserActivity.query.order_by(UserActivity.created_at.desc()).limit(20).all() or []
+        recent_activities = UserActivity.query.options(db.joinedload(UserActivity.user)) \
+            .order_by(UserActivity.created_at.desc()).limit(20).all() or []
         
-        # User statistics
-        users = User.query.all()
-        user_stats = []
-        for user in users:
-            try:
-                attempts = QuizAttempt.query.filter_by(user_id=user.id).all()
-                avg_score = float(np.mean([a.percentage for a in attempts])) if attempts else 0.0
-                user_stats.append({
-                    'username': user.username,
-                    'total_attempts': len(attempts),
-                    'avg_score': avg_score,
-                    'last_activity': UserActivity.query.filter_by(user_id=user.id).order_by(UserActivity.created_at.desc()).first()
-                })
-            except Exception as e:
-                print(f"Error processing user {user.username}: {e}")
-                # Add user with default values if there's an error
-                user_stats.append({
-                    'username': user.username,
-                    'total_attempts': 0,
-                    'avg_score': 0.0,
-                    'last_activity': None
-                })
+        # User statistics: one aggregated query, sorted and paginated in SQL
+        sort_key = request.args.get('sort', 'username')
+        if sort_key not in ADMIN_USER_SORT_KEYS:
+            sort_key = 'username'
+        sort_order = 'desc' if request.args.get('order') == 'desc' else 'asc'
+        per_page = min(max(request.args.get('per_page', ADMIN_USERS_PER_PAGE, type=int), 1), ADMIN_USERS_MAX_PER_PAGE)
+        total_pages = max((total_users + per_page - 1) // per_page, 1)
+        page = min(max(request.args.get('page', 1, type=int), 1), total_pages)
+        
+        attempt_stats = db.session.query(
+            QuizAttempt.user_id.label('user_id'),
+            db.func.count(QuizAttempt.id).label('total_attempts'),
+            db.func.avg(QuizAttempt.percentage).label('avg_score')
+        ).group_by(QuizAttempt.user_id).subquery()
+        activity_stats = db.session.query(
+            UserActivity.user_id.label('user_id'),
+            db.func.max(UserActivity.created_at).label('last_activity')
+        ).group_by(UserActivity.user_id).subquery()
+        
+        total_attempts = db.func.coalesce(attempt_stats.c.total_attempts, 0)
+        avg_score = db.func.coalesce(attempt_stats.c.avg_score, 0.0)
+        sort_columns = {
+            'username': User.username,
+            'attempts': total_attempts,
+            'avg_score': avg_score,
+            'last_activity': activity_stats.c.last_activity
+        }
+        sort_column = sort_columns[sort_key]
+        sort_column = sort_column.desc() if sort_order == 'desc' else sort_column.asc()
+        
+        stat_rows = db.session.query(User.username, total_attempts, avg_score, activity_stats.c.last_activity) \
+            .outerjoin(attempt_stats, attempt_stats.c.user_id == User.id) \
+            .outerjoin(activity_stats, activity_stats.c.user_id == User.id) \
+            .order_by(sort_column, User.id) \
+            .offset((page - 1) * per_page).limit(per_page).all()
+        user_stats = [
+            {
+                'username': username,
+                'total_attempts': int(attempts),
+                'avg_score': float(score),
+                'last_activity': last_activity
+            }
+            for username, attempts, score, last_activity in stat_rows
+        ]
+        pagination = {
+            'page': page,
+            'per_page': per_page,
+            'total_pages': total_pages,
+            'sort': sort_key,
+            'order': sort_order
+        }
         
         return render_template('admin_dashboard.html',
                              total_users=total_users,
                              total_quizzes=total_quizzes,
                              total_activities=total_activities,
                              recent_activities=recent_activities,
-                             user_stats=user_stats)
+                             user_stats=user_stats,
+                             pagination=pagination)
     except Exception as e:
         print(f"Error in admin_dashboard route: {e}")
         import traceback
@@ -1622,9 +1506,10 @@ def admin_dashboard():
                              total_quizzes=0,
                              total_activities=0,
                              recent_activities=[],
-                             user_stats=[])
+                             user_stats=[],
+                             pagination=None)
 
-@app.route('/api/analytics')
+@bp.route('/api/analytics')
 @login_required
 def analytics():
     """API endpoint for admin analytics data"""
@@ -1632,64 +1517,69 @@ def analytics():
         return jsonify({'error': 'Access denied'}), 403
     
     try:
-        # Daily activity and activity type breakdown
-        activities = UserActivity.query.order_by(UserActivity.created_at).all() or []
-        daily_activity = {}
+        # Daily activity (UTC dates) and activity type breakdown
+        activity_date = db.func.date(UserActivity.created_at)
+        daily_rows = db.session.query(activity_date, db.func.count(UserActivity.id)) \
+            .filter(UserActivity.created_at.isnot(None)) \
+            .group_by(activity_date).order_by(activity_date).all()
+        daily_activity = {str(day): int(count) for day, count in daily_rows}
+        
+        type_rows = db.session.query(UserActivity.activity_type, db.func.count(UserActivity.id)) \
+            .filter(UserActivity.created_at.isnot(None)) \
+            .group_by(UserActivity.activity_type).all()
         activity_type_counts = {}
-        for activity in activities:
-            if activity.created_at:
-                date_key = activity.created_at.date().isoformat()
-                daily_activity[date_key] = daily_activity.get(date_key, 0) + 1
-                activity_type = activity.activity_type or 'other'
-                activity_type_counts[activity_type] = activity_type_counts.get(activity_type, 0) + 1
+        for activity_type, count in type_rows:
+            key = activity_type or 'other'
+            activity_type_counts[key] = activity_type_counts.get(key, 0) + int(count)
         
-        # Quiz performance and distributions
-        attempts = QuizAttempt.query.order_by(QuizAttempt.completed_at).all() or []
+        # Quiz performance per local date: SQL sums per UTC quarter-hour (every
+        # timezone offset is a multiple of 15 minutes), converted to local dates here.
+        # extract() is compiled for each database backend, unlike strftime()
+        utc_minute = db.extract('minute', QuizAttempt.completed_at)
+        bucket_parts = [
+            db.extract(field, QuizAttempt.completed_at) for field in ('year', 'month', 'day', 'hour')
+        ] + [utc_minute - utc_minute % 15]
+        bucket_rows = db.session.query(
+            *bucket_parts,
+            db.func.sum(QuizAttempt.percentage), db.func.count(QuizAttempt.id)
+        ).filter(QuizAttempt.completed_at.isnot(None)).group_by(*bucket_parts).all()
         quiz_performance = {}
-        quiz_type_distribution = {}
-        score_distribution = {'Low': 0, 'Medium': 0, 'High': 0}
+        for year, month, day, hour, minute, total, count in bucket_rows:
+            try:
+                bucket_start = datetime(int(year), int(month), int(day), int(hour), int(minute))
+                date_key = utc_to_local(bucket_start).date().isoformat()
+                entry = quiz_performance.setdefault(date_key, [0.0, 0])
+                entry[0] += float(total)
+                entry[1] += int(count)
+            except Exception as e:
+                print(f"Error processing attempt date: {e}")
+        quiz_avg = {date: total / count for date, (total, count) in sorted(quiz_performance.items())}
         
-        for attempt in attempts:
-            if attempt.completed_at:
-                try:
-                    local_dt = utc_to_local(attempt.completed_at)
-                    date_key = local_dt.date().isoformat()
-                    quiz_performance.setdefault(date_key, []).append(attempt.percentage)
-                except Exception as e:
-                    print(f"Error processing attempt date: {e}")
-            
-            quiz_type = attempt.quiz_type or 'General'
-            quiz_type_distribution[quiz_type] = quiz_type_distribution.get(quiz_type, 0) + 1
-            
-            if attempt.percentage < 40:
-                score_distribution['Low'] += 1
-            elif attempt.percentage < 70:
-                score_distribution['Medium'] += 1
-            else:
-                score_distribution['High'] += 1
+        # Quiz type and score distributions
+        quiz_type_distribution = {}
+        for quiz_type, count in db.session.query(QuizAttempt.quiz_type, db.func.count(QuizAttempt.id)) \
+                .group_by(QuizAttempt.quiz_type).all():
+            key = quiz_type or 'General'
+            quiz_type_distribution[key] = quiz_type_distribution.get(key, 0) + int(count)
         
-        quiz_avg = {date: float(np.mean(scores)) for date, scores in quiz_performance.items()}
+        low, medium, high = db.session.query(
+            db.func.sum(db.case((QuizAttempt.percentage < 40, 1), else_=0)),
+            db.func.sum(db.case(((QuizAttempt.percentage >= 40) & (QuizAttempt.percentage < 70), 1), else_=0)),
+            db.func.sum(db.case((QuizAttempt.percentage >= 70, 1), else_=0))
+        ).one()
+        score_distribution = {'Low': int(low or 0), 'Medium': int(medium or 0), 'High': int(high or 0)}
         
         # Top users by average score
-        user_stats = []
-        users = User.query.all()
-        for user in users:
-            try:
-                user_attempts = QuizAttempt.query.filter_by(user_id=user.id).all()
-                if not user_attempts:
-                    continue
-                avg_score = float(np.mean([a.percentage for a in user_attempts]))
-                user_stats.append({
-                    'username': user.username,
-                    'avg_score': avg_score,
-                    'attempts': len(user_attempts)
-                })
-            except Exception as e:
-                print(f"Error processing user {user.username} for analytics: {e}")
-                continue
-        
-        user_stats.sort(key=lambda u: u['avg_score'], reverse=True)
-        top_users = user_stats[:5]
+        avg_percentage = db.func.avg(QuizAttempt.percentage)
+        top_rows = db.session.query(User.username, avg_percentage, db.func.count(QuizAttempt.id)) \
+            .join(QuizAttempt, QuizAttempt.user_id == User.id) \
+            .group_by(User.id, User.username) \
+            .order_by(avg_percentage.desc(), User.id) \
+            .limit(5).all()
+        top_users = [
+            {'username': username, 'avg_score': float(avg_score), 'attempts': int(attempts)}
+            for username, avg_score, attempts in top_rows
+        ]
         
         return jsonify({
             'daily_activity': daily_activity,
@@ -1713,57 +1603,41 @@ def analytics():
             'top_users': []
         })
 
-@app.route('/api/recommendations')
+@bp.route('/api/model_status')
+@login_required
+def model_status():
+    """API endpoint for ML model loader metrics (cold start, version, reloads)"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Access denied'}), 403
+    return jsonify(get_ml_model_status())
+
+@bp.route('/api/recommendations')
 @login_required
 def get_recommendations():
     """Get personalized recommendations for the current user"""
-    ml = get_ml_model()
-    if not ml:
-        return jsonify({'error': 'ML model not available'}), 503
-    
     try:
-        # Prepare user data
-        user_data = {
-            'Age_Range': current_user.age_range or '18-21',
-            'Gender': current_user.gender or 'Male',
-            'Academic_Stream': current_user.academic_stream or 'B.Tech',
-            'Year_of_Study': current_user.year_of_study or '2nd year',
-            'Privacy_Policy_Reading': 'Sometimes',
-            'App_Permissions_Review': 'Sometimes',
-            'Different_Passwords': 'Yes'
-        }
-        
-        # Adjust based on quiz performance
-        attempts = QuizAttempt.query.filter_by(user_id=current_user.id).all()
-        if attempts:
-            avg_score = np.mean([a.percentage for a in attempts])
-            if avg_score < 40:
-                user_data['Privacy_Policy_Reading'] = 'Never'
-                user_data['App_Permissions_Review'] = 'Never'
-            elif avg_score >= 70:
-                user_data['Privacy_Policy_Reading'] = 'Often'
-                user_data['App_Permissions_Review'] = 'Often'
-        
-        knowledge_level, confidence = ml.predict_knowledge_level(user_data)
-        recommendations = ml.get_recommendations(knowledge_level)
+        recommendation = get_user_recommendation(current_user)
+        if recommendation is None:
+            return jsonify({'error': 'ML model not available'}), 503
         
         return jsonify({
-            'knowledge_level': knowledge_level,
-            'confidence': float(confidence),
-            'recommendations': recommendations
+            'knowledge_level': recommendation.knowledge_level,
+            'confidence': float(recommendation.confidence),
+            'recommendations': recommendation.recommendation_list(),
+            'computed_at': recommendation.computed_at.isoformat() if recommendation.computed_at else None
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # ==================== ADMIN MANAGEMENT ROUTES ====================
 
-@app.route('/admin/manage/questions')
+@bp.route('/admin/manage/questions')
 @login_required
 def manage_questions():
     """Admin page to manage quiz questions"""
     if not current_user.is_admin:
         flash('Access denied')
-        return redirect(url_for('home'))
+        return redirect(url_for('main.home'))
     
     quiz_types = QuizType.query.all()
     questions = QuizQuestion.query.order_by(QuizQuestion.created_at.desc()).all()
@@ -1771,7 +1645,7 @@ def manage_questions():
                          questions=questions, 
                          quiz_types=quiz_types)
 
-@app.route('/admin/questions/add', methods=['POST'])
+@bp.route('/admin/questions/add', methods=['POST'])
 @login_required
 def add_question():
     """Add a new quiz question"""
@@ -1800,7 +1674,7 @@ def add_question():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/admin/questions/<int:question_id>')
+@bp.route('/admin/questions/<int:question_id>')
 @login_required
 def get_question(question_id):
     """Get a single question for editing"""
@@ -1826,7 +1700,7 @@ def get_question(question_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/admin/questions/<int:question_id>/edit', methods=['POST'])
+@bp.route('/admin/questions/<int:question_id>/edit', methods=['POST'])
 @login_required
 def edit_question(question_id):
     """Edit an existing quiz question"""
@@ -1853,7 +1727,7 @@ def edit_question(question_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/admin/questions/<int:question_id>/delete', methods=['POST'])
+@bp.route('/admin/questions/<int:question_id>/delete', methods=['POST'])
 @login_required
 def delete_question(question_id):
     """Delete a quiz question"""
@@ -1869,18 +1743,18 @@ def delete_question(question_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/admin/manage/resources')
+@bp.route('/admin/manage/resources')
 @login_required
 def manage_resources():
     """Admin page to manage learning resources"""
     if not current_user.is_admin:
         flash('Access denied')
-        return redirect(url_for('home'))
+        return redirect(url_for('main.home'))
     
     resources = LearningResource.query.order_by(LearningResource.created_at.desc()).all()
     return render_template('admin_manage_resources.html', resources=resources)
 
-@app.route('/admin/resources/add', methods=['POST'])
+@bp.route('/admin/resources/add', methods=['POST'])
 @login_required
 def add_resource():
     """Add a new learning resource"""
@@ -1903,7 +1777,7 @@ def add_resource():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/admin/resources/<int:resource_id>')
+@bp.route('/admin/resources/<int:resource_id>')
 @login_required
 def get_resource(resource_id):
     """Get a single resource for editing"""
@@ -1923,7 +1797,7 @@ def get_resource(resource_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/admin/resources/<int:resource_id>/edit', methods=['POST'])
+@bp.route('/admin/resources/<int:resource_id>/edit', methods=['POST'])
 @login_required
 def edit_resource(resource_id):
     """Edit an existing learning resource"""
@@ -1944,7 +1818,7 @@ def edit_resource(resource_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/admin/resources/<int:resource_id>/delete', methods=['POST'])
+@bp.route('/admin/resources/<int:resource_id>/delete', methods=['POST'])
 @login_required
 def delete_resource(resource_id):
     """Delete a learning resource"""
@@ -1960,13 +1834,13 @@ def delete_resource(resource_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/admin/settings')
+@bp.route('/admin/settings')
 @login_required
 def admin_settings():
     """Admin settings page"""
     if not current_user.is_admin:
         flash('Access denied')
-        return redirect(url_for('home'))
+        return redirect(url_for('main.home'))
     
     # Get current stats
     total_questions = QuizQuestion.query.count()
@@ -1977,9 +1851,10 @@ def admin_settings():
                          total_questions=total_questions,
                          total_resources=total_resources,
                          total_quiz_types=total_quiz_types,
-                         default_timezone=DEFAULT_TIMEZONE)
+                         default_timezone=DEFAULT_TIMEZONE,
+                         model_status=get_ml_model_status())
 
-@app.route('/admin/settings/update', methods=['POST'])
+@bp.route('/admin/settings/update', methods=['POST'])
 @login_required
 def update_settings():
     """Update admin settings"""
@@ -2003,6 +1878,41 @@ def update_settings():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-if __name__ == '__main__':
-    app.run(debug=True)
+def create_app(config=None):
+    """
+    Application factory: a new app configured from the environment (DATABASE_URL, ML_*),
+    with config (a dict) applied on top, e.g. by tests.
+    Only one app per process is supported for serving: the ML state (ml_model,
+    model_watcher, training_jobs and the loader metrics) is module-global and shared
+    by every app, and is set up with the ML_* settings of the first app that loads it.
+    Startup does not create tables, inspect the schema or seed data:
+    run `python migrations.py` once per deployment for that.
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///digital_awareness.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Set ML_MODEL_WARMUP=1 to load (or train) the ML model at startup instead of on the first request
+    app.config['ML_MODEL_WARMUP'] = os.environ.get('ML_MODEL_WARMUP', '0') == '1'
+    # Set ML_ONLINE_LEARNING=1 to also update an incremental model from every quiz submission
+    app.config['ML_ONLINE_LEARNING'] = os.environ.get('ML_ONLINE_LEARNING', '0') == '1'
+    # Send predictions to a running inference_server.py (Unix socket path or host:port) instead of loading the model here
+    app.config['ML_INFERENCE_ADDRESS'] = os.environ.get('ML_INFERENCE_ADDRESS') or None
+    if config:
+        app.config.update(config)
+
+    db.init_app(app)
+    login_manager.init_app(app)
+    app.register_blueprint(bp)
+    if app.config['ML_MODEL_WARMUP'] and not ml_model_metrics['warmed_up']:
+        with app.app_context():
+            warm_up_ml_model()
+    return app
+
+def script_app_context():
+    """App context for scripts and batch jobs: the active app's, or a new app from create_app()"""
+    app = current_app._get_current_object() if has_app_context() else create_app()
+    return app.app_context()
 
+if __name__ == '__main__':
+    create_app().run(debug=True)
@@ -0,0 +1,240 @@
+"""
+Compact array-backed inference for trained random forests
+Flattens every tree of a fitted RandomForestClassifier into contiguous NumPy arrays
+and evaluates them without sklearn. Probabilities are accumulated tree by tree in the
+same order and dtype as a single-threaded RandomForestClassifier.predict_proba, so they
+match it exactly. It is faster than sklearn only for small batches (sklearn's per-call
+overhead dominates there); large batches should go to sklearn.
+"""
+
+import io
+import pickle
+import time
+
+import numpy as np
+
+COMPACT_FOREST_VERSION = 1
+# Samples walked through the forest at once; keeps the per-step arrays cache-sized
+COMPACT_FOREST_CHUNK_SIZE = 2048
+
+
+class CompactForest:
+    """
+    All trees stored back to back: node i tests feature[i] against threshold[i]
+    and continues at children[2 * i + 1] (<= threshold) or children[2 * i];
+    leaves point to themselves, so every sample can take the same fixed number
+    of steps (max_depth) through every tree.
+    """
+
+    def __init__(self, feature, threshold, children, leaf_slot, leaf_values, roots, max_depth, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.leaf_slot = leaf_slot
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Flatten a fitted RandomForestClassifier (single output)"""
+        features, thresholds, children, slots, values, roots = [], [], [], [], [], []
+        node_offset = 0
+        leaf_offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count)
+
+            roots.append(node_offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            left = np.where(is_leaf, node_ids, tree.children_left) + node_offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + node_offset
+            children.append(np.column_stack([right, left]).ravel())
+
+            # Classifier trees store class fractions per leaf and DecisionTreeClassifier.predict_proba
+            # returns them as is; older sklearn stored counts and normalised at predict time
+            leaf_value = tree.value[is_leaf, 0, :]
+            if not np.allclose(leaf_value.sum(axis=1), 1.0):
+                normalizer = leaf_value.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                leaf_value = leaf_value / normalizer
+            values.append(leaf_value)
+            slot = np.full(tree.node_count, -1, dtype=np.int64)
+            slot[is_leaf] = np.arange(is_leaf.sum()) + leaf_offset
+            slots.append(slot)
+
+            node_offset += tree.node_count
+            leaf_offset += int(is_leaf.sum())
+            max_depth = max(max_depth, tree.max_depth)
+
+        threshold = np.concatenate(thresholds)
+        # Split points on small integer codes are exact in float32
+        if np.array_equal(threshold.astype(np.float32), threshold):
+            threshold = threshold.astype(np.float32)
+        n_features = int(forest.n_features_in_)
+        feature_dtype = np.int8 if n_features <= np.iinfo(np.int8).max else np.int32
+        index_dtype = np.int32 if node_offset <= np.iinfo(np.int32).max else np.int64
+        return cls(
+            feature=np.concatenate(features).astype(feature_dtype),
+            threshold=threshold,
+            children=np.concatenate(children).astype(index_dtype),
+            leaf_slot=np.concatenate(slots).astype(index_dtype),
+            leaf_values=np.concatenate(values),
+            roots=np.asarray(roots, dtype=index_dtype),
+            max_depth=int(max_depth),
+            classes=np.asarray(forest.classes_)
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children,
+                                      self.leaf_slot, self.leaf_values, self.roots, self.classes_))
+
+    def apply(self, X):
+        """Leaf node reached in every tree, shape (n_samples, n_trees)"""
+        # sklearn validates inputs as float32 before comparing against thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        n_samples, n_features = X.shape
+        leaves = np.empty((n_samples, self.n_trees), dtype=self.children.dtype)
+        feature = self.feature.astype(np.intp)
+        for start in range(0, n_samples, COMPACT_FOREST_CHUNK_SIZE):
+            chunk = np.ascontiguousarray(X[start:start + COMPACT_FOREST_CHUNK_SIZE])
+            flat = chunk.ravel()
+            row_offsets = (np.arange(len(chunk)) * n_features)[:, np.newaxis]
+            nodes = np.broadcast_to(self.roots, (len(chunk), self.n_trees))
+            for _ in range(self.max_depth):
+                go_left = flat[row_offsets + feature[nodes]] <= self.threshold[nodes]
+                nodes = self.children[2 * nodes + go_left]
+            leaves[start:start + len(chunk)] = nodes
+        return leaves
+
+    def predict_proba(self, X):
+        leaf_values = self.leaf_values[self.leaf_slot[self.apply(X)]]
+        # Accumulate tree by tree in order, as RandomForestClassifier does
+        proba = np.zeros((leaf_values.shape[0], leaf_values.shape[2]))
+        for t in range(self.n_trees):
+            proba += leaf_values[:, t, :]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        # argmax takes the first class on exact ties, like RandomForestClassifier.predict
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer, version=COMPACT_FOREST_VERSION, feature=self.feature, threshold=self.threshold,
+            children=self.children, leaf_slot=self.leaf_slot, leaf_values=self.leaf_values,
+            roots=self.roots, max_depth=self.max_depth, classes=self.classes_
+        )
+        return buffer.getvalue()
+
+    def save(self, filepath):
+        """Write the exported forest atomically (compressed .npz)"""
+        from model_registry import write_file_atomic
+        data = self.to_bytes()
+        write_file_atomic(filepath, lambda f: f.write(data))
+        return len(data)
+
+    @classmethod
+    def load(cls, filepath):
+        with np.load(filepath, allow_pickle=False) as data:
+            if int(data['version']) != COMPACT_FOREST_VERSION:
+                raise ValueError(f"Unsupported compact forest version in {filepath}")
+            return cls(
+                feature=data['feature'], threshold=data['threshold'], children=data['children'],
+                leaf_slot=data['leaf_slot'], leaf_values=data['leaf_values'],
+                roots=data['roots'], max_depth=int(data['max_depth']), classes=data['classes']
+            )
+
+
+def clone_single_threaded(forest):
+    """The fitted forest with n_jobs=None, so predict_proba sums trees in a fixed order"""
+    if forest.n_jobs in (None, 1):
+        return forest
+    forest = pickle.loads(pickle.dumps(forest, protocol=pickle.HIGHEST_PROTOCOL))
+    return forest.set_params(n_jobs=None)
+
+
+def _time_per_call(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def benchmark_compact_forest(forest, X, repeat=200):
+    """
+    Check exact agreement with sklearn on X and time single-sample and batch inference.
+    sklearn is compared single-threaded: with n_jobs > 1 it sums trees in thread order.
+    """
+    compact = CompactForest.from_sklearn(forest)
+    forest = clone_single_threaded(forest)
+    X_array = np.asarray(X, dtype=np.float64)
+    X_frame = X if hasattr(X, 'columns') else None
+
+    sklearn_proba = forest.predict_proba(X)
+    compact_proba = compact.predict_proba(X_array)
+    exact = bool(np.array_equal(sklearn_proba, compact_proba))
+    top_two = np.sort(sklearn_proba, axis=1)[:, -2:] if sklearn_proba.shape[1] > 1 else None
+    same_labels = bool(np.array_equal(forest.predict(X), compact.predict(X_array)))
+
+    single_sklearn = X_frame.iloc[[0]] if X_frame is not None else X_array[:1]
+    single_compact = X_array[:1]
+    results = {
+        'samples': len(X_array),
+        'trees': compact.n_trees,
+        'nodes': len(compact.feature),
+        'exact_match': exact,
+        'same_predictions': same_labels,
+        'max_abs_difference': float(np.abs(sklearn_proba - compact_proba).max()),
+        'tied_samples': int((top_two[:, 0] == top_two[:, 1]).sum()) if top_two is not None else 0,
+        'sklearn_single_ms': _time_per_call(lambda: forest.predict_proba(single_sklearn), repeat) * 1000,
+        'compact_single_ms': _time_per_call(lambda: compact.predict_proba(single_compact), repeat) * 1000,
+        'sklearn_batch_ms': _time_per_call(lambda: forest.predict_proba(X), max(repeat // 20, 3)) * 1000,
+        'compact_batch_ms': _time_per_call(lambda: compact.predict_proba(X_array), max(repeat // 20, 3)) * 1000,
+        'sklearn_pickle_bytes': len(pickle.dumps(forest, protocol=pickle.HIGHEST_PROTOCOL)),
+        'compact_bytes': len(compact.to_bytes()),
+        'compact_memory_bytes': compact.nbytes
+    }
+    return compact, results
+
+
+if __name__ == '__main__':
+    import pandas as pd
+    from ml_model import DigitalAwarenessML, COMPACT_FOREST_MAX_BATCH
+
+    ml = DigitalAwarenessML(use_prediction_table=False)
+    if not ml.load_model():
+        df = ml.load_survey_data()
+        X, y = ml.preprocess_data(df)
+        ml.train_model(X, y)
+
+    # Every category combination the encoders know, capped to a random sample
+    shape = tuple(len(ml.label_encoders[col].classes_) for col in ml.feature_columns)
+    cells = np.arange(int(np.prod(shape)))
+    if len(cells) > 20000:
+        cells = np.random.default_rng(42).choice(cells, 20000, replace=False)
+    X = pd.DataFrame(np.column_stack(np.unravel_index(cells, shape)).astype(float), columns=ml.feature_columns)
+
+    compact, results = benchmark_compact_forest(ml.model, X)
+    print("Compact forest benchmark")
+    for key, value in results.items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+    print(f"  single-sample speedup: {results['sklearn_single_ms'] / results['compact_single_ms']:.1f}x")
+    print(f"  batch speedup: {results['sklearn_batch_ms'] / results['compact_batch_ms']:.1f}x "
+          f"(ml_model uses the compact forest only up to {COMPACT_FOREST_MAX_BATCH} rows)")
+    print(f"  size reduction: {results['sklearn_pickle_bytes'] / results['compact_bytes']:.1f}x")
+    if not (results['exact_match'] and results['same_predictions']):
+        raise SystemExit("Compact forest does not match sklearn")
@@ -6,7 +6,8 @@ Uses real survey responses to improve model accuracy
 import pandas as pd
 import numpy as np
 from ml_model import DigitalAwarenessML
-from app import app, db, QuizAttempt, User
+from survey_data import load_survey_frame, prepare_survey_frame
+from app import db, QuizAttempt, User
 import os
 
 
@@ -19,135 +20,31 @@ def load_primary_survey_dataframe(
     """
     if os.path.exists(csv_path):
         print(f"[INFO] Loading survey CSV: {csv_path}")
-        return pd.read_csv(csv_path)
+        return load_survey_frame(csv_path, xlsx_path=None)
 
     if os.path.exists(excel_path):
         print(f"[INFO] Converting Excel survey file '{excel_path}' to CSV")
         try:
-            df = pd.read_excel(excel_path)
+            return load_survey_frame(csv_path, excel_path)
         except ImportError as exc:
             raise ImportError(
                 "Reading Excel files requires the 'openpyxl' package. "
                 "Install it with 'pip install openpyxl' and re-run the script."
             ) from exc
-        df.to_csv(csv_path, index=False)
-        print(f"[INFO] Saved converted CSV to {csv_path}")
-        return df
 
     raise FileNotFoundError(
         f"No survey sources found. Missing '{csv_path}' and '{excel_path}'."
     )
 
-def interpret_boolean_response(value):
-    """
-    Normalize survey responses (textual or numeric) to boolean True/False.
-    Returns None when the value cannot be interpreted.
-    """
-    if pd.isna(value):
-        return None
-
-    if isinstance(value, (int, float)) and not isinstance(value, bool):
-        if value == 1:
-            return True
-        if value == 0:
-            return False
-
-    normalized = str(value).strip().lower()
-    true_tokens = {'true', 't', 'a', 'correct', 'yes', 'y', '1', '1.0'}
-    false_tokens = {'false', 'f', 'b', 'incorrect', 'no', 'n', '0', '0.0'}
-
-    if normalized in true_tokens:
-        return True
-    if normalized in false_tokens:
-        return False
-
-    return None
-
-
-def calculate_knowledge_score_from_survey(row):
-    """
-    Calculate knowledge score from survey responses
-    Based on True/False knowledge check questions
-    """
-    score = 0
-    total = 0
-    
-    # Knowledge Check 1: Incognito mode (False is correct)
-    if 'Knowledge_Incognito_ISP' in row:
-        total += 1
-        answer = interpret_boolean_response(row['Knowledge_Incognito_ISP'])
-        if answer is False:
-            score += 1
-    
-    # Knowledge Check 2: Anonymous data (False is correct)
-    if 'Knowledge_Anonymous_Trace' in row:
-        total += 1
-        answer = interpret_boolean_response(row['Knowledge_Anonymous_Trace'])
-        if answer is False:
-            score += 1
-    
-    # Knowledge Check 3: Social media messages (True is correct)
-    if 'Knowledge_SocialMedia_Messages' in row:
-        total += 1
-        answer = interpret_boolean_response(row['Knowledge_SocialMedia_Messages'])
-        if answer is True:
-            score += 1
-    
-    return score, total
-
 def prepare_survey_data_for_ml(csv_path='survey_data_backup.csv'):
     """
-    Prepare survey data for ML model training
+    Prepare survey data for ML model training (standardized columns and knowledge scores)
     """
     try:
-        df = load_primary_survey_dataframe(csv_path=csv_path)
+        df = prepare_survey_frame(load_primary_survey_dataframe(csv_path=csv_path))
         print(f"[INFO] Loaded {len(df)} survey responses")
-        
-        # Column mapping from Analysis.ipynb
-        column_mapping = {}
-        for col in df.columns:
-            col_lower = col.lower()
-            if 'age' in col_lower and 'range' in col_lower:
-                column_mapping[col] = 'Age_Range'
-            elif 'gender' in col_lower:
-                column_mapping[col] = 'Gender'
-            elif ('educational' in col_lower or 'academic' in col_lower) and 'background' in col_lower:
-                column_mapping[col] = 'Academic_Stream'
-            elif 'level of study' in col_lower or 'year' in col_lower:
-                column_mapping[col] = 'Year_of_Study'
-            elif 'privacy policy' in col_lower and ('read' in col_lower or 'install' in col_lower):
-                column_mapping[col] = 'Privacy_Policy_Reading'
-            elif 'app permissions' in col_lower or ('review' in col_lower and 'permissions' in col_lower):
-                column_mapping[col] = 'App_Permissions_Review'
-            elif 'uninstalled' in col_lower and ('permissions' in col_lower or 'privacy' in col_lower):
-                column_mapping[col] = 'Uninstall_Due_Privacy'
-            elif 'different passwords' in col_lower:
-                column_mapping[col] = 'Different_Passwords'
-            elif 'incognito' in col_lower and 'isp' in col_lower:
-                column_mapping[col] = 'Knowledge_Incognito_ISP'
-            elif 'anonymous' in col_lower and 'trace' in col_lower:
-                column_mapping[col] = 'Knowledge_Anonymous_Trace'
-            elif 'social media' in col_lower and 'messages' in col_lower:
-                column_mapping[col] = 'Knowledge_SocialMedia_Messages'
-        
-        # Rename columns
-        df = df.rename(columns=column_mapping)
-        
-        # Calculate knowledge scores
-        knowledge_scores = []
-        for idx, row in df.iterrows():
-            score, total = calculate_knowledge_score_from_survey(row)
-            if total > 0:
-                percentage = (score / total) * 100
-                knowledge_scores.append(percentage)
-            else:
-                knowledge_scores.append(0)
-        
-        df['Knowledge_Score'] = knowledge_scores
-        df['Score'] = knowledge_scores  # Also add as 'Score' for compatibility
-        
         print("[INFO] Prepared data with knowledge scores")
-        print(f"   Average knowledge score: {np.mean(knowledge_scores):.1f}%")
+        print(f"   Average knowledge score: {df['Knowledge_Score'].mean():.1f}%")
         
         return df
         
@@ -161,16 +58,21 @@ def prepare_survey_data_for_ml(csv_path='survey_data_backup.csv'):
         traceback.print_exc()
         return None
 
-def train_enhanced_model():
+def train_enhanced_model(progress=None, df=None):
     """
     Train ML model with survey data
+    progress, if given, is called with each stage name (load, preprocess, cv, fit, save);
+    df, if given, is an already prepared survey frame (see survey_data.prepare_survey_frame())
     """
     print("\n" + "=" * 70)
     print("ENHANCING ML MODEL WITH SURVEY DATA")
     print("=" * 70)
     
     # Prepare survey data
-    df = prepare_survey_data_for_ml()
+    if progress:
+        progress('load')
+    if df is None:
+        df = prepare_survey_data_for_ml()
     
     if df is None:
         print("\n[WARN] Using sample data instead")
@@ -179,6 +81,8 @@ def train_enhanced_model():
     # Initialize and train model
     ml = DigitalAwarenessML()
     
+    if progress:
+        progress('preprocess')
     if df is not None:
         # Use survey data
         X, y = ml.preprocess_data(df)
@@ -190,13 +94,15 @@ def train_enhanced_model():
         print("\n[INFO] Training with sample data")
     
     # Train model
-    ml.train_model(X, y)
+    ml.train_model(X, y, progress=progress)
     
     # Save model
-    ml.save_model('ml_model.pkl')
+    if progress:
+        progress('save')
+    version = ml.save_model()
     
     print("\n[INFO] Model training complete!")
-    print("   Model saved to: ml_model.pkl")
+    print(f"   Model saved as version: {version}")
     print("   The application will now use this enhanced model")
     
     return ml
@@ -2,11 +2,11 @@
 Script to fix or remove invalid resource URLs (like example.com)
 """
 
-from app import app, db, LearningResource
+from app import db, LearningResource, script_app_context
 
 def fix_resource_urls():
     """Remove or update resources with invalid example.com URLs"""
-    with app.app_context():
+    with script_app_context():
         # Find resources with example.com URLs
         invalid_resources = LearningResource.query.filter(
             LearningResource.url.like('%example.com%')
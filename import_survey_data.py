@@ -5,106 +5,311 @@ Enhances the ML model with real survey responses
 
 import pandas as pd
 import numpy as np
-from app import app, db, User, QuizAttempt, QuizQuestion
+from app import (
+    db, User, QuizAttempt, QuizQuestion, SurveyImportState, invalidate_user_features, script_app_context
+)
+from survey_data import (
+    iter_survey_frames, parse_survey_timestamps, prepare_survey_frame, SURVEY_CHUNK_SIZE, KNOWLEDGE_ANSWER_KEY
+)
+from sqlalchemy import insert, select
 from datetime import datetime
 import json
+import os
 
-def import_survey_data_from_csv(csv_path='survey_data_backup.csv'):
+# Rows per executemany() batch in bulk mode
+IMPORT_BATCH_SIZE = 1000
+
+def _clean_value(value, default):
+    """Replace missing survey values with the importer's default."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return default
+    return value
+
+def _insert_in_batches(model, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(insert(model), rows[start:start + batch_size])
+
+# Stands in for every kind of missing value (NaN, None, NaT) in response keys
+RESPONSE_KEY_MISSING = '\x00missing'
+# Stored with the keys; keys of another version were hashed differently and cannot be compared
+RESPONSE_KEY_VERSION = 2
+
+def _canonical_text(value):
+    """Format one answer the same way whatever the source (CSV, XLSX or the Feather store)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return RESPONSE_KEY_MISSING
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        # A column read as float (because it has gaps) still keys 3.0 and 3 alike
+        return str(int(value))
+    return str(value)
+
+def _response_keys(df):
+    """Content hash of each response, used to tell apart responses with the same Timestamp"""
+    canonical = pd.DataFrame({
+        col: [_canonical_text(value) for value in df[col].astype(object)] for col in df.columns
+    }, index=df.index)
+    return [str(key) for key in pd.util.hash_pandas_object(canonical, index=False)]
+
+def _select_new_responses(df, state):
+    """
+    Keep only the responses past the import high-water mark and advance the mark.
+    With a Timestamp column the mark is the newest imported Timestamp plus the keys of
+    the responses imported at exactly that time, so later responses from the same second
+    are still picked up. Rows without a parseable Timestamp (and exports without the
+    column) are tracked by row number.
+    """
+    if 'Timestamp' in df.columns:
+        timestamps = parse_survey_timestamps(df['Timestamp'])
+        undated = timestamps.isna().to_numpy()
+        by_row = undated & (df.index >= (state.rows_seen or 0))
+        stored = json.loads(state.last_timestamp_keys or 'null')
+        if isinstance(stored, dict) and stored.get('version') == RESPONSE_KEY_VERSION:
+            mark_keys, stale_keys = set(stored['keys']), False
+        else:
+            # Keys of an older version: count every response at the mark as imported
+            mark_keys, stale_keys = set(), stored is not None
+        if state.last_timestamp is not None:
+            mark = pd.Timestamp(state.last_timestamp)
+            newer = (timestamps > mark).to_numpy()
+            at_mark = (timestamps == mark).to_numpy()
+            if at_mark.any():
+                keys = _response_keys(df[at_mark])
+                if stale_keys:
+                    mark_keys.update(keys)
+                at_mark[at_mark] = [key not in mark_keys for key in keys]
+            df = df[newer | at_mark | by_row]
+        else:
+            df = df[~undated | by_row]
+        timestamps = timestamps.loc[df.index]
+        newest = timestamps.max()
+        if pd.notna(newest):
+            if state.last_timestamp is None or newest > pd.Timestamp(state.last_timestamp):
+                state.last_timestamp = newest.to_pydatetime()
+                mark_keys = set()
+            if newest == pd.Timestamp(state.last_timestamp):
+                mark_keys.update(_response_keys(df[(timestamps == newest).to_numpy()]))
+                state.last_timestamp_keys = json.dumps({'version': RESPONSE_KEY_VERSION, 'keys': sorted(mark_keys)})
+    else:
+        df = df[df.index >= (state.rows_seen or 0)]
+    if len(df):
+        state.rows_seen = max(state.rows_seen or 0, int(df.index.max()) + 1)
+    return df
+
+def _knowledge_question_count(df):
+    return sum(1 for col, _ in KNOWLEDGE_ANSWER_KEY if col in df.columns)
+
+def import_prepared_survey_frames(frames, source, batch_size=IMPORT_BATCH_SIZE, incremental=True):
+    """
+    Import survey responses that are already mapped and scored (see
+    survey_data.prepare_survey_frame()) from an iterable of frames.
+    Existing users are pre-fetched with a single query, users and quiz attempts
+    are inserted with batched executemany() statements, and everything is
+    committed in one transaction, together with dropping the stale feature records
+    of the users who received attempts.
+    With incremental=True only responses past the stored high-water mark
+    (SurveyImportState) for source are imported, so re-running the import is idempotent.
+    """
+    rng = np.random.default_rng()
+    completed_at = datetime.utcnow()
+    
+    with script_app_context():
+        try:
+            state = SurveyImportState.query.filter_by(source=source).first()
+            if state is None:
+                state = SurveyImportState(source=source, rows_seen=0)
+                db.session.add(state)
+            if not incremental:
+                state.last_timestamp = None
+                state.last_timestamp_keys = None
+                state.rows_seen = 0
+            
+            user_ids = dict(db.session.execute(select(User.email, User.id)).all())
+            created_users = 0
+            created_attempts = 0
+            loaded_rows = 0
+            skipped_rows = 0
+            attempt_user_ids = set()
+            
+            for df in frames:
+                loaded_rows += len(df)
+                print(f"Loaded {loaded_rows} survey responses from {source}")
+                new_df = _select_new_responses(df, state)
+                skipped_rows += len(df) - len(new_df)
+                if new_df.empty:
+                    continue
+                
+                if 'Email Address' in new_df.columns:
+                    emails = [
+                        _clean_value(email, f'survey_user_{idx}@example.com')
+                        for idx, email in zip(new_df.index, new_df['Email Address'])
+                    ]
+                else:
+                    emails = [f'survey_user_{idx}@example.com' for idx in new_df.index]
+                
+                # New users (first occurrence of each unknown email)
+                profile_columns = (
+                    ('age_range', 'Age_Range', '18-21'),
+                    ('gender', 'Gender', 'Male'),
+                    ('academic_stream', 'Academic_Stream', 'B.Tech'),
+                    ('year_of_study', 'Year_of_Study', '2nd year'),
+                )
+                profile_values = {
+                    field: new_df[col].tolist() if col in new_df.columns else [default] * len(new_df)
+                    for field, col, default in profile_columns
+                }
+                new_users = []
+                pending_emails = set()
+                for pos, (idx, email) in enumerate(zip(new_df.index, emails)):
+                    if email in user_ids or email in pending_emails:
+                        continue
+                    pending_emails.add(email)
+                    user_row = {
+                        'username': f"survey_user_{idx}",
+                        'email': email,
+                        'password_hash': 'survey_import',  # Placeholder
+                    }
+                    for field, col, default in profile_columns:
+                        user_row[field] = _clean_value(profile_values[field][pos], default)
+                    new_users.append(user_row)
+                
+                if new_users:
+                    _insert_in_batches(User, new_users, batch_size)
+                    new_emails = [row['email'] for row in new_users]
+                    for start in range(0, len(new_emails), batch_size):
+                        batch = new_emails[start:start + batch_size]
+                        user_ids.update(db.session.execute(
+                            select(User.email, User.id).where(User.email.in_(batch))
+                        ).all())
+                    created_users += len(new_users)
+                
+                # Quiz attempts from the precomputed knowledge scores
+                total_knowledge_questions = _knowledge_question_count(new_df)
+                if total_knowledge_questions > 0:
+                    percentages = new_df['Knowledge_Score'].to_numpy(dtype='float64')
+                    knowledge_score = np.rint(percentages * total_knowledge_questions / 100).astype(int)
+                    time_taken = rng.integers(120, 300, len(new_df))  # Simulated time
+                    attempts = [
+                        {
+                            'user_id': user_ids[email],
+                            'quiz_type': 'Privacy Basics',  # Default type
+                            'score': int(score),
+                            'total_questions': total_knowledge_questions,
+                            'percentage': float(percentage),
+                            'time_taken': int(taken),
+                            'time_limit': 300,
+                            'completed_at': completed_at
+                        }
+                        for email, score, percentage, taken in zip(emails, knowledge_score, percentages, time_taken)
+                    ]
+                    _insert_in_batches(QuizAttempt, attempts, batch_size)
+                    attempt_user_ids.update(row['user_id'] for row in attempts)
+                    created_attempts += len(attempts)
+            
+            # Their running aggregates no longer match their attempts; rebuilt on next use
+            invalidate_user_features(attempt_user_ids, batch_size)
+            # The high-water mark is committed together with the imported rows
+            db.session.commit()
+            print(f"\n✅ Import complete!")
+            print(f"   Created {created_users} new users")
+            print(f"   Created {created_attempts} quiz attempts")
+            if skipped_rows:
+                print(f"   Skipped {skipped_rows} previously imported responses")
+            return True
+        
+        except FileNotFoundError:
+            db.session.rollback()
+            print(f"❌ File {source} not found.")
+            print("   Please ensure survey_data_backup.csv exists in the project directory")
+            return False
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error importing data: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+def import_survey_data_bulk(csv_path='survey_data_backup.csv', chunksize=SURVEY_CHUNK_SIZE,
+                            batch_size=IMPORT_BATCH_SIZE, incremental=True):
+    """
+    Set-based variant of import_survey_data_from_csv(): streams the export chunk
+    by chunk, prepares each chunk and imports it with import_prepared_survey_frames().
+    """
+    frames = (prepare_survey_frame(df) for df in iter_survey_frames(csv_path, chunksize))
+    return import_prepared_survey_frames(frames, os.path.basename(csv_path), batch_size, incremental)
+
+def import_survey_data_from_csv(csv_path='survey_data_backup.csv', chunksize=SURVEY_CHUNK_SIZE, bulk=True,
+                                incremental=True):
     """
     Import survey data from CSV file and create quiz attempts
-    This simulates users taking quizzes based on their survey responses
+    This simulates users taking quizzes based on their survey responses.
+    The export is streamed chunk by chunk, so memory stays flat for large files.
+    With bulk=True (default) the set-based import_survey_data_bulk() is used,
+    importing only new responses unless incremental=False;
+    bulk=False keeps the original row-by-row ORM path (always a full import).
     """
+    if bulk:
+        return import_survey_data_bulk(csv_path, chunksize, incremental=incremental)
+    
     try:
-        # Load survey data
-        df = pd.read_csv(csv_path)
-        print(f"Loaded {len(df)} survey responses from {csv_path}")
-        
-        # Column mapping (from Analysis.ipynb)
-        column_mapping = {
-            'What is your age range?': 'Age_Range',
-            'What is your gender?': 'Gender',
-            'Educational background? (currently pursuing)': 'Academic_Stream',
-            'What is your current level of study in university?': 'Year_of_Study',
-            'In the past 6 months, how often have you read the privacy policy before installing a new app or signing up for a service?': 'Privacy_Policy_Reading',
-            'How often do you review app permissions (e.g., camera, location) for the apps installed on your phone?': 'App_Permissions_Review',
-            'Have you ever uninstalled an app because it asked for too many permissions or raised privacy concerns?': 'Uninstall_Due_Privacy',
-            'Do you use different passwords for different apps and websites to secure your personal data?': 'Different_Passwords',
-            'True/False Knowledge Check:   [Incognito mode hides your browsing history from your Internet Service Provider (ISP).]': 'Knowledge_Incognito_ISP',
-            'True/False Knowledge Check:   [Data described as "anonymous" in privacy policies is impossible to trace back to you.]': 'Knowledge_Anonymous_Trace',
-            'True/False Knowledge Check:   [Social media platforms are allowed to analyze private messages to target ads.]': 'Knowledge_SocialMedia_Messages',
-        }
-        
-        # Rename columns
-        df_renamed = df.rename(columns=column_mapping)
-        
         # Create or get users and quiz attempts based on survey data
-        with app.app_context():
+        with script_app_context():
             created_users = 0
             created_attempts = 0
+            loaded_rows = 0
             
-            for idx, row in df_renamed.iterrows():
-                # Get or create user based on email
-                email = row.get('Email Address', f'survey_user_{idx}@example.com')
-                username = f"survey_user_{idx}"
-                
-                # Check if user exists
-                user = User.query.filter_by(email=email).first()
-                if not user:
-                    user = User(
-                        username=username,
-                        email=email,
-                        password_hash='survey_import',  # Placeholder
-                        age_range=row.get('Age_Range', '18-21'),
-                        gender=row.get('Gender', 'Male'),
-                        academic_stream=row.get('Academic_Stream', 'B.Tech'),
-                        year_of_study=row.get('Year_of_Study', '2nd year')
-                    )
-                    db.session.add(user)
-                    db.session.commit()
-                    created_users += 1
-                
-                # Calculate knowledge score from True/False questions
-                knowledge_score = 0
-                total_knowledge_questions = 0
+            for df in iter_survey_frames(csv_path, chunksize):
+                loaded_rows += len(df)
+                print(f"Loaded {loaded_rows} survey responses from {csv_path}")
                 
-                # Check knowledge questions
-                if 'Knowledge_Incognito_ISP' in row:
-                    total_knowledge_questions += 1
-                    # False is correct (incognito doesn't hide from ISP)
-                    if str(row['Knowledge_Incognito_ISP']).strip().lower() in ['false', 'b']:
-                        knowledge_score += 1
+                # Standardize columns and score the knowledge checks
+                df_renamed = prepare_survey_frame(df)
+                total_knowledge_questions = _knowledge_question_count(df_renamed)
+                attempt_user_ids = set()
                 
-                if 'Knowledge_Anonymous_Trace' in row:
-                    total_knowledge_questions += 1
-                    # False is correct (anonymous data can be traced)
-                    if str(row['Knowledge_Anonymous_Trace']).strip().lower() in ['false', 'b']:
-                        knowledge_score += 1
+                for idx, row in df_renamed.iterrows():
+                    # Get or create user based on email
+                    email = row.get('Email Address', f'survey_user_{idx}@example.com')
+                    username = f"survey_user_{idx}"
                 
-                if 'Knowledge_SocialMedia_Messages' in row:
-                    total_knowledge_questions += 1
-                    # True is correct (platforms can analyze messages)
-                    if str(row['Knowledge_SocialMedia_Messages']).strip().lower() in ['true', 'a']:
-                        knowledge_score += 1
+                    # Check if user exists
+                    user = User.query.filter_by(email=email).first()
+                    if not user:
+                        user = User(
+                            username=username,
+                            email=email,
+                            password_hash='survey_import',  # Placeholder
+                            age_range=row.get('Age_Range', '18-21'),
+                            gender=row.get('Gender', 'Male'),
+                            academic_stream=row.get('Academic_Stream', 'B.Tech'),
+                            year_of_study=row.get('Year_of_Study', '2nd year')
+                        )
+                        db.session.add(user)
+                        db.session.commit()
+                        created_users += 1
                 
-                # Calculate percentage
-                if total_knowledge_questions > 0:
-                    percentage = (knowledge_score / total_knowledge_questions) * 100
+                    if total_knowledge_questions > 0:
+                        percentage = float(row['Knowledge_Score'])
+                        knowledge_score = int(round(percentage * total_knowledge_questions / 100))
                     
-                    # Create quiz attempt
-                    attempt = QuizAttempt(
-                        user_id=user.id,
-                        quiz_type='Privacy Basics',  # Default type
-                        score=knowledge_score,
-                        total_questions=total_knowledge_questions,
-                        percentage=percentage,
-                        time_taken=np.random.randint(120, 300),  # Simulated time
-                        time_limit=300,
-                        completed_at=datetime.utcnow()
-                    )
-                    db.session.add(attempt)
-                    created_attempts += 1
+                        # Create quiz attempt
+                        attempt = QuizAttempt(
+                            user_id=user.id,
+                            quiz_type='Privacy Basics',  # Default type
+                            score=knowledge_score,
+                            total_questions=total_knowledge_questions,
+                            percentage=percentage,
+                            time_taken=np.random.randint(120, 300),  # Simulated time
+                            time_limit=300,
+                            completed_at=datetime.utcnow()
+                        )
+                        db.session.add(attempt)
+                        attempt_user_ids.add(user.id)
+                        created_attempts += 1
+                
+                # Commit once per chunk, dropping the stale feature records of the users in it
+                invalidate_user_features(attempt_user_ids)
+                db.session.commit()
             
-            db.session.commit()
             print(f"\n✅ Import complete!")
             print(f"   Created {created_users} new users")
             print(f"   Created {created_attempts} quiz attempts")
@@ -142,7 +347,7 @@ def enhance_ml_model_with_survey_data():
             ml.train_model(X, y)
             
             # Save
-            ml.save_model('ml_model.pkl')
+            ml.save_model()
             
             print("✅ ML model retrained successfully with survey data!")
             return True
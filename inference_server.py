@@ -0,0 +1,419 @@
+"""
+Out-of-process inference service for the knowledge model
+A pool of worker processes owns the loaded DigitalAwarenessML; web workers send
+prediction requests over a Unix socket (or TCP) and concurrent requests
+are micro-batched into single predict_many() calls.
+Messages are pickled, so anyone who can connect can run code in the server: TCP is
+only allowed with a shared ML_INFERENCE_AUTHKEY, and without one the Unix socket is
+created readable and writable by its owner only.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.connection import Client, Listener
+
+INFERENCE_DEFAULT_ADDRESS = 'inference.sock'
+# Shared secret for the connection handshake; required for TCP addresses
+INFERENCE_AUTHKEY = os.environ.get('ML_INFERENCE_AUTHKEY', '').encode('utf-8') or None
+# Requests arriving within this window are scored together, up to this many rows per batch
+MICRO_BATCH_MAX_ROWS = 256
+MICRO_BATCH_WAIT_SECONDS = 0.002
+# Seconds a client waits for a reply before giving up on the connection
+INFERENCE_CLIENT_TIMEOUT = 10.0
+
+
+def parse_address(address):
+    """'host:port' for TCP, anything else is a Unix socket path"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+def check_address_security(address, authkey):
+    """Refuse an unauthenticated TCP address (the pickled messages would let any peer run code)"""
+    if isinstance(address, tuple) and not authkey:
+        raise ValueError(f"Inference over TCP ({address[0]}:{address[1]}) requires ML_INFERENCE_AUTHKEY; "
+                         f"set it for the server and the app, or use a Unix socket path")
+
+
+# ---- Worker processes -------------------------------------------------------
+
+_worker_watcher = None
+
+
+def _load_worker_model(path):
+    from ml_model import DigitalAwarenessML
+    model = DigitalAwarenessML()
+    return model if model.load_model(path) else None
+
+
+def _init_worker(registry_dir):
+    global _worker_watcher
+    from model_registry import ModelWatcher
+    _worker_watcher = ModelWatcher(_load_worker_model, registry_dir)
+    _worker_watcher.get()
+
+
+def _worker_model():
+    """Current registry model of this worker (a new version is picked up before the next batch)"""
+    model = _worker_watcher.get()
+    if model is None:
+        from ml_model import LEGACY_MODEL_PATH
+        if os.path.exists(LEGACY_MODEL_PATH):
+            model = _load_worker_model(LEGACY_MODEL_PATH)
+            _worker_watcher.model = model
+    if model is None:
+        raise RuntimeError("No trained model in the registry")
+    return model
+
+
+def _predict_batch(records):
+    model = _worker_model()
+    predictions = [(str(level), float(confidence)) for level, confidence in model.predict_many(records)]
+    return predictions, _worker_watcher.version
+
+
+def _recommendations(level):
+    return _worker_model().get_recommendations(level)
+
+
+# ---- Server -----------------------------------------------------------------
+
+class MicroBatcher:
+    """Collects concurrent predict requests and scores them as one batch in the worker pool"""
+
+    def __init__(self, pool, max_rows=MICRO_BATCH_MAX_ROWS, wait_seconds=MICRO_BATCH_WAIT_SECONDS, max_in_flight=2):
+        self.pool = pool
+        self.max_rows = max_rows
+        self.wait_seconds = wait_seconds
+        self._queue = queue.Queue()
+        # Bounded so requests queue up (and batch) while every worker is busy
+        self._in_flight = threading.Semaphore(max_in_flight)
+        self.batches = 0
+        self.rows = 0
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        future = Future()
+        if len(records) >= self.max_rows:
+            # Already a full batch: split it across the workers instead of queueing it
+            self._submit_chunks(records, future)
+        else:
+            self._queue.put((records, future))
+        return future
+
+    def _submit_chunks(self, records, future):
+        chunks = [records[i:i + self.max_rows] for i in range(0, len(records), self.max_rows)]
+        parts = [self.pool.submit(_predict_batch, chunk) for chunk in chunks]
+        self._count(len(chunks), len(records))
+
+        def gather(_):
+            if not all(part.done() for part in parts) or future.done():
+                return
+            try:
+                results = [part.result() for part in parts]
+                future.set_result(([p for predictions, _ in results for p in predictions], results[-1][1]))
+            except Exception as e:
+                future.set_exception(e)
+
+        for part in parts:
+            part.add_done_callback(gather)
+
+    def _count(self, batches, rows):
+        # submit() runs on the connection threads, _dispatch() on the batcher thread
+        with self._stats_lock:
+            self.batches += batches
+            self.rows += rows
+
+    def stats(self):
+        with self._stats_lock:
+            return self.batches, self.rows
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            rows = len(batch[0][0])
+            deadline = time.monotonic() + self.wait_seconds
+            while rows < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            self._dispatch(batch, rows)
+
+    def _dispatch(self, batch, rows):
+        records = [record for item_records, _ in batch for record in item_records]
+        self._in_flight.acquire()
+        try:
+            result = self.pool.submit(_predict_batch, records)
+        except Exception as e:
+            self._in_flight.release()
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self._count(1, rows)
+
+        def distribute(done):
+            self._in_flight.release()
+            try:
+                predictions, version = done.result()
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+            start = 0
+            for item_records, future in batch:
+                future.set_result((predictions[start:start + len(item_records)], version))
+                start += len(item_records)
+
+        result.add_done_callback(distribute)
+
+
+class InferenceServer:
+    """Accepts client connections and answers predict / recommendations / status requests"""
+
+    def __init__(self, address=INFERENCE_DEFAULT_ADDRESS, workers=None, authkey=INFERENCE_AUTHKEY,
+                 registry_dir=None, max_rows=MICRO_BATCH_MAX_ROWS, wait_seconds=MICRO_BATCH_WAIT_SECONDS):
+        from model_registry import MODEL_REGISTRY_DIR
+        self.address = parse_address(address)
+        self.authkey = authkey
+        check_address_security(self.address, authkey)
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(registry_dir or MODEL_REGISTRY_DIR,)
+        )
+        self.batcher = MicroBatcher(self.pool, max_rows, wait_seconds, max_in_flight=2 * self.workers)
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        self.started_at = time.time()
+        self._recommendations = {}
+
+    def status(self):
+        batches, rows = self.batcher.stats()
+        with self._requests_lock:
+            requests = self.requests
+        return {
+            'address': self.address,
+            'workers': self.workers,
+            'requests': requests,
+            'batches': batches,
+            'rows': rows,
+            'mean_batch_rows': round(rows / batches, 2) if batches else None,
+            'uptime_seconds': round(time.time() - self.started_at, 1)
+        }
+
+    def handle(self, op, payload):
+        if op == 'predict':
+            with self._requests_lock:
+                self.requests += 1
+            return self.batcher.submit(payload).result()
+        if op == 'recommendations':
+            # Fixed per level for a model class; cache to skip the pool round trip
+            if payload not in self._recommendations:
+                self._recommendations[payload] = self.pool.submit(_recommendations, payload).result()
+            return self._recommendations[payload]
+        if op == 'status':
+            return self.status()
+        raise ValueError(f"Unknown inference request '{op}'")
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ('ok', self.handle(op, payload))
+                except Exception as e:
+                    reply = ('error', f"{type(e).__name__}: {e}")
+                try:
+                    conn.send(reply)
+                except OSError:
+                    return
+
+    def serve_forever(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)  # Stale socket from a previous run
+        # Start the workers (and load the model) before accepting traffic
+        for future in [self.pool.submit(_worker_model) for _ in range(self.workers)]:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Warning: inference worker could not load a model yet: {e}")
+        # Without an authkey the socket file's permissions are the only access control
+        previous_umask = os.umask(0o177) if isinstance(self.address, str) else None
+        try:
+            listener = Listener(self.address, authkey=self.authkey)
+        finally:
+            if previous_umask is not None:
+                os.umask(previous_umask)
+        with listener:
+            print(f"Inference server listening on {self.address} with {self.workers} workers")
+            try:
+                while True:
+                    try:
+                        conn = listener.accept()
+                    except Exception as e:
+                        # Failed handshakes (wrong authkey) must not stop the server
+                        print(f"Rejected inference connection: {e}")
+                        continue
+                    threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+            except KeyboardInterrupt:
+                print("Inference server stopping")
+            finally:
+                self.pool.shutdown(cancel_futures=True)
+
+
+# ---- Client -----------------------------------------------------------------
+
+class InferenceClient:
+    """
+    Stand-in for DigitalAwarenessML in web workers: predictions are answered by the
+    inference server, so the worker does not load the model or scikit-learn.
+    Online learning is not available through the server.
+    """
+
+    online_model = None
+    _learning_warned = False
+
+    def __init__(self, address=INFERENCE_DEFAULT_ADDRESS, authkey=INFERENCE_AUTHKEY, timeout=INFERENCE_CLIENT_TIMEOUT):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        check_address_security(self.address, authkey)
+        self.timeout = timeout
+        self.version = None
+        self._local = threading.local()
+        self._recommendations = {}
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def _call(self, op, payload=None):
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((op, payload))
+                if not conn.poll(self.timeout):
+                    self._drop_connection()
+                    raise TimeoutError(f"Inference server did not answer within {self.timeout}s")
+                status, result = conn.recv()
+                break
+            except (EOFError, ConnectionError, BrokenPipeError):
+                # Server restarted since this connection was opened: reconnect once
+                self._drop_connection()
+                if attempt:
+                    raise
+        if status != 'ok':
+            raise RuntimeError(f"Inference server error: {result}")
+        return result
+
+    def predict_many(self, records):
+        if not records:
+            return []
+        predictions, self.version = self._call('predict', [dict(record) for record in records])
+        return [tuple(prediction) for prediction in predictions]
+
+    def predict_knowledge_level(self, user_data):
+        return self.predict_many([user_data])[0]
+
+    def get_recommendations(self, knowledge_level):
+        if knowledge_level not in self._recommendations:
+            self._recommendations[knowledge_level] = self._call('recommendations', knowledge_level)
+        return list(self._recommendations[knowledge_level])
+
+    def learn_from_attempt(self, user_data, score):
+        if not InferenceClient._learning_warned:
+            InferenceClient._learning_warned = True
+            print("Warning: online learning is not available with ML_INFERENCE_ADDRESS; "
+                  "quiz attempts are not learned from")
+        return False
+
+    def status(self):
+        return self._call('status')
+
+
+def benchmark_inference(address=INFERENCE_DEFAULT_ADDRESS, threads=16, requests_per_thread=200):
+    """Concurrent single-user predictions against a running server (throughput and latency)"""
+    client = InferenceClient(address)
+    record = {'Age_Range': '18-21', 'Gender': 'Male', 'Privacy_Policy_Reading': 'Sometimes'}
+    client.predict_knowledge_level(record)
+    before = client.status()
+    latencies = []
+    lock = threading.Lock()
+
+    def run():
+        local = []
+        for _ in range(requests_per_thread):
+            started = time.perf_counter()
+            client.predict_knowledge_level(record)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    after = client.status()
+    latencies.sort()
+    batches = after['batches'] - before['batches']
+    return {
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        'mean_batch_rows': round((after['rows'] - before['rows']) / batches, 2) if batches else None
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve knowledge model predictions from a worker pool')
+    parser.add_argument('--address', default=os.environ.get('ML_INFERENCE_ADDRESS', INFERENCE_DEFAULT_ADDRESS),
+                        help='Unix socket path, or host:port for TCP (requires ML_INFERENCE_AUTHKEY)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--benchmark', action='store_true', help='benchmark a running server instead of serving')
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+
+    try:
+        if args.benchmark:
+            for key, value in benchmark_inference(args.address, args.threads).items():
+                print(f"  {key}: {value}")
+        else:
+            InferenceServer(args.address, args.workers).serve_forever()
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
@@ -0,0 +1,514 @@
+"""
+Versioned database migrations and seed data
+Run once per deployment (and after pulling changes that add a migration):
+    python migrations.py            apply pending migrations
+    python migrations.py --status   list applied and pending migrations
+The app itself never creates tables, inspects the schema or seeds data at startup.
+Append new steps to MIGRATIONS with the next version number; never edit an applied one.
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import inspect, text
+from werkzeug.security import generate_password_hash
+
+from app import db, User, QuizType, QuizQuestion, LearningResource, SchemaMigration, script_app_context
+
+def create_tables():
+    """Create every table of the current models that does not exist yet"""
+    db.create_all()
+
+def add_quiz_timing_columns():
+    """Add the quiz type and time limit columns to databases created before they existed"""
+    inspector = inspect(db.engine)
+    tables = inspector.get_table_names()
+    
+    if 'quiz_question' in tables:
+        quiz_question_columns = [col['name'] for col in inspector.get_columns('quiz_question')]
+        if 'quiz_type' not in quiz_question_columns:
+            db.session.execute(text('ALTER TABLE quiz_question ADD COLUMN quiz_type VARCHAR(100) DEFAULT "General"'))
+        if 'time_limit' not in quiz_question_columns:
+            db.session.execute(text('ALTER TABLE quiz_question ADD COLUMN time_limit INTEGER DEFAULT 60'))
+    
+    if 'quiz_attempt' in tables:
+        quiz_attempt_columns = [col['name'] for col in inspector.get_columns('quiz_attempt')]
+        for column, column_type in (('quiz_type', 'VARCHAR(100)'), ('time_taken', 'INTEGER'), ('time_limit', 'INTEGER')):
+            if column not in quiz_attempt_columns:
+                db.session.execute(text(f'ALTER TABLE quiz_attempt ADD COLUMN {column} {column_type}'))
+
+def seed_admin():
+    """Create the default admin user if not exists"""
+    if not User.query.filter_by(username='admin').first():
+        admin = User(
+            username='admin',
+            email='admin@example.com',
+            password_hash=generate_password_hash('admin123'),
+            is_admin=True
+        )
+        db.session.add(admin)
+        print("✓ Default admin user created (username: admin, password: admin123)")
+
+def seed_quiz_types():
+    """Add the built-in quiz types if none exist"""
+    if QuizType.query.count() == 0:
+        quiz_types = [
+            QuizType(
+                name="Privacy Basics",
+                description="Test your knowledge about digital privacy fundamentals. Learn how to protect your personal information online.",
+                icon="fa-shield-alt",
+                color="primary",
+                time_limit=300,  # 5 minutes
+                question_count=5,
+                difficulty="Easy"
+            ),
+            QuizType(
+                name="Data Security",
+                description="Master password security, encryption, and data protection practices. Essential for keeping your data safe.",
+                icon="fa-lock",
+                color="success",
+                time_limit=360,  # 6 minutes
+                question_count=6,
+                difficulty="Medium"
+            ),
+            QuizType(
+                name="AI Ethics",
+                description="Understand ethical considerations in artificial intelligence, data collection, and algorithmic decision-making.",
+                icon="fa-robot",
+                color="info",
+                time_limit=420,  # 7 minutes
+                question_count=7,
+                difficulty="Hard"
+            ),
+            QuizType(
+                name="Social Media Privacy",
+                description="Learn about privacy settings, data sharing, and how social media platforms use your information.",
+                icon="fa-share-alt",
+                color="warning",
+                time_limit=300,  # 5 minutes
+                question_count=5,
+                difficulty="Medium"
+            ),
+            QuizType(
+                name="Quick Challenge",
+                description="Fast-paced quiz with time pressure. Test your knowledge under time constraints!",
+                icon="fa-bolt",
+                color="danger",
+                time_limit=180,  # 3 minutes
+                question_count=5,
+                difficulty="Medium"
+            ),
+        ]
+        for qt in quiz_types:
+            db.session.add(qt)
+
+def seed_quiz_questions():
+    """Add the sample quiz questions if none exist"""
+    if QuizQuestion.query.count() == 0:
+        sample_questions = [
+            # Privacy Basics Questions
+            QuizQuestion(
+                question_text="Incognito mode hides your browsing history from your Internet Service Provider (ISP).",
+                option_a="True",
+                option_b="False",
+                option_c="Partially True",
+                option_d="Depends on the browser",
+                correct_answer="B",
+                category="Privacy",
+                quiz_type="Privacy Basics",
+                explanation="Incognito mode only prevents your browser from storing history locally. Your ISP can still see your browsing activity.",
+                difficulty="Easy",
+                time_limit=45
+            ),
+            QuizQuestion(
+                question_text="What is the primary purpose of a privacy policy?",
+                option_a="To protect user data",
+                option_b="To inform users how their data is collected and used",
+                option_c="To prevent data breaches",
+                option_d="To comply with advertising requirements",
+                correct_answer="B",
+                category="Privacy",
+                quiz_type="Privacy Basics",
+                explanation="Privacy policies are meant to inform users about data collection and usage practices.",
+                difficulty="Easy",
+                time_limit=40
+            ),
+            QuizQuestion(
+                question_text="Which of the following is NOT a privacy best practice?",
+                option_a="Reading privacy policies before signing up",
+                option_b="Sharing passwords with trusted friends",
+                option_c="Reviewing app permissions regularly",
+                option_d="Using two-factor authentication",
+                correct_answer="B",
+                category="Privacy",
+                quiz_type="Privacy Basics",
+                explanation="Never share passwords, even with trusted friends. This is a security risk.",
+                difficulty="Easy",
+                time_limit=35
+            ),
+            QuizQuestion(
+                question_text="What does 'cookies' refer to in web browsing?",
+                option_a="Small text files stored on your device",
+                option_b="Security certificates",
+                option_c="Browser extensions",
+                option_d="Encrypted passwords",
+                correct_answer="A",
+                category="Privacy",
+                quiz_type="Privacy Basics",
+                explanation="Cookies are small text files that websites store on your device to remember information.",
+                difficulty="Easy",
+                time_limit=40
+            ),
+            QuizQuestion(
+                question_text="Should you accept all cookies when visiting a website?",
+                option_a="Yes, always",
+                option_b="No, only accept necessary cookies",
+                option_c="It doesn't matter",
+                option_d="Only on trusted sites",
+                correct_answer="B",
+                category="Privacy",
+                quiz_type="Privacy Basics",
+                explanation="Only accept necessary cookies. Optional cookies are often used for tracking and advertising.",
+                difficulty="Medium",
+                time_limit=45
+            ),
+            # Data Security Questions
+            QuizQuestion(
+                question_text="What is the best practice for password security?",
+                option_a="Use the same password everywhere",
+                option_b="Use different passwords for different accounts",
+                option_c="Write passwords in a notebook",
+                option_d="Share passwords with friends",
+                correct_answer="B",
+                category="Data Security",
+                quiz_type="Data Security",
+                explanation="Using unique passwords for each account prevents a single breach from compromising all your accounts.",
+                difficulty="Easy",
+                time_limit=30
+            ),
+            QuizQuestion(
+                question_text="How often should you review app permissions on your phone?",
+                option_a="Never",
+                option_b="Once a year",
+                option_c="Every few months",
+                option_d="When installing new apps",
+                correct_answer="C",
+                category="Data Security",
+                quiz_type="Data Security",
+                explanation="Regularly reviewing app permissions helps ensure apps only have access to data they need.",
+                difficulty="Easy",
+                time_limit=35
+            ),
+            QuizQuestion(
+                question_text="What is two-factor authentication (2FA)?",
+                option_a="Using two different passwords",
+                option_b="Verifying identity using two different methods",
+                option_c="Having two email accounts",
+                option_d="Using two different browsers",
+                correct_answer="B",
+                category="Data Security",
+                quiz_type="Data Security",
+                explanation="2FA requires two different authentication methods, like password + SMS code or biometric.",
+                difficulty="Medium",
+                time_limit=40
+            ),
+            QuizQuestion(
+                question_text="What makes a strong password?",
+                option_a="Using your name and birthdate",
+                option_b="A mix of uppercase, lowercase, numbers, and symbols",
+                option_c="A common word with numbers",
+                option_d="Your pet's name",
+                correct_answer="B",
+                category="Data Security",
+                quiz_type="Data Security",
+                explanation="Strong passwords use a mix of character types and are not easily guessable.",
+                difficulty="Easy",
+                time_limit=35
+            ),
+            QuizQuestion(
+                question_text="What should you do if you suspect a data breach?",
+                option_a="Ignore it",
+                option_b="Change passwords immediately and monitor accounts",
+                option_c="Share it on social media",
+                option_d="Wait and see",
+                correct_answer="B",
+                category="Data Security",
+                quiz_type="Data Security",
+                explanation="Immediately change passwords and monitor your accounts for suspicious activity.",
+                difficulty="Medium",
+                time_limit=40
+            ),
+            QuizQuestion(
+                question_text="What is encryption?",
+                option_a="Hiding files on your computer",
+                option_b="Converting data into a code to prevent unauthorized access",
+                option_c="Deleting old files",
+                option_d="Backing up data",
+                correct_answer="B",
+                category="Data Security",
+                quiz_type="Data Security",
+                explanation="Encryption converts readable data into coded format that can only be read with a key.",
+                difficulty="Medium",
+                time_limit=45
+            ),
+            # AI Ethics Questions
+            QuizQuestion(
+                question_text="Data described as 'anonymous' in privacy policies is impossible to trace back to you.",
+                option_a="True",
+                option_b="False",
+                option_c="Sometimes True",
+                option_d="Not specified",
+                correct_answer="B",
+                category="AI Ethics",
+                quiz_type="AI Ethics",
+                explanation="Anonymous data can often be de-anonymized using various techniques, especially when combined with other data sources.",
+                difficulty="Hard",
+                time_limit=60
+            ),
+            QuizQuestion(
+                question_text="Should AI tools be allowed to analyze students' social media posts to detect mental health issues?",
+                option_a="Yes, always",
+                option_b="No, never",
+                option_c="Only with explicit consent",
+                option_d="Only for research purposes",
+                correct_answer="C",
+                category="AI Ethics",
+                quiz_type="AI Ethics",
+                explanation="AI analysis of personal data should require explicit consent and clear purpose.",
+                difficulty="Hard",
+                time_limit=60
+            ),
+            QuizQuestion(
+                question_text="Who should be held accountable if AI algorithms make incorrect decisions?",
+                option_a="Only the AI system",
+                option_b="Only the developers",
+                option_c="The organization using the AI",
+                option_d="Multiple parties including developers and users",
+                correct_answer="D",
+                category="AI Ethics",
+                quiz_type="AI Ethics",
+                explanation="Accountability for AI decisions should be shared among developers, organizations, and users.",
+                difficulty="Hard",
+                time_limit=65
+            ),
+            QuizQuestion(
+                question_text="Can AI algorithms have bias?",
+                option_a="No, AI is always objective",
+                option_b="Yes, if trained on biased data",
+                option_c="Only in certain cases",
+                option_d="Bias doesn't matter",
+                correct_answer="B",
+                category="AI Ethics",
+                quiz_type="AI Ethics",
+                explanation="AI can inherit bias from training data, making it crucial to use diverse, representative datasets.",
+                difficulty="Medium",
+                time_limit=50
+            ),
+            QuizQuestion(
+                question_text="What is algorithmic transparency?",
+                option_a="Making AI code public",
+                option_b="Understanding how AI makes decisions",
+                option_c="Using clear variable names",
+                option_d="Documenting code",
+                correct_answer="B",
+                category="AI Ethics",
+                quiz_type="AI Ethics",
+                explanation="Algorithmic transparency means understanding how AI systems make their decisions.",
+                difficulty="Hard",
+                time_limit=60
+            ),
+            QuizQuestion(
+                question_text="Should companies use your search history to serve targeted ads?",
+                option_a="Yes, always",
+                option_b="No, never",
+                option_c="Only with consent",
+                option_d="It doesn't matter",
+                correct_answer="C",
+                category="AI Ethics",
+                quiz_type="AI Ethics",
+                explanation="Using personal data for advertising should require user consent and transparency.",
+                difficulty="Medium",
+                time_limit=50
+            ),
+            QuizQuestion(
+                question_text="What is the main concern with AI in education?",
+                option_a="AI is too expensive",
+                option_b="Privacy, bias, and fairness",
+                option_c="AI is too slow",
+                option_d="AI doesn't work",
+                correct_answer="B",
+                category="AI Ethics",
+                quiz_type="AI Ethics",
+                explanation="Main concerns include student privacy, algorithmic bias, and ensuring fair treatment.",
+                difficulty="Medium",
+                time_limit=50
+            ),
+            # Social Media Privacy Questions
+            QuizQuestion(
+                question_text="Social media platforms are allowed to analyze private messages to target ads.",
+                option_a="True",
+                option_b="False",
+                option_c="Only with consent",
+                option_d="Only for security",
+                correct_answer="A",
+                category="Privacy",
+                quiz_type="Social Media Privacy",
+                explanation="Most social media platforms' terms of service allow them to analyze private messages for ad targeting and other purposes.",
+                difficulty="Medium",
+                time_limit=45
+            ),
+            QuizQuestion(
+                question_text="How often should you review privacy settings on social media?",
+                option_a="Never",
+                option_b="Once when you sign up",
+                option_c="Regularly, as settings change",
+                option_d="Only if there's a problem",
+                correct_answer="C",
+                category="Privacy",
+                quiz_type="Social Media Privacy",
+                explanation="Privacy settings change frequently, so regular reviews are important.",
+                difficulty="Easy",
+                time_limit=35
+            ),
+            QuizQuestion(
+                question_text="What information should you avoid sharing publicly on social media?",
+                option_a="Everything",
+                option_b="Personal details like address, phone number, birthdate",
+                option_c="Only photos",
+                option_d="Nothing, it's all safe",
+                correct_answer="B",
+                category="Privacy",
+                quiz_type="Social Media Privacy",
+                explanation="Avoid sharing sensitive personal information that could be used for identity theft or stalking.",
+                difficulty="Easy",
+                time_limit=35
+            ),
+            QuizQuestion(
+                question_text="Can you completely delete your data from social media platforms?",
+                option_a="Yes, always",
+                option_b="No, some data may be retained",
+                option_c="Only if you pay",
+                option_d="It depends on the platform",
+                correct_answer="B",
+                category="Privacy",
+                quiz_type="Social Media Privacy",
+                explanation="Many platforms retain some data even after account deletion, as stated in their privacy policies.",
+                difficulty="Medium",
+                time_limit=45
+            ),
+            QuizQuestion(
+                question_text="What does 'public profile' mean on social media?",
+                option_a="Anyone can see your posts",
+                option_b="Only friends can see",
+                option_c="Only you can see",
+                option_d="Only verified users",
+                correct_answer="A",
+                category="Privacy",
+                quiz_type="Social Media Privacy",
+                explanation="A public profile means anyone on the internet can view your posts and information.",
+                difficulty="Easy",
+                time_limit=30
+            )
+        ]
+        for q in sample_questions:
+            db.session.add(q)
+
+def seed_learning_resources():
+    """Add sample learning resources if none exist"""
+    if LearningResource.query.count() == 0:
+        resources = [
+            LearningResource(
+                title="Understanding Digital Privacy",
+                description="A comprehensive guide to digital privacy and data protection",
+                url="https://example.com/privacy-guide",
+                category="Privacy",
+                resource_type="article"
+            ),
+            LearningResource(
+                title="AI Ethics in Education",
+                description="Learn about ethical considerations when using AI in educational settings",
+                url="https://example.com/ai-ethics",
+                category="AI Ethics",
+                resource_type="article"
+            ),
+            LearningResource(
+                title="Data Security Best Practices",
+                description="Essential tips for protecting your personal data online",
+                url="https://example.com/data-security",
+                category="Data Security",
+                resource_type="video"
+            )
+        ]
+        for r in resources:
+            db.session.add(r)
+
+def add_survey_import_timestamp_keys():
+    """Record which responses were imported at the high-water mark Timestamp"""
+    columns = [col['name'] for col in inspect(db.engine).get_columns('survey_import_state')]
+    if 'last_timestamp_keys' not in columns:
+        db.session.execute(text('ALTER TABLE survey_import_state ADD COLUMN last_timestamp_keys TEXT'))
+
+# (version, name, step); each step runs once, in its own transaction with its version record
+MIGRATIONS = [
+    (1, 'create tables', create_tables),
+    (2, 'add quiz type and time limit columns', add_quiz_timing_columns),
+    (3, 'create default admin user', seed_admin),
+    (4, 'seed quiz types', seed_quiz_types),
+    (5, 'seed quiz questions', seed_quiz_questions),
+    (6, 'seed learning resources', seed_learning_resources),
+    (7, 'add survey import timestamp keys', add_survey_import_timestamp_keys),
+]
+
+class MigrationError(Exception):
+    """A migration step failed; it and the steps after it were not applied"""
+
+def applied_versions():
+    """Versions recorded in the schema_migration table (created if missing)"""
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    return {row.version for row in SchemaMigration.query.all()}
+
+def upgrade(target=None):
+    """
+    Apply pending migrations up to target (default: all); returns the versions applied.
+    Raises MigrationError if a step fails (the steps before it stay applied).
+    """
+    applied = []
+    with script_app_context():
+        done = applied_versions()
+        for version, name, step in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            print(f"Applying migration {version}: {name}")
+            try:
+                step()
+                db.session.add(SchemaMigration(version=version, name=name))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Migration {version} failed: {e}")
+                print("If errors persist, delete digital_awareness.db and run the migrations again")
+                raise MigrationError(f"Migration {version} ({name}) failed: {e}") from e
+            applied.append(version)
+        if not applied:
+            print("Database is up to date")
+    return applied
+
+def print_status():
+    with script_app_context():
+        done = applied_versions()
+        for version, name, _ in MIGRATIONS:
+            print(f"  {'applied' if version in done else 'pending':<8} {version:>3}  {name}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply database migrations and seed data')
+    parser.add_argument('--status', action='store_true', help='list applied and pending migrations')
+    parser.add_argument('--target', type=int, default=None, help='apply migrations up to this version only')
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+    else:
+        try:
+            upgrade(args.target)
+        except MigrationError:
+            sys.exit(1)
@@ -5,60 +5,98 @@ Predicts user knowledge levels and provides personalized recommendations
 
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, StratifiedKFold, cross_val_score
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.model_selection import train_test_split, StratifiedKFold, GridSearchCV
 from sklearn.preprocessing import LabelEncoder
 import pickle
 import os
+import time
+from survey_data import load_survey_frame, prepare_survey_frame, resolve_survey_schema
+from compact_forest import CompactForest
+from online_learning import OnlineKnowledgeModel, ONLINE_CHECKPOINT_DIR
+from model_registry import (
+    MODEL_REGISTRY_DIR, publish_artifact, write_file_atomic, read_current_version, artifact_path
+)
+
+# Single-file model location used before the versioned registry
+LEGACY_MODEL_PATH = 'ml_model.pkl'
+
+# Placeholder for feature keys absent from a record passed to predict_many()
+_MISSING = object()
+
+# Score bins (right-inclusive, 0 counts as Low) that define the knowledge level labels
+KNOWLEDGE_LEVEL_BINS = [0, 40, 70, 100]
+KNOWLEDGE_LEVELS = ['Low', 'Medium', 'High']
+# Survey columns the model is trained on
+SURVEY_FEATURE_COLUMNS = ('Age_Range', 'Gender', 'Academic_Stream', 'Year_of_Study',
+                          'Privacy_Policy_Reading', 'App_Permissions_Review', 'Different_Passwords')
+
+# Largest feature grid (number of combinations) precomputed into the prediction table
+PREDICTION_TABLE_MAX_CELLS = 1000000
+PREDICTION_TABLE_CHUNK_SIZE = 50000
+
+# Random forest settings used when no hyperparameter search is run
+RF_DEFAULT_PARAMS = {'n_estimators': 150, 'max_depth': 12}
+# Grid evaluated by train_model() when ML_PARAM_SEARCH=1 (or when passed explicitly)
+RF_PARAM_GRID = {
+    'n_estimators': [100, 150, 300],
+    'max_depth': [8, 12, None],
+    'min_samples_leaf': [1, 2, 4]
+}
+# Histogram gradient boosting alternative (native categorical splits, scales to millions of rows)
+HGB_DEFAULT_PARAMS = {'max_iter': 200, 'learning_rate': 0.1, 'max_leaf_nodes': 31}
+HGB_PARAM_GRID = {
+    'max_iter': [100, 200, 400],
+    'learning_rate': [0.05, 0.1],
+    'max_leaf_nodes': [15, 31, 63]
+}
+ESTIMATOR_RANDOM_FOREST = 'random_forest'
+ESTIMATOR_HIST_GRADIENT_BOOSTING = 'hist_gradient_boosting'
+# Set ML_ESTIMATOR=hist_gradient_boosting to train the boosting model instead of the forest
+TRAINING_ESTIMATOR = os.environ.get('ML_ESTIMATOR', ESTIMATOR_RANDOM_FOREST)
+TRAINING_PARAM_SEARCH = os.environ.get('ML_PARAM_SEARCH', '0') == '1'
+# Worker processes for CV folds / grid candidates and the final fit (-1 = all cores)
+TRAINING_N_JOBS = int(os.environ.get('ML_TRAINING_N_JOBS', '-1'))
+# Batches up to this size are scored with the array-backed CompactForest instead of sklearn
+# (it matches sklearn exactly and is faster for small batches, slower for large ones)
+COMPACT_FOREST_MAX_BATCH = 256
+
+def compact_code_dtype(n_classes):
+    """Smallest integer dtype that holds codes 0..n_classes-1"""
+    if n_classes <= np.iinfo(np.int8).max + 1:
+        return np.int8
+    if n_classes <= np.iinfo(np.uint16).max + 1:
+        return np.uint16
+    return np.int32
+
+def knowledge_level_for_score(score):
+    """Knowledge level label for a 0-100 score, using the training bins (0 counts as Low)"""
+    if score is None or pd.isna(score):
+        return None
+    for upper, level in zip(KNOWLEDGE_LEVEL_BINS[1:], KNOWLEDGE_LEVELS):
+        if score <= upper:
+            return level
+    return KNOWLEDGE_LEVELS[-1]
 
 class DigitalAwarenessML:
-    def __init__(self):
+    def __init__(self, use_prediction_table=True):
         self.model = None
         self.label_encoders = {}
         self.feature_columns = []
+        self.use_prediction_table = use_prediction_table
+        self.prediction_table = None
+        self.training_report = None
+        self.compact_forest = None
+        self.online_model = None
+        self._category_lookups = {}
         
     def load_survey_data(self, csv_path='survey_data_backup.csv'):
-        """Load survey data from CSV file"""
+        """Load survey data from CSV file (via the columnar survey store), mapped and scored"""
         if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
+            df = prepare_survey_frame(load_survey_frame(csv_path, xlsx_path=None))
             print(f"[INFO] Loaded {len(df)} survey responses from {csv_path}")
-            
-            # Try to calculate knowledge scores if not present
-            if 'Knowledge_Score' not in df.columns and 'Score' not in df.columns:
-                print("   Calculating knowledge scores from True/False questions...")
-                knowledge_scores = []
-                for idx, row in df.iterrows():
-                    score = 0
-                    total = 0
-                    
-                    # Check for knowledge check columns
-                    for col in df.columns:
-                        col_lower = str(col).lower()
-                        if 'incognito' in col_lower and 'isp' in col_lower:
-                            total += 1
-                            answer = str(row[col]).strip().lower()
-                            if answer in ['false', 'b', 'incorrect', 'no']:
-                                score += 1
-                        elif 'anonymous' in col_lower and ('trace' in col_lower or 'impossible' in col_lower):
-                            total += 1
-                            answer = str(row[col]).strip().lower()
-                            if answer in ['false', 'b', 'incorrect', 'no']:
-                                score += 1
-                        elif 'social media' in col_lower and 'messages' in col_lower:
-                            total += 1
-                            answer = str(row[col]).strip().lower()
-                            if answer in ['true', 'a', 'correct', 'yes']:
-                                score += 1
-                    
-                    if total > 0:
-                        knowledge_scores.append((score / total) * 100)
-                    else:
-                        knowledge_scores.append(0)
-                
-                df['Knowledge_Score'] = knowledge_scores
-                df['Score'] = knowledge_scores
-                print(f"   Calculated scores: Average = {np.mean(knowledge_scores):.1f}%")
-            
+            if 'Knowledge_Score' in df.columns:
+                print(f"   Knowledge scores: Average = {df['Knowledge_Score'].mean():.1f}%")
             return df
         else:
             print(f"[WARN] Warning: {csv_path} not found. Using sample data.")
@@ -82,64 +120,73 @@ class DigitalAwarenessML:
         
         return pd.DataFrame(data)
     
+    def survey_column_mapping(self, columns):
+        """Map survey column names to standardized names (shared survey schema)"""
+        return dict(resolve_survey_schema(columns).rename_map)
+    
     def map_survey_columns(self, df):
-        """Map survey column names to standardized names"""
-        column_mapping = {}
-        for col in df.columns:
-            col_lower = str(col).lower()
-            if 'age' in col_lower and 'range' in col_lower:
-                column_mapping[col] = 'Age_Range'
-            elif 'gender' in col_lower:
-                column_mapping[col] = 'Gender'
-            elif ('educational' in col_lower or 'academic' in col_lower) and 'background' in col_lower:
-                column_mapping[col] = 'Academic_Stream'
-            elif 'current level of study' in col_lower or ('level' in col_lower and 'study' in col_lower):
-                column_mapping[col] = 'Year_of_Study'
-            elif 'privacy policy' in col_lower:
-                column_mapping[col] = 'Privacy_Policy_Reading'
-            elif 'app permissions' in col_lower and 'review' in col_lower:
-                column_mapping[col] = 'App_Permissions_Review'
-            elif 'different passwords' in col_lower:
-                column_mapping[col] = 'Different_Passwords'
-        return df.rename(columns=column_mapping)
+        """Rename survey columns to standardized names"""
+        return df.rename(columns=self.survey_column_mapping(df.columns))
+    
+    def _encode_feature_column(self, col, values):
+        """
+        Compact integer codes (int8/uint16) for one categorical column, fitting its
+        LabelEncoder on first use. Categorical columns are encoded once per category.
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Missing values (code -1) map to the extra trailing 'nan' key
+            keys = np.append(values.cat.categories.astype(str).to_numpy(dtype=object), 'nan')
+            row_keys = values.cat.codes.to_numpy()
+            row_keys = np.where(row_keys < 0, len(keys) - 1, row_keys)
+        else:
+            row_keys, keys = pd.factorize(values.astype(str), sort=False)
+            keys = np.asarray(keys, dtype=object)
+        
+        if col not in self.label_encoders:
+            # Same classes LabelEncoder.fit would find on the string values
+            encoder = LabelEncoder()
+            encoder.classes_ = np.unique(keys[np.unique(row_keys)]).astype(object)
+            self.label_encoders[col] = encoder
+        
+        # Unseen categories fall back to the first class (code 0)
+        key_codes = pd.Index(self.label_encoders[col].classes_).get_indexer(keys)
+        key_codes = np.where(key_codes < 0, 0, key_codes).astype(compact_code_dtype(len(self.label_encoders[col].classes_)))
+        return key_codes[row_keys]
     
     def preprocess_data(self, df):
-        """Preprocess data for ML model"""
-        # Map column names first
-        df = self.map_survey_columns(df)
+        """Preprocess data for ML model (categoricals become compact integer codes)"""
+        # Map column names first; only the needed columns are touched, the frame is not copied
+        source_columns = {}
+        for source, target in self.survey_column_mapping(df.columns).items():
+            source_columns.setdefault(target, source)
         
         # Select features
-        feature_cols = ['Age_Range', 'Gender', 'Academic_Stream', 'Year_of_Study',
-                       'Privacy_Policy_Reading', 'App_Permissions_Review', 'Different_Passwords']
+        feature_cols = list(SURVEY_FEATURE_COLUMNS)
         
         # Filter available columns
-        available_cols = [col for col in feature_cols if col in df.columns]
+        available_cols = [col for col in feature_cols if col in source_columns or col in df.columns]
         
         if len(available_cols) == 0:
             print("Warning: No feature columns found. Using sample data.")
             df = self.generate_sample_data()
+            source_columns = {}
             available_cols = feature_cols
         
         # Encode categorical variables
-        X = df[available_cols].copy()
-        
+        encoded = {}
         for col in available_cols:
-            if X[col].dtype == 'object':
-                if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    X[col] = self.label_encoders[col].fit_transform(X[col].astype(str))
-                else:
-                    # Handle unseen categories
-                    X[col] = X[col].astype(str)
-                    known_classes = set(self.label_encoders[col].classes_)
-                    X[col] = X[col].apply(lambda x: x if x in known_classes else self.label_encoders[col].classes_[0])
-                    X[col] = self.label_encoders[col].transform(X[col])
+            values = df[source_columns.get(col, col)]
+            if values.dtype == 'object' or isinstance(values.dtype, pd.CategoricalDtype):
+                encoded[col] = self._encode_feature_column(col, values)
+            else:
+                encoded[col] = values.to_numpy()
+        X = pd.DataFrame(encoded, index=df.index)
         
         # Create target variable (knowledge level: Low, Medium, High)
         if 'Knowledge_Score' in df.columns:
-            y = pd.cut(df['Knowledge_Score'], bins=[0, 40, 70, 100], labels=['Low', 'Medium', 'High'])
+            y = pd.cut(df['Knowledge_Score'], bins=KNOWLEDGE_LEVEL_BINS, labels=KNOWLEDGE_LEVELS, include_lowest=True)
         elif 'Score' in df.columns:
-            y = pd.cut(df['Score'], bins=[0, 40, 70, 100], labels=['Low', 'Medium', 'High'])
+            y = pd.cut(df['Score'], bins=KNOWLEDGE_LEVEL_BINS, labels=KNOWLEDGE_LEVELS, include_lowest=True)
         else:
             # Generate synthetic target based on features
             y = np.random.choice(['Low', 'Medium', 'High'], len(X))
@@ -148,8 +195,44 @@ class DigitalAwarenessML:
         
         return X, y
     
-    def train_model(self, X, y):
-        """Train the ML model"""
+    def build_estimator(self, X, estimator=None):
+        """Unfitted classifier with its default parameters and matching search grid"""
+        estimator = estimator or TRAINING_ESTIMATOR
+        if estimator == ESTIMATOR_HIST_GRADIENT_BOOSTING:
+            # Label-encoded columns are split natively as categories (needs < 255 classes)
+            categorical = [
+                col in self.label_encoders and len(self.label_encoders[col].classes_) < 255
+                for col in X.columns
+            ]
+            model = HistGradientBoostingClassifier(
+                random_state=42,
+                class_weight='balanced',
+                categorical_features=categorical,
+                **HGB_DEFAULT_PARAMS
+            )
+            return model, HGB_DEFAULT_PARAMS, HGB_PARAM_GRID
+        if estimator != ESTIMATOR_RANDOM_FOREST:
+            raise ValueError(f"Unknown estimator '{estimator}'")
+        model = RandomForestClassifier(
+            random_state=42,
+            class_weight='balanced',
+            **RF_DEFAULT_PARAMS
+        )
+        return model, RF_DEFAULT_PARAMS, RF_PARAM_GRID
+    
+    def train_model(self, X, y, progress=None, param_grid=None, n_jobs=None, estimator=None):
+        """
+        Train the ML model (progress, if given, is called with 'cv' and 'fit').
+        CV folds and every param_grid candidate run in parallel across n_jobs
+        workers; the best candidate by mean CV accuracy is fitted.
+        estimator is 'random_forest' (default) or 'hist_gradient_boosting'.
+        """
+        model, default_params, search_grid = self.build_estimator(X, estimator)
+        if param_grid is None and TRAINING_PARAM_SEARCH:
+            param_grid = search_grid
+        if n_jobs is None:
+            n_jobs = TRAINING_N_JOBS
+        
         # Encode target variable
         if 'Knowledge_Level' not in self.label_encoders:
             self.label_encoders['Knowledge_Level'] = LabelEncoder()
@@ -177,21 +260,58 @@ class DigitalAwarenessML:
         else:
             cv = None
         
-        # Train model
-        model = RandomForestClassifier(
-            n_estimators=150,
-            random_state=42,
-            max_depth=12,
-            class_weight='balanced'
-        )
+        self.training_report = None
         
+        if progress:
+            progress('cv')
         if cv is not None:
-            cv_scores = cross_val_score(model, X, y_encoded, cv=cv)
-            print(f"Cross-val accuracy ({cv.n_splits} folds): {cv_scores.mean():.2%} +/- {cv_scores.std():.2%}")
+            candidates = param_grid or {name: [value] for name, value in default_params.items()}
+            started = time.perf_counter()
+            search = GridSearchCV(model, candidates, cv=cv, n_jobs=n_jobs, refit=False)
+            search.fit(X, y_encoded)
+            wall_seconds = time.perf_counter() - started
+            
+            results = search.cv_results_
+            # Summed per-fold fit/score times approximate a serial run
+            serial_seconds = float(np.sum((results['mean_fit_time'] + results['mean_score_time']) * cv.n_splits))
+            best = search.best_index_
+            print(f"Cross-val accuracy ({cv.n_splits} folds): {results['mean_test_score'][best]:.2%} +/- {results['std_test_score'][best]:.2%}")
+            if len(results['params']) > 1:
+                print(f"Best of {len(results['params'])} configurations: {search.best_params_}")
+            print(f"Cross-validation took {wall_seconds:.2f}s ({serial_seconds:.2f}s serial, "
+                  f"{serial_seconds / wall_seconds:.1f}x speedup, n_jobs={n_jobs})")
+            
+            model.set_params(**search.best_params_)
+            self.training_report = {
+                'estimator': type(model).__name__,
+                'best_params': search.best_params_,
+                'best_cv_score': float(results['mean_test_score'][best]),
+                'candidates': len(results['params']),
+                'folds': cv.n_splits,
+                'n_jobs': n_jobs,
+                'cv_wall_seconds': wall_seconds,
+                'cv_serial_seconds': serial_seconds,
+                'speedup': serial_seconds / wall_seconds
+            }
         else:
             print("Skipping cross-validation (not enough samples per class).")
         
-        self.model = model.fit(X_train, y_train)
+        if progress:
+            progress('fit')
+        started = time.perf_counter()
+        if isinstance(model, RandomForestClassifier):
+            self.model = model.set_params(n_jobs=n_jobs).fit(X_train, y_train)
+            # Predictions are small batches; keep them on one core (also fixes the order
+            # trees are summed in, so the compact forest matches sklearn exactly)
+            self.model.set_params(n_jobs=None)
+            self.compact_forest = CompactForest.from_sklearn(self.model)
+        else:
+            # Boosting parallelises internally with OpenMP threads
+            self.model = model.fit(X_train, y_train)
+            self.compact_forest = None
+        self.prediction_table = None
+        if self.training_report is not None:
+            self.training_report['fit_seconds'] = time.perf_counter() - started
         
         # Evaluate
         train_score = self.model.score(X_train, y_train)
@@ -201,41 +321,147 @@ class DigitalAwarenessML:
         print(f"Training accuracy: {train_score:.2%}")
         print(f"Test accuracy: {test_score:.2%}")
         
+        if self.use_prediction_table:
+            self.build_prediction_table()
+        
         return self.model
     
-    def predict_knowledge_level(self, user_data):
-        """Predict knowledge level for a user"""
-        if self.model is None:
-            raise ValueError("Model not trained. Call train_model() first.")
+    def _category_lookup(self, col):
+        """Return a cached index mapping the encoder's classes to their codes"""
+        encoder = self.label_encoders[col]
+        cached = self._category_lookups.get(col)
+        if cached is None or cached[0] is not encoder.classes_:
+            cached = (encoder.classes_, pd.Index(encoder.classes_))
+            self._category_lookups[col] = cached
+        return cached[1]
+    
+    def _encode_columns(self, records):
+        """Encode a batch of records; also report which rows use only known categories"""
+        if isinstance(records, pd.DataFrame):
+            columns = {col: records[col].tolist() for col in self.feature_columns if col in records.columns}
+        else:
+            records = list(records)
+            # A key missing from a record encodes as 0, like a missing column
+            columns = {col: [record.get(col, _MISSING) for record in records] for col in self.feature_columns}
+        
+        encoded = np.zeros((len(records), len(self.feature_columns)))
+        known = np.ones(len(records), dtype=bool)
+        for i, col in enumerate(self.feature_columns):
+            values = columns.get(col)
+            if values is None:
+                known[:] = False
+                continue
+            if col in self.label_encoders:
+                # Unseen categories fall back to the first class (code 0)
+                keys = [None if value is _MISSING else str(value) for value in values]
+                codes = self._category_lookup(col).get_indexer(keys)
+                known &= codes >= 0
+                encoded[:, i] = np.where(codes < 0, 0, codes)
+            else:
+                encoded[:, i] = [0 if value is _MISSING else value for value in values]
+                known[:] = False
+        return encoded, known
+    
+    def encode_records(self, records):
+        """Encode a batch of user records (dicts or a DataFrame) into the model's feature matrix"""
+        encoded, _ = self._encode_columns(records)
+        return pd.DataFrame(encoded, columns=self.feature_columns)
+    
+    def _predict_proba(self, encoded):
+        """Class probabilities for an encoded feature matrix; small batches skip sklearn's fixed overhead"""
+        if self.compact_forest is not None and len(encoded) <= COMPACT_FOREST_MAX_BATCH:
+            return self.compact_forest.predict_proba(encoded)
+        return self.model.predict_proba(pd.DataFrame(encoded, columns=self.feature_columns))
+    
+    def build_prediction_table(self, max_cells=PREDICTION_TABLE_MAX_CELLS):
+        """
+        Precompute the forest's class probabilities for every combination of known
+        feature categories; full distributions (not just the winning level) so the
+        online model can still be blended on top of a table lookup.
+        """
+        self.prediction_table = None
+        if self.model is None or not all(col in self.label_encoders for col in self.feature_columns):
+            return None
         
-        # Prepare user data
-        X = pd.DataFrame([user_data])
+        shape = tuple(len(self.label_encoders[col].classes_) for col in self.feature_columns)
+        total = int(np.prod(shape, dtype=np.int64))
+        if total > max_cells:
+            print(f"Skipping prediction table ({total} combinations exceeds {max_cells}).")
+            return None
         
-        # Encode features
-        for col in self.feature_columns:
-            if col in X.columns and col in self.label_encoders:
-                X[col] = X[col].astype(str)
-                # Handle unseen categories
-                known_classes = set(self.label_encoders[col].classes_)
-                X[col] = X[col].apply(lambda x: x if x in known_classes else self.label_encoders[col].classes_[0])
-                X[col] = self.label_encoders[col].transform(X[col])
+        probabilities = np.empty((total, len(self.model.classes_)), dtype=np.float64)
+        for start in range(0, total, PREDICTION_TABLE_CHUNK_SIZE):
+            cells = np.arange(start, min(start + PREDICTION_TABLE_CHUNK_SIZE, total))
+            grid = np.column_stack(np.unravel_index(cells, shape)).astype(float)
+            probabilities[cells] = self._predict_proba(grid)
         
-        # Ensure all feature columns are present
-        for col in self.feature_columns:
-            if col not in X.columns:
-                X[col] = 0
+        self.prediction_table = {'shape': shape, 'probabilities': probabilities}
+        print(f"Prediction table built: {total} combinations ({probabilities.nbytes / 1024:.0f} KB)")
+        return self.prediction_table
+    
+    def predict_many(self, records):
+        """Predict knowledge levels and confidences for a batch of users"""
+        if self.model is None:
+            raise ValueError("Model not trained. Call train_model() first.")
         
-        X = X[self.feature_columns]
+        encoded, known = self._encode_columns(records)
+        n_rows = len(encoded)
+        if n_rows == 0:
+            return []
         
-        # Predict
-        prediction = self.model.predict(X)[0]
-        knowledge_level = self.label_encoders['Knowledge_Level'].inverse_transform([prediction])[0]
+        # Forest class probabilities: rows with only known categories are looked up
+        # in the precomputed table, the rest take one forest pass
+        classes = self.model.classes_
+        probabilities = np.empty((n_rows, len(classes)), dtype=np.float64)
+        table = self.prediction_table
+        if table is None:
+            known[:] = False
+        if known.any():
+            cells = np.ravel_multi_index(encoded[known].astype(np.intp).T, table['shape'])
+            probabilities[known] = table['probabilities'][cells]
+        if not known.all():
+            probabilities[~known] = self._predict_proba(encoded[~known])
         
-        # Get prediction probabilities
-        probabilities = self.model.predict_proba(X)[0]
-        confidence = max(probabilities)
+        online = self.online_model
+        online_weight = online.weight() if online is not None else 0.0
+        if online_weight > 0:
+            blended = online.predict_proba(encoded) * online_weight
+            blended[:, classes] += (1 - online_weight) * probabilities
+            probabilities, classes = blended, np.arange(blended.shape[1])
         
-        return knowledge_level, confidence
+        # predict() is the argmax of predict_proba() (first class on ties); values are Knowledge_Level codes
+        winners = probabilities.argmax(axis=1)
+        best = classes[winners]
+        confidences = probabilities[np.arange(n_rows), winners]
+        levels = self.label_encoders['Knowledge_Level'].inverse_transform(best)
+        return list(zip(levels, confidences))
+    
+    def enable_online_learning(self, checkpoint_dir=ONLINE_CHECKPOINT_DIR):
+        """Attach an incremental model, resuming from the workers' checkpoints whose encoders match"""
+        self.online_model = OnlineKnowledgeModel.for_model(self, checkpoint_dir)
+        return self.online_model
+    
+    def learn_from_attempt(self, user_data, score):
+        """
+        Update the online model with one quiz attempt; checkpoints when due.
+        Only the profile columns of user_data are learned from (ONLINE_FEATURE_COLUMNS),
+        the same ones the online model predicts from; they must not be derived from score.
+        """
+        if self.online_model is None:
+            return False
+        level = knowledge_level_for_score(score)
+        level_codes = pd.Index(self.label_encoders['Knowledge_Level'].classes_).get_indexer([level])
+        if level is None or level_codes[0] < 0:
+            return False
+        encoded, _ = self._encode_columns([user_data])
+        self.online_model.partial_fit(encoded, level_codes)
+        if self.online_model.checkpoint_due():
+            self.online_model.save()
+        return True
+    
+    def predict_knowledge_level(self, user_data):
+        """Predict knowledge level for a user"""
+        return self.predict_many([user_data])[0]
     
     def get_recommendations(self, knowledge_level):
         """Get personalized recommendations based on knowledge level"""
@@ -265,25 +491,52 @@ class DigitalAwarenessML:
         
         return recommendations.get(knowledge_level, recommendations['Medium'])
     
-    def save_model(self, filepath='ml_model.pkl'):
-        """Save the trained model"""
+    def save_model(self, filepath=None):
+        """
+        Save the trained model. By default a new version is published to the model
+        registry and made current; with filepath the pickle is written there instead.
+        Both paths write atomically. Returns the registry version (or filepath).
+        """
         model_data = {
             'model': self.model,
             'label_encoders': self.label_encoders,
-            'feature_columns': self.feature_columns
+            'feature_columns': self.feature_columns,
+            'prediction_table': self.prediction_table,
+            'training_report': self.training_report
         }
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
+        write_model = lambda f: pickle.dump(model_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if filepath is None:
+            version = publish_artifact(write_model)
+            print(f"Model saved as version {version} in {MODEL_REGISTRY_DIR}")
+            return version
+        write_file_atomic(filepath, write_model)
         print(f"Model saved to {filepath}")
+        return filepath
     
-    def load_model(self, filepath='ml_model.pkl'):
-        """Load a trained model"""
+    def load_model(self, filepath=None):
+        """Load a trained model (by default the registry's current version, else ml_model.pkl)"""
+        if filepath is None:
+            version = read_current_version()
+            filepath = artifact_path(version) if version else LEGACY_MODEL_PATH
         if os.path.exists(filepath):
             with open(filepath, 'rb') as f:
                 model_data = pickle.load(f)
             self.model = model_data['model']
             self.label_encoders = model_data['label_encoders']
             self.feature_columns = model_data['feature_columns']
+            if isinstance(self.model, RandomForestClassifier):
+                # Sequential predict_proba sums trees in a fixed order, so every batch size
+                # (compact forest, sklearn, prediction table) gives the same probabilities
+                self.model.set_params(n_jobs=None)
+            self.compact_forest = (CompactForest.from_sklearn(self.model)
+                                   if isinstance(self.model, RandomForestClassifier) else None)
+            self.prediction_table = model_data.get('prediction_table')
+            if self.prediction_table is not None and 'probabilities' not in self.prediction_table:
+                # Older artifacts stored only the winning level per combination
+                self.prediction_table = None
+            self.training_report = model_data.get('training_report')
+            if self.prediction_table is None and self.use_prediction_table:
+                self.build_prediction_table()
             print(f"Model loaded from {filepath}")
             return True
         else:
@@ -0,0 +1,145 @@
+"""
+Versioned on-disk registry for trained ML models
+Each save writes a new artifact atomically and then moves a CURRENT pointer to it,
+so readers only ever see complete files and workers can detect new versions with a stat
+"""
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+MODEL_REGISTRY_DIR = 'model_registry'
+MODEL_POINTER_NAME = 'CURRENT'
+MODEL_ARTIFACT_PREFIX = 'ml_model-'
+MODEL_ARTIFACT_SUFFIX = '.pkl'
+# Number of superseded versions kept on disk for rollback
+MODEL_REGISTRY_KEEP = 5
+# A version that failed to load is retried after this many seconds, not on every request
+MODEL_LOAD_RETRY_SECONDS = 5
+
+
+def write_file_atomic(path, write_fn, mode='wb'):
+    """Write via write_fn(file) to a temp file in the same directory, then os.replace it"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, mode) as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def pointer_path(registry_dir=MODEL_REGISTRY_DIR):
+    return os.path.join(registry_dir, MODEL_POINTER_NAME)
+
+
+def artifact_path(version, registry_dir=MODEL_REGISTRY_DIR):
+    return os.path.join(registry_dir, f"{MODEL_ARTIFACT_PREFIX}{version}{MODEL_ARTIFACT_SUFFIX}")
+
+
+def new_version():
+    """Sortable, collision-free version id (UTC timestamp plus random suffix)"""
+    return f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+
+
+def read_current_version(registry_dir=MODEL_REGISTRY_DIR):
+    """Version named by the CURRENT pointer, or None if nothing has been published"""
+    try:
+        with open(pointer_path(registry_dir), 'r', encoding='utf-8') as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def list_versions(registry_dir=MODEL_REGISTRY_DIR):
+    """Published versions, oldest first"""
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = []
+    for name in os.listdir(registry_dir):
+        if name.startswith(MODEL_ARTIFACT_PREFIX) and name.endswith(MODEL_ARTIFACT_SUFFIX):
+            versions.append(name[len(MODEL_ARTIFACT_PREFIX):-len(MODEL_ARTIFACT_SUFFIX)])
+    return sorted(versions)
+
+
+def set_current_version(version, registry_dir=MODEL_REGISTRY_DIR):
+    """Atomically point CURRENT at an existing version (also used for rollback)"""
+    if not os.path.exists(artifact_path(version, registry_dir)):
+        raise FileNotFoundError(f"Model version {version} not found in {registry_dir}")
+    write_file_atomic(pointer_path(registry_dir), lambda f: f.write(version), mode='w')
+
+
+def publish_artifact(write_fn, registry_dir=MODEL_REGISTRY_DIR, keep=MODEL_REGISTRY_KEEP):
+    """Write a new versioned artifact with write_fn(file), make it current and return its version"""
+    version = new_version()
+    write_file_atomic(artifact_path(version, registry_dir), write_fn)
+    set_current_version(version, registry_dir)
+    prune_versions(registry_dir, keep)
+    return version
+
+
+def prune_versions(registry_dir=MODEL_REGISTRY_DIR, keep=MODEL_REGISTRY_KEEP):
+    """Delete all but the newest `keep` superseded versions (never the current one)"""
+    current = read_current_version(registry_dir)
+    old_versions = [v for v in list_versions(registry_dir) if v != current]
+    for version in old_versions[:max(len(old_versions) - keep, 0)]:
+        try:
+            os.remove(artifact_path(version, registry_dir))
+        except OSError as e:
+            print(f"Could not remove old model version {version}: {e}")
+
+
+class ModelWatcher:
+    """
+    Holds the model for the current registry version in this process.
+    get() stats the CURRENT pointer and reloads only when it has changed;
+    the loaded object is swapped in whole, so callers never see a partial model.
+    """
+
+    def __init__(self, load_fn, registry_dir=MODEL_REGISTRY_DIR):
+        self.load_fn = load_fn
+        self.registry_dir = registry_dir
+        self.model = None
+        self.version = None
+        self.load_count = 0
+        self.last_load_seconds = None
+        self._pointer_stat = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def _stat_pointer(self):
+        try:
+            st = os.stat(pointer_path(self.registry_dir))
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def get(self):
+        """Current model, reloading if a new version was published; None if the registry is empty"""
+        pointer_stat = self._stat_pointer()
+        if pointer_stat is not None and pointer_stat == self._pointer_stat:
+            return self.model
+        with self._lock:
+            if pointer_stat != self._pointer_stat and time.monotonic() >= self._retry_at:
+                version = read_current_version(self.registry_dir)
+                if version is not None and version != self.version:
+                    started = time.perf_counter()
+                    model = self.load_fn(artifact_path(version, self.registry_dir))
+                    if model is None:
+                        # Keep the old pointer state so the version is retried (e.g. artifact not fully visible yet)
+                        self._retry_at = time.monotonic() + MODEL_LOAD_RETRY_SECONDS
+                        return self.model
+                    self.model, self.version = model, version
+                    self.load_count += 1
+                    self.last_load_seconds = time.perf_counter() - started
+                    print(f"Loaded model version {version} in {self.last_load_seconds:.2f}s")
+                self._pointer_stat = pointer_stat
+            return self.model
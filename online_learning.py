@@ -0,0 +1,275 @@
+"""
+Incremental learning from live quiz submissions
+A categorical naive Bayes model is updated on every quiz attempt and blended with the
+batch-trained forest. It only uses the profile columns: live attempts carry no real
+answers to the habit questions, so it never trains on (or predicts from) them.
+Each worker checkpoints only the counts it learned itself to its own file; the files
+are additive, so every worker merges all of them instead of one shared checkpoint
+being overwritten by the last writer. Files of exited workers are folded into a base
+file and files written for other encoders are deleted, so the directory stays small.
+"""
+
+import glob
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from model_registry import MODEL_REGISTRY_DIR, write_file_atomic
+
+ONLINE_CHECKPOINT_DIR = os.path.join(MODEL_REGISTRY_DIR, 'online')
+# Checkpoint after this many updates, or this many seconds after the last checkpoint
+ONLINE_CHECKPOINT_EVERY = 25
+ONLINE_CHECKPOINT_SECONDS = 300
+# Live samples at which the online model gets half of the blended prediction weight
+ONLINE_BLEND_HALF_WEIGHT = 200
+ONLINE_MAX_WEIGHT = 0.5
+# Laplace smoothing of the per-feature category counts
+ONLINE_ALPHA = 1.0
+# Features the online model learns from: the user's profile, known for live attempts
+ONLINE_FEATURE_COLUMNS = ('Age_Range', 'Gender', 'Academic_Stream', 'Year_of_Study')
+
+
+def _process_alive(pid):
+    if os.name != 'posix':
+        # No safe liveness probe: never treat another worker's file as abandoned
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class OnlineKnowledgeModel:
+    """Naive Bayes over the forest's encoded profile features, updated one attempt at a time"""
+
+    def __init__(self, feature_columns, feature_classes, level_classes, checkpoint_dir=ONLINE_CHECKPOINT_DIR,
+                 input_index=None):
+        self.created_at = time.time()
+        self.feature_columns = list(feature_columns)
+        self.feature_classes = [[str(c) for c in classes] for classes in feature_classes]
+        self.level_classes = [str(c) for c in level_classes]
+        # Positions of feature_columns in the encoded rows passed to partial_fit() and predict_proba()
+        self.input_index = list(range(len(self.feature_columns))) if input_index is None else list(input_index)
+        self.checkpoint_dir = checkpoint_dir
+        # One file per encoder signature and worker process; other workers' files are merged in read-only
+        self.tag = self._signature_tag()
+        self.checkpoint_path = os.path.join(checkpoint_dir, f"{self.tag}-{os.getpid()}.npz")
+        self.own_counts = self._empty_counts()
+        self.shared_counts = self._empty_counts()
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_model(cls, ml, checkpoint_dir=ONLINE_CHECKPOINT_DIR):
+        """Online model matching a trained DigitalAwarenessML's encoders, resumed from compatible checkpoints"""
+        columns = [col for col in ml.feature_columns if col in ONLINE_FEATURE_COLUMNS]
+        model = cls(
+            columns,
+            [ml.label_encoders[col].classes_ for col in columns],
+            ml.label_encoders['Knowledge_Level'].classes_,
+            checkpoint_dir,
+            input_index=[ml.feature_columns.index(col) for col in columns]
+        )
+        model.resume()
+        model.compact()
+        model.merge_checkpoints()
+        return model
+
+    def _empty_counts(self):
+        n_levels = len(self.level_classes)
+        return {
+            'class_count': np.zeros(n_levels),
+            'category_count': [np.zeros((n_levels, len(classes))) for classes in self.feature_classes]
+        }
+
+    @property
+    def n_updates(self):
+        return int(self.own_counts['class_count'].sum() + self.shared_counts['class_count'].sum())
+
+    def weight(self):
+        """Share of the blended prediction given to the online model"""
+        n_updates = self.n_updates
+        return ONLINE_MAX_WEIGHT * n_updates / (n_updates + ONLINE_BLEND_HALF_WEIGHT)
+
+    def partial_fit(self, encoded, level_codes):
+        """Update with encoded feature rows and their Knowledge_Level codes (bounded, O(rows))"""
+        encoded = np.asarray(encoded, dtype=np.int64)[:, self.input_index]
+        level_codes = np.asarray(level_codes, dtype=np.int64)
+        with self._lock:
+            np.add.at(self.own_counts['class_count'], level_codes, 1)
+            for f, counts in enumerate(self.own_counts['category_count']):
+                np.add.at(counts, (level_codes, encoded[:, f]), 1)
+            self._pending += len(encoded)
+
+    def predict_proba(self, encoded):
+        """Class probabilities aligned with the forest's classes (Knowledge_Level codes 0..n-1)"""
+        encoded = np.asarray(encoded, dtype=np.int64)[:, self.input_index]
+        with self._lock:
+            class_count = self.own_counts['class_count'] + self.shared_counts['class_count']
+            category_count = [own + shared for own, shared in
+                              zip(self.own_counts['category_count'], self.shared_counts['category_count'])]
+        if class_count.sum() == 0:
+            return np.full((len(encoded), len(self.level_classes)), 1.0 / len(self.level_classes))
+        with np.errstate(divide='ignore'):
+            # Levels never seen get probability 0
+            joint = np.tile(np.log(class_count / class_count.sum()), (len(encoded), 1))
+        for f, counts in enumerate(category_count):
+            smoothed = counts + ONLINE_ALPHA
+            log_prob = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+            joint += log_prob[:, encoded[:, f]].T
+        joint -= joint.max(axis=1, keepdims=True)
+        proba = np.exp(joint)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def checkpoint_due(self):
+        if self._pending == 0 or self._closed:
+            return False
+        return (self._pending >= ONLINE_CHECKPOINT_EVERY or
+                time.monotonic() - self._last_checkpoint >= ONLINE_CHECKPOINT_SECONDS)
+
+    def _signature(self):
+        return {
+            'feature_columns': np.array(self.feature_columns),
+            'level_classes': np.array(self.level_classes),
+            **{f'feature_classes_{f}': np.array(classes) for f, classes in enumerate(self.feature_classes)}
+        }
+
+    def _signature_tag(self):
+        """Short hash of the encoders; checkpoint files are named after it"""
+        digest = hashlib.sha1(repr((self.feature_columns, self.feature_classes, self.level_classes)).encode('utf-8'))
+        return digest.hexdigest()[:12]
+
+    def _write_counts(self, path, counts):
+        arrays = {
+            'class_count': counts['class_count'],
+            **{f'category_count_{f}': part for f, part in enumerate(counts['category_count'])}
+        }
+        write_file_atomic(path, lambda f: np.savez(f, **self._signature(), **arrays))
+
+    def save(self):
+        """Write this worker's own counts, then pick up the other workers' latest checkpoints"""
+        if self._closed:
+            return
+        with self._lock:
+            counts = {
+                'class_count': self.own_counts['class_count'].copy(),
+                'category_count': [part.copy() for part in self.own_counts['category_count']]
+            }
+            self._pending = 0
+            self._last_checkpoint = time.monotonic()
+        self._write_counts(self.checkpoint_path, counts)
+        self.compact()
+        self.merge_checkpoints()
+
+    def close(self):
+        """Final checkpoint before this worker's next model takes over the same file"""
+        self.save()
+        self._closed = True
+
+    def resume(self):
+        """Continue from this worker's own file (written by its previous model with the same encoders)"""
+        if not os.path.exists(self.checkpoint_path):
+            return False
+        try:
+            counts = self._read_checkpoint(self.checkpoint_path)
+        except Exception as e:
+            print(f"Could not load online model checkpoint {self.checkpoint_path}: {e}")
+            return False
+        if counts is None:
+            return False
+        with self._lock:
+            self.own_counts = counts
+        return True
+
+    def _read_checkpoint(self, path):
+        """Counts stored in a checkpoint file, or None if it was written for different encoders"""
+        with np.load(path, allow_pickle=False) as data:
+            signature = self._signature()
+            if set(signature) - set(data.files) or any(
+                    data[key].tolist() != value.tolist() for key, value in signature.items()):
+                return None
+            return {
+                'class_count': data['class_count'],
+                'category_count': [data[f'category_count_{f}'] for f in range(len(self.feature_classes))]
+            }
+
+    def compact(self):
+        """
+        Delete checkpoints written for other encoders before this model was created (so a
+        worker still on an older model never deletes a newer model's files) and fold the
+        files of exited workers and earlier base files into one new base file. Files are
+        claimed by renaming them, so two workers compacting at once never count one twice.
+        """
+        bases, exited = [], []
+        for path in glob.glob(os.path.join(self.checkpoint_dir, '*.npz')):
+            tag, _, owner = os.path.basename(path)[:-len('.npz')].partition('-')
+            if tag != self.tag:
+                try:
+                    if os.path.getmtime(path) < self.created_at:
+                        os.remove(path)
+                except OSError:
+                    pass
+            elif owner.startswith('base-'):
+                bases.append(path)
+            elif owner.isdigit() and not _process_alive(int(owner)):
+                exited.append(path)
+        if not exited and len(bases) < 2:
+            return 0
+
+        claimed = []
+        for path in bases + exited:
+            claim = f"{path}.claimed-{os.getpid()}"
+            try:
+                os.rename(path, claim)
+            except OSError:
+                continue  # Claimed by another worker
+            claimed.append(claim)
+        total = self._empty_counts()
+        for claim in claimed:
+            try:
+                counts = self._read_checkpoint(claim)
+            except Exception as e:
+                print(f"Could not load online model checkpoint {claim}: {e}")
+                counts = None
+            if counts is None:
+                continue
+            total['class_count'] += counts['class_count']
+            for part, add in zip(total['category_count'], counts['category_count']):
+                part += add
+        if claimed:
+            self._write_counts(os.path.join(self.checkpoint_dir, f"{self.tag}-base-{uuid.uuid4().hex[:12]}.npz"),
+                               total)
+        for claim in claimed:
+            os.remove(claim)
+        return len(claimed)
+
+    def merge_checkpoints(self):
+        """Sum the counts of every compatible checkpoint except this worker's own"""
+        shared = self._empty_counts()
+        for path in glob.glob(os.path.join(self.checkpoint_dir, f"{self.tag}-*.npz")):
+            if path == self.checkpoint_path:
+                continue
+            try:
+                counts = self._read_checkpoint(path)
+            except FileNotFoundError:
+                continue  # Folded into a base file by another worker meanwhile
+            except Exception as e:
+                print(f"Could not load online model checkpoint {path}: {e}")
+                continue
+            if counts is None:
+                continue
+            shared['class_count'] += counts['class_count']
+            for total, part in zip(shared['category_count'], counts['category_count']):
+                total += part
+        with self._lock:
+            self.shared_counts = shared
+        return self.n_updates
@@ -0,0 +1,14 @@
+"""
+Nightly batch job: precompute knowledge level, confidence and recommendations for every user
+Schedule it with cron, e.g.  0 3 * * *  cd /path/to/app && python refresh_recommendations.py
+"""
+
+from app import refresh_all_recommendations, script_app_context
+
+def refresh_recommendations():
+    """Score all users with the current model and rewrite the UserRecommendation table"""
+    with script_app_context():
+        return refresh_all_recommendations()
+
+if __name__ == '__main__':
+    refresh_recommendations()
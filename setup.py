@@ -7,27 +7,16 @@ import os
 import sys
 
 def setup_database():
-    """Initialize the database"""
+    """Initialize the database: apply migrations (tables, default admin, seed data)"""
     print("Setting up database...")
-    from app import app, db
-    with app.app_context():
-        db.create_all()
-        print("✓ Database initialized")
-        
-        # Create default admin if not exists
-        from app import User
-        from werkzeug.security import generate_password_hash
-        
-        if not User.query.filter_by(username='admin').first():
-            admin = User(
-                username='admin',
-                email='admin@example.com',
-                password_hash=generate_password_hash('admin123'),
-                is_admin=True
-            )
-            db.session.add(admin)
-            db.session.commit()
-            print("✓ Default admin user created (username: admin, password: admin123)")
+    from migrations import upgrade, MigrationError
+    try:
+        upgrade()
+    except MigrationError:
+        print("✗ Database setup failed")
+        return False
+    print("✓ Database initialized")
+    return True
 
 def train_ml_model():
     """Train the ML model"""
@@ -49,7 +38,8 @@ def main():
     print("=" * 60)
     
     # Setup database
-    setup_database()
+    if not setup_database():
+        sys.exit(1)
     
     # Train ML model
     train_ml_model()
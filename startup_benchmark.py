@@ -0,0 +1,126 @@
+"""
+Startup benchmark: cold-import time of app.py
+Each run imports the app in a fresh interpreter with -X importtime, so nothing is
+shared between runs. Exits with status 1 when the median import time is over budget,
+slower than the recorded baseline, or a deferred heavy dependency is imported eagerly.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+STARTUP_MODULE = 'app'
+STARTUP_RUNS = 5
+# Absolute budget for the median cold import (seconds)
+STARTUP_BUDGET_SECONDS = 1.5
+# Written by --record; a run slower than baseline * (1 + tolerance) is a regression
+STARTUP_BASELINE_PATH = 'startup_baseline.json'
+STARTUP_REGRESSION_TOLERANCE = 0.25
+# Must only be imported on first use, never by "import app"
+DEFERRED_MODULES = ('pandas', 'numpy', 'sklearn', 'scipy', 'pyarrow', 'gspread', 'google.oauth2',
+                    'survey_data', 'ml_model')
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} from -X importtime output"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure_import(module=STARTUP_MODULE):
+    """Import module in a fresh interpreter; returns its -X importtime timings"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def eager_deferred_modules(timings):
+    """Deferred modules (or their submodules) that the import pulled in"""
+    return sorted({
+        deferred for deferred in DEFERRED_MODULES
+        for name in timings
+        if name == deferred or name.startswith(deferred + '.')
+    })
+
+
+def run_benchmark(module=STARTUP_MODULE, runs=STARTUP_RUNS):
+    """Median cold-import time over runs, the slowest imports, and eagerly imported deferred modules"""
+    samples = [measure_import(module) for _ in range(runs)]
+    seconds = [timings[module][1] / 1e6 for timings in samples]
+    last = samples[-1]
+    slowest = sorted(last.items(), key=lambda item: item[1][1], reverse=True)
+    return {
+        'module': module,
+        'median_seconds': statistics.median(seconds),
+        'min_seconds': min(seconds),
+        'max_seconds': max(seconds),
+        'modules_imported': len(last),
+        'slowest': [(name, cumulative / 1e6) for name, (_, cumulative) in slowest[1:11]],
+        'eager_deferred': eager_deferred_modules(last)
+    }
+
+
+def load_baseline(path=STARTUP_BASELINE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def check_regression(result, budget=STARTUP_BUDGET_SECONDS, baseline=None, tolerance=STARTUP_REGRESSION_TOLERANCE):
+    """List of failure messages (empty when the startup is within budget)"""
+    failures = []
+    if result['eager_deferred']:
+        failures.append(f"deferred modules imported at startup: {', '.join(result['eager_deferred'])}")
+    if result['median_seconds'] > budget:
+        failures.append(f"median import {result['median_seconds']:.3f}s is over the {budget:.3f}s budget")
+    if baseline is not None:
+        limit = baseline['median_seconds'] * (1 + tolerance)
+        if result['median_seconds'] > limit:
+            failures.append(f"median import {result['median_seconds']:.3f}s regressed from the "
+                            f"{baseline['median_seconds']:.3f}s baseline (limit {limit:.3f}s)")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the cold-import time of the app')
+    parser.add_argument('--runs', type=int, default=STARTUP_RUNS)
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET_SECONDS, help='seconds')
+    parser.add_argument('--record', action='store_true', help=f'save this run as the baseline in {STARTUP_BASELINE_PATH}')
+    args = parser.parse_args()
+
+    result = run_benchmark(runs=args.runs)
+    print(f"import {result['module']}: median {result['median_seconds']:.3f}s "
+          f"(min {result['min_seconds']:.3f}s, max {result['max_seconds']:.3f}s, "
+          f"{result['modules_imported']} modules)")
+    print("Slowest imports (cumulative):")
+    for name, seconds in result['slowest']:
+        print(f"   {name:<40} {seconds:8.3f}s")
+
+    baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), STARTUP_BASELINE_PATH)
+    if args.record:
+        with open(baseline_path, 'w') as f:
+            json.dump({'median_seconds': result['median_seconds'], 'python': sys.version.split()[0]}, f, indent=2)
+        print(f"Baseline saved to {STARTUP_BASELINE_PATH}")
+
+    failures = check_regression(result, args.budget, None if args.record else load_baseline(baseline_path))
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Startup within budget")
@@ -30,3 +30,50 @@ document.addEventListener('DOMContentLoaded', function() {
     validateForm('quizForm');
 });
 
+// Start a background model retraining job; progress is shown in #modelUpdateStatus
+function startModelUpdate(updateUrl) {
+    const statusDiv = document.getElementById('modelUpdateStatus');
+    statusDiv.innerHTML = '<div class="alert alert-info"><i class="fas fa-spinner fa-spin me-2"></i>Starting model retraining...</div>';
+    
+    fetch(updateUrl, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            pollModelUpdate(data.status_url);
+        } else {
+            statusDiv.innerHTML = `<div class="alert alert-danger"><i class="fas fa-exclamation-circle me-2"></i>Error: ${data.error || 'Unknown error'}</div>`;
+        }
+    })
+    .catch(error => {
+        statusDiv.innerHTML = `<div class="alert alert-danger"><i class="fas fa-exclamation-circle me-2"></i>Error: ${error.message}</div>`;
+    });
+}
+
+// Poll a background retraining job until it finishes
+function pollModelUpdate(statusUrl) {
+    const statusDiv = document.getElementById('modelUpdateStatus');
+    const stageLabels = {load: 'Loading data', preprocess: 'Preprocessing', cv: 'Cross-validating', fit: 'Fitting model', save: 'Saving model'};
+    
+    fetch(statusUrl)
+    .then(response => response.json())
+    .then(job => {
+        if (job.status === 'succeeded') {
+            statusDiv.innerHTML = '<div class="alert alert-success"><i class="fas fa-check-circle me-2"></i>Model updated successfully!</div>';
+        } else if (job.status === 'failed' || job.error) {
+            statusDiv.innerHTML = `<div class="alert alert-danger"><i class="fas fa-exclamation-circle me-2"></i>Error: ${job.error || 'Unknown error'}</div>`;
+        } else {
+            const stage = stageLabels[job.stage] || 'Queued';
+            statusDiv.innerHTML = `<div class="alert alert-info"><i class="fas fa-spinner fa-spin me-2"></i>Retraining model: ${stage}...
+                <div class="progress mt-2"><div class="progress-bar progress-bar-striped progress-bar-animated" role="progressbar" style="width: ${job.progress}%">${job.progress}%</div></div></div>`;
+            setTimeout(() => pollModelUpdate(statusUrl), 1000);
+        }
+    })
+    .catch(error => {
+        statusDiv.innerHTML = `<div class="alert alert-danger"><i class="fas fa-exclamation-circle me-2"></i>Error: ${error.message}</div>`;
+    });
+}
@@ -0,0 +1,681 @@
+"""
+Survey data helpers for Digital Awareness Platform
+Column classification, interpretation and knowledge scoring of survey responses
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+from collections import Counter
+from functools import lru_cache
+
+# Optional columnar store backend
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    pyarrow_available = True
+except ImportError:
+    pyarrow_available = False
+
+SURVEY_CSV_PATH = 'survey_data_backup.csv'
+SURVEY_XLSX_PATH = 'Project Survey (Responses).xlsx'
+SURVEY_STORE_VERSION = 1
+SURVEY_STORE_METADATA_KEY = b'survey_store'
+SURVEY_CHUNK_SIZE = 50000
+
+# Knowledge check columns and the answer that counts as correct
+KNOWLEDGE_ANSWER_KEY = (
+    ('Knowledge_Incognito_ISP', False),
+    ('Knowledge_Anonymous_Trace', False),
+    ('Knowledge_SocialMedia_Messages', True),
+)
+
+# Normalized textual answers and their boolean meaning
+TRUE_TOKENS = frozenset({'true', 't', 'a', 'correct', 'yes', 'y', '1', '1.0'})
+FALSE_TOKENS = frozenset({'false', 'f', 'b', 'incorrect', 'no', 'n', '0', '0.0'})
+TOKEN_LOOKUP = {token: True for token in TRUE_TOKENS}
+TOKEN_LOOKUP.update({token: False for token in FALSE_TOKENS})
+
+# Answer codes used by the columnar engine
+ANSWER_TRUE = 1
+ANSWER_FALSE = 0
+ANSWER_UNKNOWN = -1
+
+
+def standardize_survey_column(col_lower):
+    """Return the standardized name for a lower-cased survey header, or None."""
+    if 'age' in col_lower and 'range' in col_lower:
+        return 'Age_Range'
+    elif 'gender' in col_lower:
+        return 'Gender'
+    elif ('educational' in col_lower or 'academic' in col_lower) and 'background' in col_lower:
+        return 'Academic_Stream'
+    elif 'current level of study' in col_lower or ('level' in col_lower and 'study' in col_lower):
+        return 'Year_of_Study'
+    elif 'privacy policy' in col_lower:
+        return 'Privacy_Policy_Reading'
+    elif 'app permissions' in col_lower:
+        return 'App_Permissions_Review'
+    elif 'uninstalled' in col_lower and 'permissions' in col_lower:
+        return 'Uninstall_Due_Privacy'
+    elif 'different passwords' in col_lower:
+        return 'Different_Passwords'
+    elif 'social media app' in col_lower and 'microphone' in col_lower:
+        return 'Social_App_Permissions'
+    elif 'privacy settings' in col_lower and 'frequency' in col_lower:
+        return 'Privacy_Settings_Review'
+    elif 'true/false' in col_lower and 'incognito' in col_lower:
+        return 'Knowledge_Incognito_ISP'
+    elif 'true/false' in col_lower and 'anonymous' in col_lower:
+        return 'Knowledge_Anonymous_Trace'
+    elif 'true/false' in col_lower and 'social media' in col_lower:
+        return 'Knowledge_SocialMedia_Messages'
+    return None
+
+
+class SurveyColumnSchema:
+    """
+    Classification of a survey header row, computed once per distinct header
+    signature. Column references are the standardized (post-rename) names.
+    """
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.rename_map = {}
+        self.columns = []
+
+        self.ai_mental_health = None
+        self.ai_targeted_ads = None
+        self.ai_tracking_comfort = None
+        self.ai_accountability = None
+
+        self.knowledge_incognito = None
+        self.knowledge_anonymous = None
+        self.knowledge_social = None
+        self.knowledge_total = 0
+
+        self.trust_music = None
+        self.trust_exams = None
+        self.curriculum = None
+
+        for header in headers:
+            standardized = standardize_survey_column(str(header).lower())
+            if standardized is not None:
+                self.rename_map[header] = standardized
+            name = standardized or header
+            self.columns.append(name)
+            self._classify(name, str(name).lower())
+
+    def _classify(self, col, col_lower):
+        # AI ethics questions (the last matching column wins)
+        if 'ai' in col_lower and ('mental' in col_lower or 'social media posts' in col_lower):
+            self.ai_mental_health = col
+        elif 'search history' in col_lower and 'targeted ads' in col_lower:
+            self.ai_targeted_ads = col
+        elif 'ai tracked' in col_lower or ('online habits' in col_lower and 'mental health' in col_lower):
+            self.ai_tracking_comfort = col
+        elif 'accountable' in col_lower and 'ai' in col_lower:
+            self.ai_accountability = col
+
+        # Knowledge check breakdown
+        if 'incognito' in col_lower and 'isp' in col_lower:
+            self.knowledge_total += 1
+            self.knowledge_incognito = col
+        elif 'anonymous' in col_lower and ('trace' in col_lower or 'impossible' in col_lower):
+            self.knowledge_total += 1
+            self.knowledge_anonymous = col
+        elif 'social media' in col_lower and 'messages' in col_lower:
+            self.knowledge_total += 1
+            self.knowledge_social = col
+
+        # AI trust ratings
+        if 'trust ai' in col_lower and 'music' in col_lower:
+            self.trust_music = col
+        elif 'trust ai' in col_lower and 'exam' in col_lower:
+            self.trust_exams = col
+
+        # Curriculum opinion (the first matching column wins)
+        if self.curriculum is None and 'curriculum' in col_lower and 'university' in col_lower:
+            self.curriculum = col
+
+
+@lru_cache(maxsize=32)
+def _resolve_survey_schema(headers):
+    return SurveyColumnSchema(headers)
+
+
+def resolve_survey_schema(columns):
+    """Return the cached SurveyColumnSchema for a sequence of raw headers."""
+    return _resolve_survey_schema(tuple(columns))
+
+
+def map_survey_columns(df):
+    """Standardize survey column names for downstream processing."""
+    return df.rename(columns=resolve_survey_schema(df.columns).rename_map)
+
+
+def survey_store_path(csv_path):
+    """Return the columnar store path kept next to a survey CSV."""
+    return os.path.splitext(csv_path)[0] + '.feather'
+
+
+def _file_fingerprint(path):
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
+
+
+def apply_survey_categoricals(df):
+    """Store the mapped (standardized) survey columns as pandas categoricals."""
+    schema = resolve_survey_schema(df.columns)
+    for col in df.columns:
+        is_mapped = col in schema.rename_map or col in schema.rename_map.values()
+        if is_mapped and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def write_survey_store(df, store_path, source_path):
+    """
+    Write df to an uncompressed Feather (Arrow IPC) file so later reads can
+    memory-map it. The source fingerprint is kept in the schema metadata.
+    Returns True on success.
+    """
+    if not pyarrow_available:
+        return False
+    tmp_path = f"{store_path}.{os.getpid()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[SURVEY_STORE_METADATA_KEY] = json.dumps({
+            'version': SURVEY_STORE_VERSION,
+            'source': _file_fingerprint(source_path)
+        }).encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, store_path)
+        return True
+    except (OSError, pa.ArrowException, TypeError, ValueError) as e:
+        print(f"Warning: Could not write survey store {store_path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+def _open_survey_store(store_path, source_path):
+    """Memory-map the store and return an Arrow IPC file reader, or None when stale."""
+    if not pyarrow_available or not os.path.exists(store_path):
+        return None
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(store_path, 'r'))
+    except (OSError, pa.ArrowException) as e:
+        print(f"Warning: Could not read survey store {store_path}: {e}")
+        return None
+    try:
+        stored = json.loads((reader.schema.metadata or {}).get(SURVEY_STORE_METADATA_KEY, b'{}'))
+    except ValueError:
+        return None
+    if stored.get('version') != SURVEY_STORE_VERSION or stored.get('source') != _file_fingerprint(source_path):
+        return None
+    return reader
+
+
+def read_survey_store(store_path, source_path):
+    """
+    Memory-map the columnar store and return it as a DataFrame, or None when
+    the store is missing, unreadable or older than source_path.
+    """
+    reader = _open_survey_store(store_path, source_path)
+    if reader is None:
+        return None
+    return reader.read_all().to_pandas()
+
+
+def load_survey_frame(csv_path=SURVEY_CSV_PATH, xlsx_path=SURVEY_XLSX_PATH):
+    """
+    Load survey responses, preferring the columnar store kept next to the CSV.
+
+    The CSV (or, when missing, the XLSX converted to CSV) is parsed only when
+    the store is missing or stale; the parsed frame is then written to the
+    store once. Returns None when no survey source exists. Read errors
+    propagate to the caller.
+    """
+    store_path = survey_store_path(csv_path)
+    if os.path.exists(csv_path):
+        df = read_survey_store(store_path, csv_path)
+        if df is not None:
+            return df
+        df = pd.read_csv(csv_path)
+    elif xlsx_path and os.path.exists(xlsx_path):
+        df = pd.read_excel(xlsx_path)
+        # Save as CSV for future use
+        try:
+            df.to_csv(csv_path, index=False)
+            print(f"Converted Excel to CSV: {csv_path}")
+        except Exception as e:
+            print(f"Warning: Could not save CSV file: {e}")
+            return apply_survey_categoricals(df)
+    else:
+        return None
+
+    df = apply_survey_categoricals(df)
+    write_survey_store(df, store_path, csv_path)
+    return df
+
+
+def interpret_survey_boolean(value):
+    """Normalize survey responses (textual or numeric) to boolean True/False."""
+    if pd.isna(value):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if value == 1:
+            return True
+        if value == 0:
+            return False
+    return TOKEN_LOOKUP.get(str(value).strip().lower())
+
+
+def calculate_row_knowledge_score(row):
+    """Score a single survey row (percentage of knowledge checks answered correctly)."""
+    score = 0
+    total = 0
+    for col_name, desired in KNOWLEDGE_ANSWER_KEY:
+        if col_name in row:
+            total += 1
+            answer = interpret_survey_boolean(row[col_name])
+            if answer is not None and answer is desired:
+                score += 1
+    percentage = (score / total) * 100 if total else 0
+    return percentage
+
+
+def _answer_code(value):
+    answer = interpret_survey_boolean(value)
+    if answer is None:
+        return ANSWER_UNKNOWN
+    return ANSWER_TRUE if answer else ANSWER_FALSE
+
+
+def interpret_boolean_column(series):
+    """
+    Map a whole survey column to answer codes in one pass.
+
+    Returns an int8 array holding ANSWER_TRUE, ANSWER_FALSE or ANSWER_UNKNOWN
+    per row, matching interpret_survey_boolean() element by element.
+    """
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        codes = np.full(len(values), ANSWER_UNKNOWN, dtype=np.int8)
+        codes[values == 1] = ANSWER_TRUE
+        codes[values == 0] = ANSWER_FALSE
+        return codes
+
+    # Textual / mixed columns have few distinct answers: interpret each unique
+    # value once and broadcast the result back with the factorized codes.
+    value_codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    lookup = np.fromiter(
+        (_answer_code(value) for value in uniques),
+        dtype=np.int8,
+        count=len(uniques)
+    )
+    lookup = np.append(lookup, np.int8(ANSWER_UNKNOWN))  # slot for the -1 NA sentinel
+    return lookup[value_codes]
+
+
+def knowledge_correct_matrix(df):
+    """
+    Return (columns, matrix) where matrix[i, j] is True when row i answered
+    knowledge check columns[j] correctly.
+    """
+    columns = []
+    correct = []
+    for col_name, desired in KNOWLEDGE_ANSWER_KEY:
+        if col_name in df.columns:
+            columns.append(col_name)
+            expected = ANSWER_TRUE if desired else ANSWER_FALSE
+            correct.append(interpret_boolean_column(df[col_name]) == expected)
+    if not correct:
+        return columns, np.zeros((len(df), 0), dtype=bool)
+    return columns, np.column_stack(correct)
+
+
+def score_knowledge_frame(df):
+    """
+    Vectorized equivalent of df.apply(calculate_row_knowledge_score, axis=1).
+
+    Returns a float Series of knowledge percentages aligned with df.index.
+    """
+    columns, correct = knowledge_correct_matrix(df)
+    total = len(columns)
+    if total:
+        scores = (correct.sum(axis=1) / total) * 100
+    else:
+        scores = np.zeros(len(df), dtype='float64')
+    return pd.Series(scores, index=df.index, name='Knowledge_Score', dtype='float64')
+
+
+def prepare_survey_frame(df):
+    """
+    Standardize the columns of a raw survey frame and add its knowledge scores
+    (Knowledge_Score, also as Score). Scores come from the knowledge check columns;
+    only frames without them keep a score column they already carry.
+    This is the one prepared frame shared by the DB import, model training and insights.
+    """
+    prepared = map_survey_columns(df)
+    if any(col in prepared.columns for col, _ in KNOWLEDGE_ANSWER_KEY):
+        scores = score_knowledge_frame(prepared)
+    elif 'Knowledge_Score' in prepared.columns:
+        scores = prepared['Knowledge_Score']
+    elif 'Score' in prepared.columns:
+        scores = prepared['Score']
+    else:
+        scores = score_knowledge_frame(prepared)
+    prepared['Knowledge_Score'] = scores
+    prepared['Score'] = scores
+    return prepared
+
+
+def parse_survey_timestamps(values):
+    """Parse a Timestamp column, tolerating rows written in a different format."""
+    parsed = pd.to_datetime(values, errors='coerce')
+    unparsed = parsed.isna() & values.notna()
+    if unparsed.any():
+        parsed[unparsed] = pd.to_datetime(values[unparsed], errors='coerce', format='mixed')
+    return parsed
+
+
+def iter_survey_frames(csv_path=SURVEY_CSV_PATH, chunksize=SURVEY_CHUNK_SIZE):
+    """
+    Yield raw survey responses chunk by chunk without loading the whole export:
+    record batches of an up-to-date columnar store, otherwise CSV chunks.
+    """
+    reader = _open_survey_store(survey_store_path(csv_path), csv_path)
+    if reader is not None:
+        start = 0
+        for i in range(reader.num_record_batches):
+            frame = reader.get_batch(i).to_pandas()
+            # Continue the row numbering across batches, like CSV chunks do
+            frame.index = pd.RangeIndex(start, start + len(frame))
+            start += len(frame)
+            yield frame
+        return
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        yield chunk
+
+
+def iter_scored_survey_chunks(csv_path=SURVEY_CSV_PATH, chunksize=SURVEY_CHUNK_SIZE):
+    """Yield (schema, chunk) pairs with standardized columns and Knowledge_Score."""
+    for raw in iter_survey_frames(csv_path, chunksize):
+        schema = resolve_survey_schema(raw.columns)
+        chunk = raw.rename(columns=schema.rename_map)
+        chunk['Knowledge_Score'] = score_knowledge_frame(chunk)
+        yield schema, chunk
+
+
+def _ordered_counts(counter):
+    # Highest count first, ties in order of first appearance (like value_counts)
+    return dict(sorted(counter.items(), key=lambda item: -item[1]))
+
+
+def _sorted_keys(mapping):
+    try:
+        return sorted(mapping)
+    except TypeError:
+        return list(mapping)
+
+
+class SurveyAggregates:
+    """
+    Mergeable partial aggregates of scored survey chunks.
+
+    Every field is a count, a sum or a histogram, so memory depends on the
+    number of distinct answers, not on the number of rows. Two instances built
+    from different parts of an export can be combined with merge().
+    """
+
+    GROUP_COLUMNS = {
+        'avg_by_age': 'Age_Range',
+        'avg_by_gender': 'Gender',
+        'avg_by_education': 'Academic_Stream',
+        'avg_by_year': 'Year_of_Study',
+    }
+    COUNT_COLUMNS = {
+        'education_counts': 'Academic_Stream',
+        'year_counts': 'Year_of_Study',
+        'privacy_policy_counts': 'Privacy_Policy_Reading',
+        'permissions_counts': 'App_Permissions_Review',
+        'password_counts': 'Different_Passwords',
+        'uninstall_counts': 'Uninstall_Due_Privacy',
+        'social_perms_counts': 'Social_App_Permissions',
+        'privacy_settings_counts': 'Privacy_Settings_Review',
+    }
+    SCHEMA_COUNT_COLUMNS = {
+        'ai_mental_health_counts': 'ai_mental_health',
+        'ai_targeted_ads_counts': 'ai_targeted_ads',
+        'ai_tracking_comfort_counts': 'ai_tracking_comfort',
+        'curriculum_counts': 'curriculum',
+    }
+    KNOWLEDGE_SLOTS = (
+        ('incognito', 'knowledge_incognito', ('0.0', '0', 'false', 'b', 'incorrect', 'no')),
+        ('anonymous', 'knowledge_anonymous', ('0.0', '0', 'false', 'b', 'incorrect', 'no')),
+        ('social_media', 'knowledge_social', ('1.0', '1', 'true', 'a', 'correct', 'yes')),
+    )
+
+    def __init__(self):
+        self.row_count = 0
+        self.score_counts = Counter()
+        self.group_sums = {key: {} for key in self.GROUP_COLUMNS}
+        self.value_counts = {key: Counter() for key in self.COUNT_COLUMNS}
+        self.value_counts.update({key: Counter() for key in self.SCHEMA_COUNT_COLUMNS})
+        self.value_counts['ai_accountability_counts'] = Counter()
+        self.seen_columns = set()
+        self.knowledge_total = 0
+        self.knowledge_correct = Counter()
+        self.trust = {'music': [0.0, 0], 'exams': [0.0, 0]}
+        self.timeline_daily = {}
+        self.timeline_hourly = {}
+
+    @staticmethod
+    def _add_sums(target, sums, counts):
+        for key, total in sums.items():
+            entry = target.setdefault(key, [0.0, 0])
+            entry[0] += float(total)
+            entry[1] += int(counts[key])
+
+    def update(self, schema, chunk):
+        """Fold one scored chunk (from iter_scored_survey_chunks) into the totals."""
+        scores = chunk['Knowledge_Score']
+        self.row_count += len(chunk)
+        self.score_counts.update(scores.value_counts().to_dict())
+        self.seen_columns.update(chunk.columns)
+        self.knowledge_total = max(self.knowledge_total, schema.knowledge_total)
+
+        for key, col in self.GROUP_COLUMNS.items():
+            if col in chunk.columns:
+                grouped = scores.groupby(chunk[col], observed=True)
+                self._add_sums(self.group_sums[key], grouped.sum(), grouped.count())
+
+        count_columns = dict(self.COUNT_COLUMNS)
+        for key, attr in self.SCHEMA_COUNT_COLUMNS.items():
+            if getattr(schema, attr) is not None:
+                count_columns[key] = getattr(schema, attr)
+        for key, col in count_columns.items():
+            if col in chunk.columns:
+                counts = chunk[col].value_counts(sort=False)
+                self.value_counts[key].update({k: int(v) for k, v in counts.items() if v > 0})
+
+        if schema.ai_accountability is not None:
+            for val in chunk[schema.ai_accountability].dropna():
+                if isinstance(val, str) and ',' in val:
+                    self.value_counts['ai_accountability_counts'].update(v.strip() for v in val.split(','))
+                else:
+                    self.value_counts['ai_accountability_counts'][str(val)] += 1
+
+        for slot, attr, answers in self.KNOWLEDGE_SLOTS:
+            col = getattr(schema, attr)
+            if col is not None:
+                normalized = chunk[col].astype(str).str.strip().str.lower()
+                self.knowledge_correct[slot] += int(normalized.isin(answers).sum())
+
+        for key, col in (('music', schema.trust_music), ('exams', schema.trust_exams)):
+            if col is not None:
+                values = chunk[col].dropna().astype(float)
+                self.trust[key][0] += float(values.sum())
+                self.trust[key][1] += len(values)
+
+        if 'Timestamp' in chunk.columns:
+            timestamps = pd.to_datetime(chunk['Timestamp'], errors='coerce')
+            valid = timestamps.notna()
+            if valid.any():
+                timed_scores = scores[valid]
+                timestamps = timestamps[valid]
+                daily = timed_scores.groupby(timestamps.dt.date)
+                self._add_sums(self.timeline_daily, daily.sum(), daily.count())
+                hourly = timed_scores.groupby(timestamps.dt.hour)
+                self._add_sums(self.timeline_hourly, hourly.sum(), hourly.count())
+        return self
+
+    def merge(self, other):
+        """Combine another partial aggregate into this one."""
+        self.row_count += other.row_count
+        self.score_counts.update(other.score_counts)
+        for key, sums in other.group_sums.items():
+            for value, (total, count) in sums.items():
+                self._add_sums(self.group_sums[key], {value: total}, {value: count})
+        for key, counts in other.value_counts.items():
+            self.value_counts[key].update(counts)
+        self.seen_columns.update(other.seen_columns)
+        self.knowledge_total = max(self.knowledge_total, other.knowledge_total)
+        self.knowledge_correct.update(other.knowledge_correct)
+        for key, (total, count) in other.trust.items():
+            self.trust[key][0] += total
+            self.trust[key][1] += count
+        for target, source in ((self.timeline_daily, other.timeline_daily),
+                               (self.timeline_hourly, other.timeline_hourly)):
+            for value, (total, count) in source.items():
+                self._add_sums(target, {value: total}, {value: count})
+        return self
+
+    def _score_stats(self):
+        n = self.row_count
+        values = sorted(self.score_counts)
+        mean = sum(value * count for value, count in self.score_counts.items()) / n
+        variance = (
+            sum(count * (value - mean) ** 2 for value, count in self.score_counts.items()) / (n - 1)
+            if n > 1 else float('nan')
+        )
+        # Median from the cumulative histogram (average of the middle pair for even n)
+        middle = [(n - 1) // 2, n // 2]
+        picked = []
+        seen = 0
+        for value in values:
+            seen += self.score_counts[value]
+            while middle and middle[0] < seen:
+                picked.append(value)
+                middle.pop(0)
+        median = (picked[0] + picked[1]) / 2
+        return mean, median, variance ** 0.5, values[0], values[-1]
+
+    def _band(self, predicate):
+        return int(sum(count for value, count in self.score_counts.items() if predicate(value)))
+
+    @staticmethod
+    def _averages(sums):
+        return {
+            key: round(sums[key][0] / sums[key][1], 1)
+            for key in _sorted_keys(sums) if sums[key][1]
+        }
+
+    def to_insights(self):
+        """Return the same dictionary as build_awareness_insights(), or None when empty."""
+        if not self.row_count:
+            return None
+        mean, median, std, min_score, max_score = self._score_stats()
+        summary = {
+            'respondent_count': int(self.row_count),
+            'average_score': round(float(mean), 1),
+            'median_score': round(float(median), 1),
+            'high_percentage': round(float(self._band(lambda v: v > 70) / self.row_count * 100), 1),
+            'std_score': round(float(std), 1),
+            'min_score': round(float(min_score), 1),
+            'max_score': round(float(max_score), 1)
+        }
+        insights = {
+            'summary': summary,
+            'score_distribution': {
+                'Low': self._band(lambda v: v < 40),
+                'Medium': self._band(lambda v: 40 <= v < 70),
+                'High': self._band(lambda v: v >= 70)
+            },
+            'score_histogram': {
+                '0-20': self._band(lambda v: 0 <= v <= 20),
+                '21-40': self._band(lambda v: 20 < v <= 40),
+                '41-60': self._band(lambda v: 40 < v <= 60),
+                '61-80': self._band(lambda v: 60 < v <= 80),
+                '81-100': self._band(lambda v: v > 80)
+            },
+        }
+        for key, col in self.GROUP_COLUMNS.items():
+            insights[key] = self._averages(self.group_sums[key]) if col in self.seen_columns else {}
+        for key in self.value_counts:
+            insights[key] = _ordered_counts(self.value_counts[key])
+
+        breakdown_total = self.row_count if self.knowledge_total > 0 else 0
+        insights['knowledge_breakdown'] = {
+            slot: {'correct': int(self.knowledge_correct[slot]), 'total': breakdown_total}
+            for slot, _, _ in self.KNOWLEDGE_SLOTS
+        }
+        for key in ('music', 'exams'):
+            total, count = self.trust[key]
+            insights[f'trust_{key}_avg'] = round(float(total / count), 1) if count else 0
+        insights['timeline'] = [
+            {'date': str(day), 'score': score}
+            for day, score in self._averages(self.timeline_daily).items()
+        ]
+        insights['timeline_daily'] = [
+            {'hour': int(hour), 'score': score}
+            for hour, score in self._averages(self.timeline_hourly).items()
+        ]
+        # Per-row scores are not kept when streaming (memory would grow with the file)
+        insights['raw_scores'] = []
+        return insights
+
+
+def aggregate_survey_csv(csv_path=SURVEY_CSV_PATH, chunksize=SURVEY_CHUNK_SIZE):
+    """Stream a survey export chunk by chunk and return its SurveyAggregates."""
+    aggregates = SurveyAggregates()
+    for schema, chunk in iter_scored_survey_chunks(csv_path, chunksize):
+        aggregates.update(schema, chunk)
+    return aggregates
+
+
+def verify_scoring_parity(df):
+    """
+    Compare the columnar scorer against the row-wise reference on df.
+    Returns the number of mismatching rows (0 means identical results).
+    """
+    if df.empty:
+        return 0
+    expected = df.apply(calculate_row_knowledge_score, axis=1).astype('float64')
+    actual = score_knowledge_frame(df)
+    return int((expected.to_numpy() != actual.to_numpy()).sum())
+
+
+if __name__ == '__main__':
+    from app import load_awareness_dataframe
+
+    # Fixed parity cases live in tests/test_survey_data.py; this checks the real export
+    survey_df = load_awareness_dataframe()
+    if survey_df is None:
+        raise SystemExit("No survey data found")
+    frame = map_survey_columns(survey_df.copy())
+    mismatches = verify_scoring_parity(frame)
+    print(f"survey: {len(frame)} rows, {mismatches} mismatching scores")
+    raise SystemExit(1 if mismatches else 0)
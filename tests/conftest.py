@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app_context(tmp_path):
+    """A migrated SQLite database in tmp_path, with its app context pushed"""
+    from app import create_app
+    from migrations import upgrade
+
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    with app.app_context():
+        upgrade()
+        yield app
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from app import db, QuizAttempt
+from import_survey_data import _response_keys, import_survey_data_bulk
+from survey_data import load_survey_frame, survey_store_path
+
+
+def write_survey_csv(path):
+    # Every response shares the Timestamp, so all of them are told apart by their response keys
+    pd.DataFrame({
+        'Timestamp': ['2025-10-01 10:47:46.117'] * 4,
+        'Email Address': ['a@example.com', 'b@example.com', None, 'd@example.com'],
+        'What is your age range?': ['18-21', None, '22-25', '18-21'],
+        'What is your gender?': ['Male', 'Female', None, 'Female'],
+        'How much do you trust AI to recommend music? ': [4.0, None, 5.0, 2.0],
+        'True/False Knowledge Check: [Incognito mode hides your browsing history from your ISP.]': [1.0, 0.0, None, 1.0],
+        'True/False Knowledge Check: [Data described as "anonymous" is impossible to trace back to you.]':
+            ['False', None, 'True', 'False'],
+        'True/False Knowledge Check: [Social media platforms analyze private messages to target ads.]':
+            [1.0, 1.0, 0.0, None],
+    }).to_csv(path, index=False)
+
+
+def test_response_keys_ignore_the_source_format():
+    from_csv = pd.DataFrame({'answer': ['Yes', float('nan')], 'hours': [3.0, float('nan')]})
+    from_store = pd.DataFrame({'answer': pd.Categorical(['Yes', None]), 'hours': pd.array([3, None], dtype='Int64')})
+    assert _response_keys(from_csv) == _response_keys(from_store)
+
+
+def test_reimport_from_feather_store_adds_nothing(app_context, tmp_path):
+    pytest.importorskip('pyarrow')
+    csv_path = str(tmp_path / 'survey.csv')
+    write_survey_csv(csv_path)
+
+    assert import_survey_data_bulk(csv_path)
+    imported = db.session.query(QuizAttempt).count()
+    assert imported == 4
+
+    # Writes the columnar store; the second import streams from it instead of the CSV
+    load_survey_frame(csv_path, xlsx_path=None)
+    assert pd.io.common.file_exists(survey_store_path(csv_path))
+    assert import_survey_data_bulk(csv_path)
+    assert db.session.query(QuizAttempt).count() == imported
+
+
+def test_keys_of_an_older_version_do_not_reimport_the_mark(app_context, tmp_path):
+    from app import SurveyImportState
+    csv_path = str(tmp_path / 'survey.csv')
+    write_survey_csv(csv_path)
+    assert import_survey_data_bulk(csv_path)
+
+    state = SurveyImportState.query.filter_by(source='survey.csv').one()
+    state.last_timestamp_keys = '["0", "1"]'  # Written by the earlier key format
+    db.session.commit()
+    assert import_survey_data_bulk(csv_path)
+    assert db.session.query(QuizAttempt).count() == 4
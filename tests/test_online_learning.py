@@ -0,0 +1,56 @@
+import glob
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from online_learning import OnlineKnowledgeModel
+
+
+def make_model(checkpoint_dir, classes=('Female', 'Male')):
+    # Rows are encoded as [Gender, Privacy_Policy_Reading]; only Gender is learned from
+    return OnlineKnowledgeModel(['Gender'], [list(classes)], ['High', 'Low', 'Medium'], str(checkpoint_dir),
+                                input_index=[0])
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_habit_columns_do_not_change_predictions(tmp_path):
+    model = make_model(tmp_path)
+    model.partial_fit([[1, 0], [1, 0], [0, 0]], [1, 1, 2])
+    assert np.array_equal(model.predict_proba([[1, 0]]), model.predict_proba([[1, 2]]))
+
+
+def test_compaction_folds_exited_workers_and_drops_other_encoders(tmp_path):
+    # A worker of an earlier model with other categories
+    make_model(tmp_path, classes=('Female', 'Male', 'Other')).save()
+    for _ in range(3):
+        worker = make_model(tmp_path)
+        worker.partial_fit([[1, 0], [0, 0]], [1, 2])
+        worker._write_counts(str(tmp_path / f"{worker.tag}-{exited_pid()}.npz"), worker.own_counts)
+
+    model = make_model(tmp_path)
+    model.partial_fit([[1, 0]], [1])
+    model.save()
+
+    files = sorted(os.path.basename(path) for path in glob.glob(str(tmp_path / '*.npz')))
+    assert files == sorted([os.path.basename(model.checkpoint_path),
+                            os.path.basename(glob.glob(str(tmp_path / f"{model.tag}-base-*.npz"))[0])])
+    assert model.n_updates == 7
+    # A second compaction has nothing left to fold
+    assert model.compact() == 0
+    assert model.merge_checkpoints() == 7
+
+
+def test_an_older_model_keeps_newer_files(tmp_path):
+    older = make_model(tmp_path, classes=('Female', 'Male', 'Other'))
+    newer = make_model(tmp_path)
+    newer.partial_fit([[1, 0]], [1])
+    newer.save()
+    older.save()
+    assert os.path.exists(newer.checkpoint_path)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from survey_data import (
+    calculate_row_knowledge_score, score_knowledge_frame, verify_scoring_parity, TOKEN_LOOKUP
+)
+
+
+def row_wise_scores(df):
+    return [calculate_row_knowledge_score(row) for _, row in df.iterrows()]
+
+
+def test_mixed_case_missing_and_multi_select_answers():
+    # Correct answers: Incognito False, Anonymous False, Social media True
+    df = pd.DataFrame({
+        'Knowledge_Incognito_ISP': ['FALSE', ' False ', 'True', None, 'False, True', 'maybe', 0],
+        'Knowledge_Anonymous_Trace': ['false', 'No', 'B', np.nan, 'A;B', 'F', 0.0],
+        'Knowledge_SocialMedia_Messages': ['TRUE', 'yes', 'A', '', 'True', 'T, F', 1],
+    })
+    expected = [100.0, 100.0, 200 / 3, 0.0, 100 / 3, 100 / 3, 100.0]
+
+    assert score_knowledge_frame(df).tolist() == pytest.approx(expected)
+    assert row_wise_scores(df) == pytest.approx(expected)
+    assert verify_scoring_parity(df) == 0
+
+
+def test_unknown_columns_are_ignored():
+    df = pd.DataFrame({
+        'Knowledge_Incognito_ISP': ['no', 'Yes', 'incorrect'],
+        'Knowledge_Unlisted_Check': ['true', 'true', 'true'],
+        'Comments': ['True', 'False', None],
+    })
+    # Only the one known knowledge check counts
+    expected = [100.0, 0.0, 100.0]
+
+    assert score_knowledge_frame(df).tolist() == pytest.approx(expected)
+    assert verify_scoring_parity(df) == 0
+    assert score_knowledge_frame(df[['Comments']]).tolist() == [0.0, 0.0, 0.0]
+    assert verify_scoring_parity(df[['Comments']]) == 0
+
+
+def test_every_token_numeric_and_missing_value():
+    textual = sorted(TOKEN_LOOKUP) + [' True ', 'YES', 'maybe', '', '2', None, np.nan]
+    numeric = [1, 0, 1.0, 0.0, -0.0, 2.0, 0.5, np.nan, True, False]
+    mixed = textual + numeric
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        'Knowledge_Incognito_ISP': pd.Series(mixed, dtype=object),
+        'Knowledge_Anonymous_Trace': rng.choice([0.0, 1.0, np.nan], len(mixed)),
+        'Knowledge_SocialMedia_Messages': pd.Series(rng.permutation(np.array(mixed, dtype=object))),
+    })
+
+    assert verify_scoring_parity(df) == 0
+    assert verify_scoring_parity(df.astype({'Knowledge_Incognito_ISP': 'category'})) == 0
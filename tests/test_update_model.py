@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from ml_model import DigitalAwarenessML
+from update_model import _concat_training_columns, _training_columns
+
+
+def test_streamed_training_frame_matches_the_single_frame():
+    df = pd.DataFrame({
+        'Age_Range': ['18-21', '22-25', '18-21', '26+', None],
+        'Gender': ['Male', 'Female', 'Female', 'Male', 'Other'],
+        'Academic_Stream': ['B.Tech', 'B.Sc', 'MBA', 'B.Tech', 'B.Sc'],
+        'Year_of_Study': ['1st year', '2nd year', '3rd year', '1st year', '4th year'],
+        'Privacy_Policy_Reading': ['Never', 'Always', 'Sometimes', 'Never', 'Always'],
+        'Knowledge_Score': [0.0, 33.3, 66.7, 100.0, 50.0],
+        'Email Address': ['a@x', 'b@x', 'c@x', 'd@x', 'e@x'],
+    })
+    # Chunks see different categories, so they have to be unioned
+    parts = [_training_columns(df.iloc[:2]), _training_columns(df.iloc[2:])]
+    streamed = _concat_training_columns(parts)
+
+    assert 'Email Address' not in streamed.columns
+    X_full, y_full = DigitalAwarenessML().preprocess_data(df)
+    X_streamed, y_streamed = DigitalAwarenessML().preprocess_data(streamed)
+    assert np.array_equal(X_full.to_numpy(), X_streamed.to_numpy())
+    assert list(y_full.astype(str)) == list(y_streamed.astype(str))
@@ -0,0 +1,105 @@
+"""
+Training benchmark: fit time and peak memory against row count
+Each (rows, estimator) run trains on a synthetic categorical survey frame in a fresh
+process, so its peak RSS is measured in isolation
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCHMARK_ROWS = (10000, 100000)
+BENCHMARK_ESTIMATORS = ('random_forest', 'hist_gradient_boosting')
+
+SURVEY_CATEGORIES = {
+    'Age_Range': ['18-21', '22-25', '26-30'],
+    'Gender': ['Male', 'Female', 'Other'],
+    'Academic_Stream': ['B.Tech', 'BCA', 'B.Sc', 'B.A'],
+    'Year_of_Study': ['1st year', '2nd year', '3rd year', '4th year'],
+    'Privacy_Policy_Reading': ['Never', 'Rarely', 'Sometimes', 'Often', 'Always'],
+    'App_Permissions_Review': ['Never', 'Rarely', 'Sometimes', 'Often', 'Always'],
+    'Different_Passwords': ['Yes', 'No', 'Sometimes']
+}
+
+
+def synthetic_survey_frame(n_rows, seed=42):
+    """Survey-shaped frame of categorical columns with a score that depends on the habits"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col, categories in SURVEY_CATEGORIES.items():
+        codes = rng.integers(0, len(categories), n_rows)
+        data[col] = pd.Categorical.from_codes(codes, categories=categories)
+    habits = (data['Privacy_Policy_Reading'].codes + data['App_Permissions_Review'].codes +
+              2 * (data['Different_Passwords'].codes == 0))
+    score = 10 + 8 * habits + rng.normal(0, 12, n_rows)
+    data['Knowledge_Score'] = np.clip(score, 0, 99).astype(np.int16)
+    return pd.DataFrame(data)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_one(n_rows, estimator, queue):
+    from ml_model import DigitalAwarenessML
+
+    df = synthetic_survey_frame(n_rows)
+    baseline_mb = peak_rss_mb()
+    ml = DigitalAwarenessML(use_prediction_table=False)
+
+    started = time.perf_counter()
+    X, y = ml.preprocess_data(df)
+    preprocess_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    ml.train_model(X, y, estimator=estimator)
+    train_seconds = time.perf_counter() - started
+
+    queue.put({
+        'rows': n_rows,
+        'estimator': estimator,
+        'feature_bytes': int(X.memory_usage(index=False).sum()),
+        'preprocess_seconds': preprocess_seconds,
+        'train_seconds': train_seconds,
+        'cv_seconds': (ml.training_report or {}).get('cv_wall_seconds'),
+        'baseline_rss_mb': baseline_mb,
+        'peak_rss_mb': peak_rss_mb()
+    })
+
+
+def run_benchmark(rows=BENCHMARK_ROWS, estimators=BENCHMARK_ESTIMATORS):
+    """Train every (rows, estimator) combination in its own process and collect the results"""
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for n_rows in rows:
+        for estimator in estimators:
+            queue = context.Queue()
+            process = context.Process(target=_run_one, args=(n_rows, estimator, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            results.append(result)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark model training time and peak memory')
+    parser.add_argument('--rows', type=int, nargs='+', default=list(BENCHMARK_ROWS),
+                        help='row counts to train on (e.g. 10000 100000 1000000)')
+    parser.add_argument('--estimators', nargs='+', default=list(BENCHMARK_ESTIMATORS),
+                        choices=BENCHMARK_ESTIMATORS)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.rows, args.estimators)
+    print()
+    print(f"{'rows':>9}  {'estimator':<24} {'features':>9} {'preprocess':>10} {'train':>9} {'of which CV':>11} {'peak RSS':>9}")
+    for r in results:
+        print(f"{r['rows']:>9}  {r['estimator']:<24} {r['feature_bytes'] / 1e6:>7.1f}MB "
+              f"{r['preprocess_seconds']:>9.2f}s {r['train_seconds']:>8.2f}s {r['cv_seconds'] or 0:>10.2f}s {r['peak_rss_mb']:>7.0f}MB")
@@ -0,0 +1,114 @@
+"""
+Background job runner for ML model retraining
+Runs training off the request thread and tracks per-stage progress
+"""
+
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+TRAINING_STAGES = ('load', 'preprocess', 'cv', 'fit', 'save')
+TRAINING_JOB_HISTORY = 20
+
+
+class TrainingJob:
+    """Status of a single retraining job"""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.stage = None
+        self.completed_stages = []
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def set_stage(self, stage):
+        """Progress callback: mark the previous stage done and start `stage`"""
+        with self._lock:
+            if self.stage is not None and self.stage not in self.completed_stages:
+                self.completed_stages.append(self.stage)
+            self.stage = stage
+
+    def to_dict(self):
+        with self._lock:
+            completed = list(self.completed_stages)
+            if self.status == 'succeeded':
+                progress = 100
+            else:
+                progress = int(100 * len(completed) / len(TRAINING_STAGES))
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'stage': self.stage,
+                'stages': list(TRAINING_STAGES),
+                'completed_stages': completed,
+                'progress': progress,
+                'error': self.error,
+                'created_at': self.created_at.isoformat(),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None
+            }
+
+
+class TrainingJobRunner:
+    """Single-worker executor so only one retraining runs at a time"""
+
+    def __init__(self, max_workers=1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-training')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, train_fn, on_success=None):
+        """
+        Queue train_fn(progress) and return its job. While a job is queued or
+        running, that job is returned instead of starting another one.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status in ('queued', 'running'):
+                    return job
+            job = TrainingJob()
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, train_fn, on_success)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self):
+        with self._lock:
+            if not self._jobs:
+                return None
+            return max(self._jobs.values(), key=lambda job: job.created_at)
+
+    def _prune(self):
+        finished = sorted(
+            (job for job in self._jobs.values() if job.status in ('succeeded', 'failed')),
+            key=lambda job: job.created_at
+        )
+        for job in finished[:max(len(self._jobs) - TRAINING_JOB_HISTORY, 0)]:
+            del self._jobs[job.id]
+
+    def _run(self, job, train_fn, on_success):
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        try:
+            result = train_fn(job.set_stage)
+            if on_success is not None:
+                on_success(result)
+            job.set_stage(None)
+            job.status = 'succeeded'
+        except Exception as e:
+            print(f"Error in training job {job.id}: {e}")
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = datetime.utcnow()
@@ -3,28 +3,141 @@ Quick script to update ML model with latest survey data
 Run this whenever you have new survey responses
 """
 
-from enhance_model import train_enhanced_model
-from import_survey_data import import_survey_data_from_csv
-from app import app
+import os
+import time
 
-def update_all():
-    """Update both database and ML model"""
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from enhance_model import train_enhanced_model, load_primary_survey_dataframe
+from import_survey_data import import_prepared_survey_frames
+from ml_model import SURVEY_FEATURE_COLUMNS
+from survey_data import (
+    iter_survey_frames, prepare_survey_frame, resolve_survey_schema, SurveyAggregates, SURVEY_CSV_PATH
+)
+from app import (
+    refresh_awareness_insights, refresh_all_recommendations, script_app_context, SURVEY_STREAMING_MIN_BYTES
+)
+
+UPDATE_STAGES = ('load', 'prepare', 'import', 'train', 'recommendations', 'insights')
+# Columns of each streamed chunk kept to build the training frame
+TRAINING_COLUMNS = SURVEY_FEATURE_COLUMNS + ('Knowledge_Score',)
+
+def _training_columns(chunk):
+    """The training columns of a prepared chunk, text stored as categoricals"""
+    part = chunk[[col for col in TRAINING_COLUMNS if col in chunk.columns]].copy()
+    for col in part.columns:
+        if part[col].dtype == object:
+            part[col] = part[col].astype('category')
+    return part
+
+def _concat_training_columns(parts):
+    """Concatenate the training columns of every chunk; categoricals stay categorical"""
+    if not parts:
+        return None
+    columns = {}
+    for col in parts[0].columns:
+        values = [part[col] for part in parts]
+        if all(isinstance(v.dtype, pd.CategoricalDtype) for v in values):
+            columns[col] = pd.Series(union_categoricals(values, ignore_order=True))
+        else:
+            columns[col] = pd.concat(values, ignore_index=True)
+    return pd.DataFrame(columns)
+
+def _stream_prepared_chunks(csv_path, timings, training_parts, aggregates):
+    """
+    Yield the prepared chunks of a large export for the import, keeping only their
+    training columns and folding them into the insights aggregates on the way
+    """
+    chunks = iter_survey_frames(csv_path)
+    while True:
+        started = time.perf_counter()
+        raw = next(chunks, None)
+        timings['load'] += time.perf_counter() - started
+        if raw is None:
+            return
+        started = time.perf_counter()
+        chunk = prepare_survey_frame(raw)
+        training_parts.append(_training_columns(chunk))
+        timings['prepare'] += time.perf_counter() - started
+        started = time.perf_counter()
+        aggregates.update(resolve_survey_schema(chunk.columns), chunk)
+        timings['insights'] += time.perf_counter() - started
+        yield chunk
+
+def update_all(csv_path=SURVEY_CSV_PATH):
+    """
+    Update the database, ML model and insights cache from one load of the survey.
+    The source is read and prepared (columns mapped, knowledge scored) once, then the
+    same frame is fanned out to every stage. Exports of SURVEY_STREAMING_MIN_BYTES or
+    more are streamed chunk by chunk instead: each chunk is imported, folded into the
+    insights aggregates and cut down to the training columns, so the full export is
+    never held in memory. Returns the per-stage timings in seconds.
+    """
     print("🔄 Updating system with latest survey data...\n")
-    
-    with app.app_context():
-        # Step 1: Import survey data to database
-        print("Step 1: Importing survey data...")
-        import_survey_data_from_csv()
-        
-        # Step 2: Retrain ML model
-        print("\nStep 2: Retraining ML model...")
-        train_enhanced_model()
-        
+    timings = dict.fromkeys(UPDATE_STAGES, 0.0)
+
+    def run_stage(name, fn):
+        started = time.perf_counter()
+        result = fn()
+        timings[name] += time.perf_counter() - started
+        print(f"   [{name}] {timings[name]:.2f}s")
+        return result
+
+    streaming = os.path.exists(csv_path) and os.path.getsize(csv_path) >= SURVEY_STREAMING_MIN_BYTES
+    with script_app_context():
+        if streaming:
+            # Steps 1 and 2: Stream, prepare and import the survey chunk by chunk
+            print("Steps 1-2: Streaming and importing survey data...")
+            training_parts = []
+            aggregates = SurveyAggregates()
+            chunks = _stream_prepared_chunks(csv_path, timings, training_parts, aggregates)
+            started = time.perf_counter()
+            import_prepared_survey_frames(chunks, os.path.basename(csv_path))
+            # Reading, preparing and aggregating the chunks is timed by their own stages
+            timings['import'] = (time.perf_counter() - started -
+                                 timings['load'] - timings['prepare'] - timings['insights'])
+            for name in ('load', 'prepare', 'import'):
+                print(f"   [{name}] {timings[name]:.2f}s")
+            df = _concat_training_columns(training_parts)
+            insights = aggregates.to_insights()
+            if insights:
+                print(f"   {insights['summary']['respondent_count']} responses, "
+                      f"average knowledge score {insights['summary']['average_score']:.1f}%")
+        else:
+            # Step 1: Load and prepare the survey once
+            print("Step 1: Loading survey data...")
+            raw_df = run_stage('load', lambda: load_primary_survey_dataframe(csv_path=csv_path))
+            df = run_stage('prepare', lambda: prepare_survey_frame(raw_df))
+            print(f"   {len(df)} responses, average knowledge score {df['Knowledge_Score'].mean():.1f}%")
+
+            # Step 2: Import survey data to database
+            print("\nStep 2: Importing survey data...")
+            run_stage('import', lambda: import_prepared_survey_frames([df], os.path.basename(csv_path)))
+
+        # Step 3: Retrain ML model
+        print("\nStep 3: Retraining ML model...")
+        run_stage('train', lambda: train_enhanced_model(df=df))
+        run_stage('recommendations', refresh_all_recommendations)
+
+        # Step 4: Refresh the visualizations cache
+        print("\nStep 4: Refreshing survey insights...")
+        if streaming:
+            run_stage('insights', lambda: refresh_awareness_insights(insights=insights))
+        else:
+            run_stage('insights', lambda: refresh_awareness_insights(df))
+
         print("\n✅ Update complete!")
         print("   - Survey data imported to database")
         print("   - ML model retrained with latest data")
-        print("   - Application ready to use enhanced model")
+        print("   - User recommendations recomputed")
+        print("   - Survey insights cache refreshed")
+        print("\nStage timings:")
+        for name in UPDATE_STAGES:
+            print(f"   {name:<15} {timings[name]:8.2f}s")
+        print(f"   {'total':<15} {sum(timings.values()):8.2f}s")
+
+    return timings
 
 if __name__ == '__main__':
     update_all()
-